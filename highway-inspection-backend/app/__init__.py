@@ -1,4 +1,5 @@
 import os
+import multiprocessing
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
@@ -15,6 +16,7 @@ def create_app(config_name=None):
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
 
     # 初始化扩展
     db.init_app(app)
@@ -26,6 +28,11 @@ def create_app(config_name=None):
     from app.routes import register_blueprints
     register_blueprints(app)
 
+    # 注册AI模型（首次使用时才加载）
+    if app.config['AI_ENABLED']:
+        from app.services.model_registry import register_models
+        register_models(app.config)
+
     # 创建上传目录
     upload_folder = app.config['UPLOAD_FOLDER']
     if not os.path.exists(upload_folder):
@@ -34,8 +41,15 @@ def create_app(config_name=None):
     # 注册错误处理
     register_error_handlers(app)
 
-    # 注册定时任务
-    register_scheduled_tasks(app)
+    # 注册AI分析任务命令和数据维护命令
+    register_analysis_commands(app)
+    register_maintenance_commands(app)
+
+    # 注册定时任务和分析工作进程池（分析工作子进程中不重复启动）
+    if multiprocessing.parent_process() is None:
+        register_scheduled_tasks(app)
+        register_analysis_workers(app)
+        register_transcode_workers(app)
 
     # 健康检查路由
     @app.route('/health')
@@ -53,7 +67,11 @@ def create_app(config_name=None):
     # 静态文件路由 - 访问上传的文件
     @app.route('/uploads/<path:filename>')
     def serve_uploads(filename):
-        """提供上传文件的访问"""
+        """提供上传文件的访问（支持 Range 请求、ETag 和缓存，可由反向代理发送文件）"""
+        from werkzeug.exceptions import HTTPException, NotFound
+        from app.services.media_serving import send_media
+        from app.utils import error_response
+
         # 使用 uploads 根目录，支持所有子目录（包括 detected_frames）
         uploads_base = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads')
         try:
@@ -62,22 +80,19 @@ def create_app(config_name=None):
             import urllib.parse
             # 如果文件名包含URL编码，先解码
             decoded_filename = urllib.parse.unquote(filename)
-            response = send_from_directory(uploads_base, decoded_filename)
-            # 设置CORS头，允许跨域访问
+            response = send_media(uploads_base, decoded_filename)
+            # 设置CORS头，允许跨域访问（包括视频拖动进度条时的 Range 请求）
             response.headers['Access-Control-Allow-Origin'] = '*'
             response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-            # 设置正确的Content-Type
-            if filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
-                response.headers['Content-Type'] = 'image/jpeg'
-            elif filename.lower().endswith('.png'):
-                response.headers['Content-Type'] = 'image/png'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Range, If-None-Match, If-Range'
+            response.headers['Access-Control-Expose-Headers'] = 'Content-Range, Content-Length, Accept-Ranges, ETag'
             return response
-        except FileNotFoundError:
-            from app.utils import error_response
+        except NotFound:
             return error_response(f'文件不存在: {filename}', 404)
+        except HTTPException as e:
+            # Range 超出文件范围时返回 416（带 Content-Range: bytes */文件大小）
+            return e
         except Exception as e:
-            from app.utils import error_response
             return error_response(f'访问文件失败: {str(e)}', 500)
 
     return app
@@ -124,5 +139,209 @@ def register_scheduled_tasks(app):
         id='check_expired_applications'
     )
 
+    # 定期恢复工作进程异常退出后遗留的分析任务
+    def recover_stale_analysis_jobs():
+        from app.services import AnalysisJobService
+        with app.app_context():
+            try:
+                count = AnalysisJobService.recover_stale_jobs()
+                if count > 0:
+                    print(f'已恢复 {count} 个中断的分析任务')
+            except Exception as e:
+                print(f'恢复分析任务失败: {str(e)}')
+
+    scheduler.add_job(
+        func=recover_stale_analysis_jobs,
+        trigger='interval',
+        minutes=5,
+        id='recover_stale_analysis_jobs'
+    )
+
+    # 定期恢复转码进程异常退出后遗留的转码和播放版本生成
+    def recover_stale_transcodes():
+        from app.services import TranscodeService, RenditionService
+        with app.app_context():
+            try:
+                count = TranscodeService.recover_stale() + RenditionService.recover_stale()
+                if count > 0:
+                    print(f'已恢复 {count} 个中断的视频转码')
+            except Exception as e:
+                print(f'恢复视频转码失败: {str(e)}')
+
+    scheduler.add_job(
+        func=recover_stale_transcodes,
+        trigger='interval',
+        minutes=5,
+        id='recover_stale_transcodes'
+    )
+
+    # 定期用原始数据对账看板每日汇总
+    def reconcile_daily_rollups():
+        from app.services import RollupService
+        with app.app_context():
+            try:
+                RollupService.reconcile(app.config['ROLLUP_RECONCILE_DAYS'])
+            except Exception as e:
+                print(f'看板汇总对账失败: {str(e)}')
+
+    if app.config['ROLLUP_RECONCILE_MINUTES'] > 0:
+        scheduler.add_job(
+            func=reconcile_daily_rollups,
+            trigger='interval',
+            minutes=app.config['ROLLUP_RECONCILE_MINUTES'],
+            id='reconcile_daily_rollups'
+        )
+
+    # 定期清理长时间没有进展的分片上传
+    def cleanup_expired_uploads():
+        from app.services import MediaUploadService
+        with app.app_context():
+            try:
+                count = MediaUploadService.cleanup_expired_uploads(app.config['UPLOAD_SESSION_EXPIRE_HOURS'])
+                if count > 0:
+                    print(f'已清理 {count} 个过期的分片上传')
+            except Exception as e:
+                print(f'清理分片上传失败: {str(e)}')
+
+    scheduler.add_job(
+        func=cleanup_expired_uploads,
+        trigger='interval',
+        hours=1,
+        id='cleanup_expired_uploads'
+    )
+
     scheduler.start()
 
+
+def register_analysis_workers(app):
+    """注册AI分析工作进程池（首个请求到达时启动，避免在重载监控进程中启动）"""
+    if not app.config['ANALYSIS_WORKER_AUTOSTART'] or not app.config['AI_ENABLED'] \
+            or app.config.get('TESTING'):
+        return
+
+    @app.before_request
+    def ensure_analysis_workers():
+        from app.services.analysis_worker import start_worker_pool
+        start_worker_pool(app)
+
+
+def register_transcode_workers(app):
+    """注册视频转码工作进程池（首个请求到达时启动，避免在重载监控进程中启动）"""
+    if not app.config['TRANSCODE_WORKER_AUTOSTART'] or app.config.get('TESTING'):
+        return
+
+    @app.before_request
+    def ensure_transcode_workers():
+        from app.services.transcode_worker import start_transcode_pool
+        start_transcode_pool(app)
+
+
+def register_analysis_commands(app):
+    """注册AI分析相关的命令行"""
+    import click
+
+    @app.cli.command('analysis-worker')
+    @click.option('--workers', type=int, default=None, help='工作进程数量，默认使用 ANALYSIS_WORKERS')
+    def analysis_worker_command(workers):
+        """前台启动AI分析工作进程池"""
+        from app.services.analysis_worker import start_worker_pool
+        pool = start_worker_pool(app, workers)
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pool.stop()
+
+    @app.cli.command('transcode-worker')
+    @click.option('--workers', type=int, default=None, help='工作进程数量，默认使用 TRANSCODE_WORKERS')
+    def transcode_worker_command(workers):
+        """前台启动视频转码工作进程池"""
+        from app.services.transcode_worker import start_transcode_pool
+        pool = start_transcode_pool(app, workers)
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pool.stop()
+
+
+def register_maintenance_commands(app):
+    """注册数据维护相关的命令行"""
+    import click
+
+    @app.cli.command('backfill-route-metrics')
+    @click.option('--batch-size', type=int, default=500, help='每批处理的记录数量')
+    @click.option('--all', 'recompute_all', is_flag=True, help='重新计算所有记录（默认只处理未计算的记录）')
+    def backfill_route_metrics_command(batch_size, recompute_all):
+        """回填飞行申请和飞行任务的航线几何指标（长度、顶点数、外包矩形、飞行速度）"""
+        from app.models import FlightApplication, Mission
+
+        for model in (FlightApplication, Mission):
+            query = model.query.order_by(model.id)
+            if not recompute_all:
+                query = query.filter(model.route_vertex_count.is_(None))
+
+            updated = 0
+            last_id = 0
+            while True:
+                records = query.filter(model.id > last_id).limit(batch_size).all()
+                if not records:
+                    break
+                for record in records:
+                    record.update_route_metrics()
+                    if model is Mission:
+                        record.update_flight_speed()
+                db.session.commit()
+                updated += len(records)
+                last_id = records[-1].id
+                print(f'{model.__tablename__}: 已回填 {updated} 条')
+
+            print(f'✅ {model.__tablename__} 航线几何指标回填完成，共 {updated} 条')
+
+    @app.cli.command('rebuild-daily-rollups')
+    @click.option('--days', type=int, default=None, help='只重新计算最近几天（默认重建全部）')
+    def rebuild_daily_rollups_command(days):
+        """用原始数据重建看板每日汇总（首次部署或数据修复后执行）"""
+        from app.services import RollupService
+
+        count = RollupService.reconcile(days)
+        print(f'✅ 看板每日汇总重建完成，共 {count} 条汇总记录')
+
+    @app.cli.command('backfill-media-hashes')
+    @click.option('--batch-size', type=int, default=100, help='每批处理的记录数量')
+    def backfill_media_hashes_command(batch_size):
+        """计算历史视频文件的内容哈希并登记到内容寻址存储（文件保留在原路径，之后的相同上传会引用它）"""
+        from app.models import Video, MediaBlob
+        from app.services import MediaStore
+        from app.services.media_upload_service import file_sha256
+
+        updated = missing = 0
+        last_id = 0
+        while True:
+            videos = Video.query.filter(Video.content_hash.is_(None), Video.id > last_id) \
+                .order_by(Video.id).limit(batch_size).all()
+            if not videos:
+                break
+            for video in videos:
+                if not video.video_path or not os.path.exists(video.video_path):
+                    missing += 1
+                    continue
+                content_hash = file_sha256(video.video_path)
+                if not MediaStore.get(content_hash):
+                    blob = MediaBlob.query.get(content_hash)
+                    if blob:
+                        blob.file_path = video.video_path
+                    else:
+                        db.session.add(MediaBlob(
+                            content_hash=content_hash,
+                            file_path=video.video_path,
+                            size=os.path.getsize(video.video_path),
+                            ref_count=0
+                        ))
+                        db.session.flush()
+                video.content_hash = content_hash
+                MediaStore.add_ref(content_hash)
+                updated += 1
+            db.session.commit()
+            last_id = videos[-1].id
+            print(f'videos: 已回填 {updated} 条')
+
+        print(f'✅ 视频内容哈希回填完成，共 {updated} 条，文件不存在 {missing} 条')
@@ -10,6 +10,11 @@ from app.models.mission import Mission
 from app.models.video import Video
 from app.models.analysis_result import AnalysisResult
 from app.models.alert import AlertEvent
+from app.models.analysis_job import AnalysisJob
+from app.models.daily_rollup import DailyRollup
+from app.models.upload_session import UploadSession
+from app.models.media_blob import MediaBlob
+from app.models.media_rendition import MediaRendition
 
 __all__ = [
     'db',
@@ -20,6 +25,11 @@ __all__ = [
     'Mission',
     'Video',
     'AnalysisResult',
-    'AlertEvent'
+    'AlertEvent',
+    'AnalysisJob',
+    'DailyRollup',
+    'UploadSession',
+    'MediaBlob',
+    'MediaRendition'
 ]
 
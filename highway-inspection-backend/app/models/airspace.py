@@ -27,19 +27,21 @@ class Airspace(db.Model):
             return json.loads(self.area)
         return self.area
 
-    def to_dict(self):
-        """转换为字典"""
-        return {
+    def to_dict(self, include_area=True):
+        """转换为字典（include_area=False 时不读取空域范围，用于单独返回简化后的范围）"""
+        data = {
             'id': self.id,
             'name': self.name,
             'number': self.number,
             'type': self.type,
-            'area': self.get_area_coordinates(),
             'remark': self.remark,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_area:
+            data['area'] = self.get_area_coordinates()
+        return data
 
     def __repr__(self):
         return f'<Airspace {self.number} - {self.name}>'
@@ -21,6 +21,7 @@ class AlertEvent(db.Model):
     # 索引
     __table_args__ = (
         db.Index('idx_status_time', 'status', 'occurred_time'),
+        db.Index('idx_alert_time', 'occurred_time'),  # 告警列表按时间游标分页
     )
 
     def is_active(self):
@@ -0,0 +1,64 @@
+from datetime import datetime
+from app.models import db
+
+
+class AnalysisJob(db.Model):
+    """AI分析任务队列模型（由本地工作进程消费）"""
+    __tablename__ = 'analysis_jobs'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    detection_type = db.Column(db.String(50), nullable=False, default='traffic_congestion')
+    status = db.Column(db.Enum('queued', 'running', 'completed', 'failed', 'cancelled'), default='queued')
+    progress = db.Column(db.Float, default=0.0)  # 进度百分比 0-100
+    processed_frames = db.Column(db.Integer, default=0)  # 已处理到的视频帧位置
+    total_frames = db.Column(db.Integer)  # 视频总帧数
+    result_count = db.Column(db.Integer, default=0)  # 生成的分析结果数量
+    message = db.Column(db.String(500))  # 完成信息或错误信息
+    stats = db.Column(db.JSON)  # 流水线各阶段吞吐统计
+    cancel_requested = db.Column(db.Boolean, default=False)
+    attempts = db.Column(db.Integer, default=0)  # 已执行次数（重启恢复时累加）
+    worker_id = db.Column(db.String(100))
+    heartbeat_at = db.Column(db.DateTime)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        db.Index('idx_job_status_created', 'status', 'created_at'),
+        db.Index('idx_job_video_status', 'video_id', 'status'),
+    )
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    def is_active(self):
+        """判断任务是否仍在排队或执行"""
+        return self.status in self.ACTIVE_STATUSES
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'id': self.id,
+            'video_id': self.video_id,
+            'user_id': self.user_id,
+            'detection_type': self.detection_type,
+            'status': self.status,
+            'progress': round(self.progress or 0.0, 2),
+            'processed_frames': self.processed_frames,
+            'total_frames': self.total_frames,
+            'result_count': self.result_count,
+            'message': self.message,
+            'stats': self.stats,
+            'cancel_requested': self.cancel_requested,
+            'attempts': self.attempts,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<AnalysisJob {self.id} - {self.status}>'
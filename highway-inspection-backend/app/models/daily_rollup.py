@@ -0,0 +1,197 @@
+"""
+看板每日汇总
+按 (指标, 日期, 操作员, 分类) 保存每天的数量和时长，趋势图直接读取汇总表，不再对原始数据 GROUP BY DATE(...)
+- flight：已完成的飞行任务（按开始日期），累计飞行秒数
+- analysis_result：巡检结果（按发生日期），分类为 target_type
+- alert：告警（按发生日期），分类为 event_type
+
+通过ORM写入的数据在 flush 时自动增量更新；Core 批量写入/删除需调用 add_analysis_result_counts，
+增量遗漏或并发造成的偏差由定时对账（RollupService.reconcile）修正
+增量更新持有锁行的共享锁、对账持有排他锁（lock_rollups），对账期间提交的增量不会被覆盖
+"""
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models import db
+from app.models.mission import Mission
+from app.models.analysis_result import AnalysisResult
+from app.models.alert import AlertEvent
+
+METRIC_FLIGHT = 'flight'
+METRIC_ANALYSIS_RESULT = 'analysis_result'
+METRIC_ALERT = 'alert'
+
+
+class DailyRollup(db.Model):
+    """每日汇总模型"""
+    __tablename__ = 'daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    metric = db.Column(db.String(32), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    operator_id = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(50), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Float, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 唯一索引，同时用于趋势查询按指标和日期范围扫描
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'day', 'operator_id', 'category', name='uq_rollup_key'),
+    )
+
+    def __repr__(self):
+        return f'<DailyRollup {self.metric} {self.day} - {self.count}>'
+
+
+class DailyRollupLock(db.Model):
+    """汇总锁行（只有一行），用于串行化对账与增量更新"""
+    __tablename__ = 'daily_rollup_locks'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+
+def as_date(value):
+    """日期统一转为 date（MySQL的DATE()返回date，SQLite返回字符串）"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def lock_rollups(connection, exclusive=False):
+    """
+    锁定汇总表直到事务结束：增量更新取共享锁（相互不阻塞），对账取排他锁
+    锁行不存在时先插入（并发插入时忽略主键冲突）；SQLite 不支持行锁，写事务本身已串行
+    """
+    table = DailyRollupLock.__table__
+    stmt = select(table.c.id).where(table.c.id == 1).with_for_update(read=not exclusive)
+    if connection.execute(stmt).first() is None:
+        ignore = 'IGNORE' if connection.dialect.name == 'mysql' else 'OR IGNORE'
+        connection.execute(table.insert().prefix_with(ignore).values(id=1))
+        connection.execute(stmt)
+
+
+def increment_rollups(connection, deltas):
+    """
+    累加汇总数据（不存在时插入）
+    :param deltas: {(metric, day, operator_id, category): [count, seconds]}
+    """
+    rows = [{
+        'metric': metric,
+        'day': day,
+        'operator_id': operator_id,
+        'category': category,
+        'count': count,
+        'total_seconds': seconds,
+        'updated_at': datetime.utcnow()
+    } for (metric, day, operator_id, category), (count, seconds) in deltas.items() if count or seconds]
+    if not rows:
+        return
+
+    lock_rollups(connection)
+    table = DailyRollup.__table__
+    if connection.dialect.name == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            count=table.c['count'] + stmt.inserted['count'],
+            total_seconds=table.c.total_seconds + stmt.inserted.total_seconds,
+            updated_at=stmt.inserted.updated_at
+        )
+    else:
+        # 测试环境的SQLite
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['metric', 'day', 'operator_id', 'category'],
+            set_={
+                'count': table.c['count'] + stmt.excluded['count'],
+                'total_seconds': table.c.total_seconds + stmt.excluded.total_seconds,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+    connection.execute(stmt, rows)
+
+
+def _mission_operators(connection, mission_ids):
+    """任务ID -> 操作员ID"""
+    if not mission_ids:
+        return {}
+    rows = connection.execute(
+        select(Mission.id, Mission.operator_id).where(Mission.id.in_(mission_ids))
+    )
+    return dict(rows.all())
+
+
+def add_analysis_result_counts(connection, counts, sign=1):
+    """
+    按 (发生时间或日期, 任务ID, 类型, 数量) 累加巡检结果汇总，sign=-1 表示扣除
+    用于 Core 批量写入/删除等不经过ORM flush 的场景
+    """
+    counts = list(counts)
+    operators = _mission_operators(connection, {mission_id for _, mission_id, _, _ in counts})
+
+    deltas = defaultdict(lambda: [0, 0.0])
+    for day, mission_id, target_type, count in counts:
+        if mission_id not in operators or day is None:
+            continue
+        deltas[(METRIC_ANALYSIS_RESULT, as_date(day), operators[mission_id], target_type)][0] += sign * count
+    increment_rollups(connection, deltas)
+
+
+def _flight_delta(mission):
+    """已完成任务计入的飞行秒数"""
+    if mission.start_time and mission.end_time:
+        return (mission.end_time - mission.start_time).total_seconds()
+    return 0.0
+
+
+@event.listens_for(Session, 'after_flush')
+def update_rollups(session, flush_context):
+    """flush 时根据新增/删除的巡检结果、告警和刚完成的任务增量更新汇总"""
+    facts = []  # (sign, obj)
+    for obj in session.new:
+        if isinstance(obj, (AnalysisResult, AlertEvent)):
+            facts.append((1, obj))
+        elif isinstance(obj, Mission) and obj.status == 'completed':
+            facts.append((1, obj))
+    for obj in session.deleted:
+        if isinstance(obj, (AnalysisResult, AlertEvent)):
+            facts.append((-1, obj))
+    for obj in session.dirty:
+        if isinstance(obj, Mission):
+            history = inspect(obj).attrs.status.history
+            if 'completed' in history.added and 'completed' not in history.deleted:
+                facts.append((1, obj))
+    if not facts:
+        return
+
+    connection = session.connection()
+    operators = _mission_operators(connection, {
+        obj.mission_id for _, obj in facts if not isinstance(obj, Mission)
+    })
+
+    deltas = defaultdict(lambda: [0, 0.0])
+    for sign, obj in facts:
+        if isinstance(obj, Mission):
+            if obj.start_time:
+                key = (METRIC_FLIGHT, obj.start_time.date(), obj.operator_id, '')
+                deltas[key][0] += sign
+                deltas[key][1] += sign * _flight_delta(obj)
+            continue
+
+        operator_id = operators.get(obj.mission_id)
+        if operator_id is None or obj.occurred_time is None:
+            continue
+        if isinstance(obj, AnalysisResult):
+            key = (METRIC_ANALYSIS_RESULT, obj.occurred_time.date(), operator_id, obj.target_type)
+        else:
+            key = (METRIC_ALERT, obj.occurred_time.date(), operator_id, obj.event_type)
+        deltas[key][0] += sign
+
+    increment_rollups(connection, deltas)
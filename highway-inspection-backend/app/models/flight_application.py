@@ -1,9 +1,11 @@
 from datetime import datetime
 from app.models import db
+from app.models.route_metrics import RouteMetricsMixin, register_route_metrics
 import json
 
 
-class FlightApplication(db.Model):
+@register_route_metrics
+class FlightApplication(RouteMetricsMixin, db.Model):
     """飞行申请模型"""
     __tablename__ = 'flight_applications'
 
@@ -28,6 +30,12 @@ class FlightApplication(db.Model):
     missions = db.relationship('Mission', backref='flight_application', lazy='dynamic')
     usage_records = db.relationship('AirspaceUsage', backref='flight_application', lazy='dynamic')
 
+    # 索引
+    __table_args__ = (
+        db.Index('idx_application_created', 'created_at'),  # 申请列表按创建时间游标分页
+        db.Index('idx_application_route_bbox', 'route_min_lng', 'route_max_lng', 'route_min_lat', 'route_max_lat'),
+    )
+
     def get_route_coordinates(self):
         """获取航线坐标"""
         if isinstance(self.route, str):
@@ -66,6 +74,9 @@ class FlightApplication(db.Model):
             'planned_end_time': self.planned_end_time.isoformat() if self.planned_end_time else None,
             'total_time': self.total_time,
             'route': self.get_route_coordinates(),
+            'route_distance': round(self.get_route_distance(), 2),  # 航线距离（公里）
+            'route_vertex_count': self.route_vertex_count,
+            'route_bbox': self.get_route_bbox(),  # 航线外包矩形 [min_lng, min_lat, max_lng, max_lat]
             'status': self.status,
             'is_long_term': self.is_long_term,
             'long_term_start': self.long_term_start.isoformat() if self.long_term_start else None,
@@ -0,0 +1,32 @@
+from datetime import datetime
+from app.models import db
+
+
+class MediaBlob(db.Model):
+    """内容寻址的媒体文件（按上传内容的 SHA-256 去重，多个视频记录可以引用同一个文件）"""
+    __tablename__ = 'media_blobs'
+
+    content_hash = db.Column(db.String(64), primary_key=True)  # 上传内容的 SHA-256（十六进制）
+    file_path = db.Column(db.String(500), nullable=False)  # 存储路径（AVI 为转换后的 MP4）
+    size = db.Column(db.BigInteger)  # 上传内容的字节数
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # 引用该文件的视频记录数
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        db.Index('idx_media_blob_path', 'file_path'),  # 按历史文件路径查找内容哈希（/uploads 访问时生成 ETag）
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'content_hash': self.content_hash,
+            'file_path': self.file_path,
+            'size': self.size,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<MediaBlob {self.content_hash[:12]} refs={self.ref_count}>'
@@ -0,0 +1,42 @@
+from datetime import datetime
+from app.models import db
+
+
+class MediaRendition(db.Model):
+    """视频的网页播放版本（低码率代理 / HLS 切片），按内容哈希生成，相同内容的视频共用"""
+    __tablename__ = 'media_renditions'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    content_hash = db.Column(db.String(64), db.ForeignKey('media_blobs.content_hash'), nullable=False)
+    kind = db.Column(db.Enum('proxy', 'hls'), nullable=False)  # proxy 低码率 MP4 / hls 播放列表和切片
+    status = db.Column(db.Enum('pending', 'processing', 'ready', 'failed'), default='pending')
+    file_path = db.Column(db.String(500))  # 生成后的文件路径（HLS 为播放列表）
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    file_size = db.Column(db.BigInteger)  # 字节（HLS 为所有切片之和）
+    message = db.Column(db.String(500))  # 失败原因
+    heartbeat_at = db.Column(db.DateTime)  # 工作进程最近一次上报进度的时间
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'kind', name='uq_rendition_content_kind'),
+        db.Index('idx_rendition_status', 'status', 'id'),  # 工作进程领取待生成的版本
+    )
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'kind': self.kind,
+            'status': self.status,
+            'file_path': self.file_path if self.status == 'ready' else None,
+            'width': self.width,
+            'height': self.height,
+            'file_size': self.file_size,
+            'message': self.message,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<MediaRendition {self.content_hash[:12]} {self.kind} - {self.status}>'
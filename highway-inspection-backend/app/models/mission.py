@@ -1,7 +1,10 @@
 from datetime import datetime, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app.models import db
+from app.models.route_metrics import RouteMetricsMixin, register_route_metrics
+from app.utils.geo import route_coordinates, route_length
 import json
-import math
 
 
 def utcnow():
@@ -9,7 +12,8 @@ def utcnow():
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
-class Mission(db.Model):
+@register_route_metrics
+class Mission(RouteMetricsMixin, db.Model):
     """飞行任务模型"""
     __tablename__ = 'missions'
 
@@ -17,6 +21,7 @@ class Mission(db.Model):
     flight_application_id = db.Column(db.Integer, db.ForeignKey('flight_applications.id'), nullable=False)
     operator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     route = db.Column(db.JSON, nullable=False)
+    flight_speed = db.Column(db.Float)  # 飞行速度（公里/小时），放飞时计算
     start_time = db.Column(db.DateTime)
     end_time = db.Column(db.DateTime)
     status = db.Column(db.Enum('executing', 'completed'), default='executing')
@@ -28,6 +33,14 @@ class Mission(db.Model):
     analysis_results = db.relationship('AnalysisResult', backref='mission', lazy='dynamic')
     alert_events = db.relationship('AlertEvent', backref='mission', lazy='dynamic')
 
+    # 索引
+    __table_args__ = (
+        # 操作员数据范围：按操作员查任务列表，以及 owned_by 子查询（索引包含主键，无需回表）
+        db.Index('idx_mission_operator_created', 'operator_id', 'created_at'),
+        db.Index('idx_mission_created', 'created_at'),  # 管理员任务列表按创建时间游标分页
+        db.Index('idx_mission_route_bbox', 'route_min_lng', 'route_max_lng', 'route_min_lat', 'route_max_lat'),
+    )
+
     def get_route_coordinates(self):
         """获取航线坐标"""
         if isinstance(self.route, str):
@@ -40,42 +53,18 @@ class Mission(db.Model):
 
     def calculate_route_distance(self):
         """计算航线总长度（公里）- 使用Haversine公式"""
-        coords = self.get_route_coordinates()
-        if not coords:
-            return 0.0
-        
-        # 处理GeoJSON格式：可能是直接数组或包含coordinates的对象
-        if isinstance(coords, dict) and 'coordinates' in coords:
-            # GeoJSON LineString格式: {"type": "LineString", "coordinates": [[lng, lat], ...]}
-            coord_list = coords['coordinates']
-        elif isinstance(coords, list):
-            # 直接数组格式: [[lng, lat], ...]
-            coord_list = coords
-        else:
-            return 0.0
-        
-        if len(coord_list) < 2:
-            return 0.0
-        
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            """计算两点间距离（公里）"""
-            R = 6371  # 地球半径（公里）
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = math.sin(dlat / 2) ** 2 + \
-                math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
-                math.sin(dlon / 2) ** 2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            return R * c
-        
-        total_distance = 0.0
-        for i in range(len(coord_list) - 1):
-            # GeoJSON格式是[lng, lat]，需要转换为[lat, lng]用于计算
-            lon1, lat1 = coord_list[i]
-            lon2, lat2 = coord_list[i + 1]
-            total_distance += haversine_distance(lat1, lon1, lat2, lon2)
-        
-        return total_distance
+        return route_length(route_coordinates(self.route))
+
+    def update_flight_speed(self):
+        """根据航线长度和申请的飞行时长计算并保存飞行速度"""
+        self.flight_speed = self.calculate_flight_speed()
+        return self.flight_speed
+
+    def get_flight_speed(self):
+        """飞行速度（公里/小时），优先使用已保存的值"""
+        if self.flight_speed is not None:
+            return self.flight_speed
+        return self.calculate_flight_speed()
 
     def calculate_flight_speed(self):
         """计算飞行速度（公里/小时）
@@ -84,7 +73,7 @@ class Mission(db.Model):
         if not self.flight_application or not self.flight_application.total_time:
             return None
         
-        route_distance = self.calculate_route_distance()
+        route_distance = self.get_route_distance()
         if route_distance == 0:
             return None
         
@@ -96,8 +85,59 @@ class Mission(db.Model):
         speed = route_distance / flight_time_hours
         return round(speed, 2)
 
-    def to_dict(self, include_relations=False):
-        """转换为字典"""
+    @classmethod
+    def owned_by(cls, operator_id, column, key=None):
+        """
+        操作员数据范围过滤条件：column 的值属于该操作员的任务
+        column 一般是关联表的 mission_id 列，key 为与之对应的任务表列（默认任务ID）
+        用子查询在数据库中完成过滤，不把操作员的全部任务ID取回Python
+        """
+        key = cls.id if key is None else key
+        return column.in_(db.select(key).where(cls.operator_id == int(operator_id)))
+
+    @classmethod
+    def scope_query(cls, query, user, column, key=None):
+        """管理员不做限制，操作员只保留自己任务的数据"""
+        if user is None or user.is_admin():
+            return query
+        return query.filter(cls.owned_by(user.id, column, key))
+
+    @classmethod
+    def relation_load_options(cls):
+        """序列化关联数据（操作员、飞行申请）时使用的预加载选项，避免逐条懒加载"""
+        return (joinedload(cls.operator), joinedload(cls.flight_application))
+
+    @staticmethod
+    def get_analysis_results_counts(mission_ids):
+        """一次分组查询获取多个任务的AI分析结果数量 {mission_id: count}"""
+        from app.models.analysis_result import AnalysisResult
+
+        if not mission_ids:
+            return {}
+        rows = db.session.query(
+            AnalysisResult.mission_id, func.count(AnalysisResult.id)
+        ).filter(
+            AnalysisResult.mission_id.in_(mission_ids)
+        ).group_by(AnalysisResult.mission_id).all()
+        return dict(rows)
+
+    @classmethod
+    def to_dict_list(cls, missions, include_relations=False):
+        """
+        批量序列化任务列表
+        分析结果数量通过一次分组查询获得；需要关联数据时，查询应带上 relation_load_options()
+        """
+        counts = cls.get_analysis_results_counts([mission.id for mission in missions])
+        return [
+            mission.to_dict(include_relations, analysis_results_count=counts.get(mission.id, 0))
+            for mission in missions
+        ]
+
+    def to_dict(self, include_relations=False, analysis_results_count=None):
+        """转换为字典（analysis_results_count 由批量序列化传入，未传入时单独查询）"""
+        if analysis_results_count is None:
+            analysis_results_count = self.analysis_results.count()
+
         data = {
             'id': self.id,
             'flight_application_id': self.flight_application_id,
@@ -108,9 +148,10 @@ class Mission(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'route_distance': round(self.calculate_route_distance(), 2),  # 航线距离（公里）
-            'flight_speed': self.calculate_flight_speed(),  # 飞行速度（公里/小时）
-            'analysis_results_count': self.analysis_results.count()  # AI分析结果数量
+            'route_distance': round(self.get_route_distance(), 2),  # 航线距离（公里）
+            'route_bbox': self.get_route_bbox(),  # 航线外包矩形 [min_lng, min_lat, max_lng, max_lat]
+            'flight_speed': self.get_flight_speed(),  # 飞行速度（公里/小时）
+            'analysis_results_count': analysis_results_count  # AI分析结果数量
         }
 
         if include_relations:
@@ -0,0 +1,68 @@
+"""
+航线几何指标
+航线写入时计算一次航线长度、顶点数和外包矩形并保存到表中，序列化和统计时直接读取
+"""
+from sqlalchemy import event, inspect
+
+from app.models import db
+from app.utils.geo import route_coordinates, route_length, route_bbox
+
+
+def compute_route_metrics(route):
+    """计算航线长度、顶点数和外包矩形"""
+    coord_list = route_coordinates(route)
+    bbox = route_bbox(coord_list) or (None, None, None, None)
+    return {
+        'route_distance': route_length(coord_list),
+        'route_vertex_count': len(coord_list),
+        'route_min_lng': bbox[0],
+        'route_min_lat': bbox[1],
+        'route_max_lng': bbox[2],
+        'route_max_lat': bbox[3]
+    }
+
+
+class RouteMetricsMixin:
+    """带航线（route 列）的模型的几何指标列，route 变化时在写库前自动重新计算"""
+
+    route_distance = db.Column(db.Float)  # 航线总长度（公里）
+    route_vertex_count = db.Column(db.Integer)  # 航线顶点数
+    # 航线外包矩形（经纬度），用于地图视野范围查询
+    route_min_lng = db.Column(db.Float)
+    route_min_lat = db.Column(db.Float)
+    route_max_lng = db.Column(db.Float)
+    route_max_lat = db.Column(db.Float)
+
+    def update_route_metrics(self):
+        """根据航线重新计算并保存几何指标"""
+        for key, value in compute_route_metrics(self.route).items():
+            setattr(self, key, value)
+        return self.route_distance
+
+    def has_route_metrics(self):
+        """几何指标是否已计算（历史数据需要回填）"""
+        return self.route_vertex_count is not None
+
+    def get_route_distance(self):
+        """航线长度（公里），优先使用已保存的值"""
+        if self.route_distance is not None:
+            return self.route_distance
+        return route_length(route_coordinates(self.route))
+
+    def get_route_bbox(self):
+        """航线外包矩形 [min_lng, min_lat, max_lng, max_lat]，未计算或无坐标时返回None"""
+        if self.route_min_lng is None:
+            return None
+        return [self.route_min_lng, self.route_min_lat, self.route_max_lng, self.route_max_lat]
+
+
+def register_route_metrics(model):
+    """route 列新增或修改时自动更新几何指标"""
+
+    def update_metrics(mapper, connection, target):
+        if not target.has_route_metrics() or inspect(target).attrs.route.history.has_changes():
+            target.update_route_metrics()
+
+    event.listen(model, 'before_insert', update_metrics)
+    event.listen(model, 'before_update', update_metrics)
+    return model
@@ -0,0 +1,53 @@
+from datetime import datetime
+from app.models import db
+
+
+class UploadSession(db.Model):
+    """分片上传会话（断点续传）"""
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True)  # 上传ID（随机十六进制串）
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    mission_id = db.Column(db.Integer, db.ForeignKey('missions.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)  # 安全处理后的原始文件名
+    media_type = db.Column(db.String(20), default='video')  # video / image
+    collected_time = db.Column(db.DateTime)
+    road_section = db.Column(db.String(200), default='')
+    file_format = db.Column(db.String(10))
+    total_size = db.Column(db.BigInteger, nullable=False)  # 文件总字节数
+    received_bytes = db.Column(db.BigInteger, default=0)  # 已连续写入的字节数，续传从这里开始
+    checksum = db.Column(db.String(64))  # 客户端提供的 SHA-256（十六进制），完成时校验
+    file_path = db.Column(db.String(500), nullable=False)  # 最终文件路径，上传期间写入 file_path + '.part'
+    status = db.Column(db.Enum('uploading', 'completing', 'completed', 'aborted'), default='uploading')  # completing：正在校验和创建视频记录
+    video_id = db.Column(db.Integer, db.ForeignKey('videos.id'))  # 完成后创建的视频记录
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 索引
+    __table_args__ = (
+        db.Index('idx_upload_status_updated', 'status', 'updated_at'),  # 清理过期的未完成上传
+    )
+
+    @property
+    def part_path(self):
+        """上传期间的临时文件路径（与 file_path 在同一目录，完成时直接重命名）"""
+        return f'{self.file_path}.part'
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'upload_id': self.id,
+            'mission_id': self.mission_id,
+            'filename': self.filename,
+            'media_type': self.media_type,
+            'total_size': self.total_size,
+            'received_bytes': self.received_bytes or 0,
+            'progress': round((self.received_bytes or 0) / self.total_size * 100, 2) if self.total_size else 100.0,
+            'status': self.status,
+            'video_id': self.video_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} - {self.status}>'
@@ -14,11 +14,24 @@ class Video(db.Model):
     file_format = db.Column(db.String(10), default='mp4')
     file_size = db.Column(db.BigInteger)  # 字节
     duration = db.Column(db.Integer)  # 秒
+    content_hash = db.Column(db.String(64), db.ForeignKey('media_blobs.content_hash'))  # 上传内容的 SHA-256
+    # AVI 转 MP4 后台转码状态，不需要转码时为空；转码完成前 video_path 指向原始文件
+    transcode_status = db.Column(db.Enum('pending', 'processing', 'ready', 'failed'))
+    transcode_progress = db.Column(db.Float, default=0.0)  # 转码进度百分比 0-100
+    transcode_heartbeat_at = db.Column(db.DateTime)  # 转码进程最近一次上报进度的时间
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # 关系
     analysis_results = db.relationship('AnalysisResult', backref='video', lazy='dynamic')
     alert_events = db.relationship('AlertEvent', backref='video', lazy='dynamic')
+    analysis_jobs = db.relationship('AnalysisJob', backref='video', lazy='dynamic')
+
+    # 索引
+    __table_args__ = (
+        db.Index('idx_video_created', 'created_at'),  # 视频列表按上传时间游标分页
+        db.Index('idx_video_content_hash', 'content_hash'),  # 查找相同内容的视频（复用分析结果）
+        db.Index('idx_video_transcode_status', 'transcode_status', 'id'),  # 转码进程领取待转码视频
+    )
 
     def to_dict(self, include_relations=False):
         """转换为字典"""
@@ -31,6 +44,9 @@ class Video(db.Model):
             'file_format': self.file_format,
             'file_size': self.file_size,
             'duration': self.duration,
+            'content_hash': self.content_hash,
+            'transcode_status': self.transcode_status,
+            'transcode_progress': round(self.transcode_progress or 0.0, 2) if self.transcode_status else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
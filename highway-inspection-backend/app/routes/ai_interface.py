@@ -2,11 +2,13 @@
 AI模块接口
 供AI分析模块调用的接口，用于提交分析结果
 """
-from flask import Blueprint, request
+from flask import Blueprint, request, current_app
 from marshmallow import ValidationError, Schema, fields
 
 from app.models import db, AnalysisResult
-from app.utils import success_response, error_response
+from app.utils import success_response, error_response, admin_required
+from app.services.result_sink import AnalysisResultSink
+from app.services.model_registry import model_registry
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -70,28 +72,25 @@ def submit_analysis_results_batch():
         if not results_data:
             return error_response('结果列表不能为空', 400)
 
-        # 批量创建分析结果
-        results = []
+        # 先校验全部数据，再在同一事务中批量写入
         schema = AnalysisResultSubmitSchema()
-
-        for item in results_data:
-            validated_data = schema.load(item)
-            result = AnalysisResult(
-                mission_id=validated_data['mission_id'],
-                video_id=validated_data['video_id'],
-                target_type=validated_data['target_type'],
+        validated_items = [schema.load(item) for item in results_data]
+
+        sink = AnalysisResultSink(flush_size=len(validated_items), flush_seconds=None)
+        for validated_data in validated_items:
+            sink.add(
+                validated_data['mission_id'],
+                validated_data['video_id'],
+                validated_data['target_type'],
                 occurred_time=validated_data['occurred_time'],
-                bounding_box=validated_data.get('bounding_box'),
-                confidence=validated_data.get('confidence')
+                confidence=validated_data.get('confidence'),
+                bounding_box=validated_data.get('bounding_box')
             )
-            results.append(result)
-
-        db.session.bulk_save_objects(results)
-        db.session.commit()
+        sink.flush()
 
         return success_response(
-            data={'count': len(results)},
-            message=f'成功提交 {len(results)} 条分析结果',
+            data={'count': sink.total},
+            message=f'成功提交 {sink.total} 条分析结果',
             code=201
         )
 
@@ -101,6 +100,26 @@ def submit_analysis_results_batch():
         return error_response(f'批量提交分析结果失败: {str(e)}', 500)
 
 
+@ai_bp.route('/models', methods=['GET'])
+@admin_required
+def get_model_stats():
+    """
+    查看模型加载情况（管理员）
+    包括本进程及各分析工作进程中每个模型的加载耗时、预热耗时、会话数和内存占用
+    """
+    try:
+        workers = model_registry.load_worker_stats(
+            current_app.config['AI_MODEL_STATS_DIR'],
+            current_app.config['ANALYSIS_JOB_STALE_SECONDS']
+        )
+        return success_response(data={
+            'current_process': model_registry.get_stats(),
+            'workers': workers
+        })
+    except Exception as e:
+        return error_response(f'获取模型状态失败: {str(e)}', 500)
+
+
 @ai_bp.route('/health', methods=['GET'])
 def ai_health_check():
     """
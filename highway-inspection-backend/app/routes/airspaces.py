@@ -36,6 +36,57 @@ def get_airspaces():
         return error_response(f'获取空域列表失败: {str(e)}', 500)
 
 
+def _zoom_arg():
+    """地图缩放级别参数（0-22），未传时返回None（不简化）"""
+    zoom = request.args.get('zoom', None, type=int)
+    if zoom is None:
+        return None
+    return min(max(zoom, 0), 22)
+
+
+@airspaces_bp.route('/viewport', methods=['GET'])
+@login_required
+def get_viewport_airspaces():
+    """获取地图视野范围内的空域，bbox=min_lng,min_lat,max_lng,max_lat，按 zoom 简化空域范围"""
+    try:
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(value) for value in request.args['bbox'].split(','))
+        except (KeyError, ValueError):
+            return error_response('bbox参数格式应为 min_lng,min_lat,max_lng,max_lat', 400)
+
+        airspaces = AirspaceService.get_airspaces_in_viewport(
+            min_lng, min_lat, max_lng, max_lat,
+            zoom=_zoom_arg(),
+            type=request.args.get('type', None),
+            status=request.args.get('status', None)
+        )
+
+        return success_response(data=airspaces)
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(f'获取视野内空域失败: {str(e)}', 500)
+
+
+@airspaces_bp.route('/at-point', methods=['GET'])
+@login_required
+def get_point_airspaces():
+    """获取包含某个点的空域（lng、lat），按 zoom 简化空域范围"""
+    try:
+        lng = request.args.get('lng', None, type=float)
+        lat = request.args.get('lat', None, type=float)
+        if lng is None or lat is None:
+            return error_response('缺少必要参数', 400)
+
+        airspaces = AirspaceService.get_airspaces_at_point(lng, lat, zoom=_zoom_arg())
+
+        return success_response(data=airspaces)
+
+    except Exception as e:
+        return error_response(f'查询点位空域失败: {str(e)}', 500)
+
+
 @airspaces_bp.route('/<int:airspace_id>', methods=['GET'])
 @login_required
 def get_airspace(airspace_id):
@@ -162,3 +213,22 @@ def check_airspace_conflict(airspace_id):
     except Exception as e:
         return error_response(f'检查冲突失败: {str(e)}', 500)
 
+
+@airspaces_bp.route('/check-route', methods=['POST'])
+@login_required
+def check_route():
+    """检查航线是否在空域内、是否穿越禁飞区（填写申请时预检查）"""
+    try:
+        data = request.get_json() or {}
+        route = data.get('route')
+        airspace_id = data.get('airspace_id')
+
+        if not route:
+            return error_response('缺少必要参数', 400)
+
+        result = AirspaceService.check_route(route, airspace_id)
+
+        return success_response(data=result)
+
+    except Exception as e:
+        return error_response(f'检查航线失败: {str(e)}', 500)
@@ -1,11 +1,13 @@
 
 from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity
 from marshmallow import ValidationError
 
-from app.models import db, AlertEvent, Mission, User
+from app.models import db, AlertEvent, Mission
 from app.schemas.alert_schema import AlertCreateSchema, AlertUpdateSchema
-from app.utils import success_response, error_response, paginate_response, login_required
+from app.utils import (
+    success_response, error_response, paginate_response, cursor_response, login_required, get_current_user,
+    is_cursor_request, cursor_args, keyset_paginate
+)
 
 alerts_bp = Blueprint('alerts', __name__)
 
@@ -15,8 +17,7 @@ alerts_bp = Blueprint('alerts', __name__)
 def get_alerts():
     """获取告警列表"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 20, type=int)
@@ -27,9 +28,7 @@ def get_alerts():
         query = AlertEvent.query
 
         # 操作员只能查看自己任务的告警
-        if not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user_id).all()]
-            query = query.filter(AlertEvent.mission_id.in_(mission_ids))
+        query = Mission.scope_query(query, user, AlertEvent.mission_id)
 
         if status:
             query = query.filter_by(status=status)
@@ -38,6 +37,18 @@ def get_alerts():
         if mission_id:
             query = query.filter_by(mission_id=mission_id)
 
+        # 游标分页
+        if is_cursor_request():
+            alerts, next_cursor, total = keyset_paginate(
+                query, AlertEvent.occurred_time, AlertEvent.id, page_size=page_size, **cursor_args()
+            )
+            return cursor_response(
+                items=[alert.to_dict(include_relations=True) for alert in alerts],
+                next_cursor=next_cursor,
+                page_size=page_size,
+                total=total
+            )
+
         total = query.count()
         alerts = query.order_by(AlertEvent.occurred_time.desc()).offset((page - 1) * page_size).limit(page_size).all()
 
@@ -48,6 +59,8 @@ def get_alerts():
             page_size=page_size
         )
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f'获取告警列表失败: {str(e)}', 500)
 
@@ -57,15 +70,14 @@ def get_alerts():
 def get_alert(alert_id):
     """获取告警详情"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         alert = AlertEvent.query.get(alert_id)
         if not alert:
             return error_response('告警不存在', 404)
 
         # 操作员只能查看自己任务的告警
-        if not user.is_admin() and alert.mission.operator_id != user_id:
+        if not user.is_admin() and alert.mission.operator_id != user.id:
             return error_response('无权限查看此告警', 403)
 
         return success_response(data=alert.to_dict(include_relations=True))
@@ -104,15 +116,14 @@ def create_alert():
 def update_alert(alert_id):
     """更新告警状态"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         alert = AlertEvent.query.get(alert_id)
         if not alert:
             return error_response('告警不存在', 404)
 
         # 操作员只能更新自己任务的告警
-        if not user.is_admin() and alert.mission.operator_id != user_id:
+        if not user.is_admin() and alert.mission.operator_id != user.id:
             return error_response('无权限更新此告警', 403)
 
         # 验证请求数据
@@ -138,15 +149,12 @@ def update_alert(alert_id):
 def get_active_alerts():
     """获取活跃告警"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         query = AlertEvent.query.filter(AlertEvent.status.in_(['new', 'confirmed', 'processing']))
 
         # 操作员只能查看自己任务的告警
-        if not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user_id).all()]
-            query = query.filter(AlertEvent.mission_id.in_(mission_ids))
+        query = Mission.scope_query(query, user, AlertEvent.mission_id)
 
         alerts = query.order_by(AlertEvent.occurred_time.desc()).all()
 
@@ -1,10 +1,9 @@
 from flask import Blueprint, request
 from datetime import datetime
-from flask_jwt_extended import get_jwt_identity
 
 from app.services import DashboardService
-from app.models import User
-from app.utils import success_response, error_response, login_required
+from app.services.dashboard_cache import dashboard_cache, dashboard_cached
+from app.utils import success_response, error_response, login_required, admin_required, get_current_user
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -24,12 +23,12 @@ def parse_date(date_str):
 
 @dashboard_bp.route('/stats', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_dashboard_stats():
     """获取数据看板统计（总览）"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         # 获取查询参数
         start_date_str = request.args.get('start_date', None)
@@ -54,12 +53,12 @@ def get_dashboard_stats():
 
 @dashboard_bp.route('/flight-stats', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_flight_stats():
     """获取飞行统计"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -82,12 +81,12 @@ def get_flight_stats():
 
 @dashboard_bp.route('/airspace-usage', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_airspace_usage():
     """获取空域使用统计"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -110,12 +109,12 @@ def get_airspace_usage():
 
 @dashboard_bp.route('/alert-stats', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_alert_stats():
     """获取告警统计"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -138,12 +137,12 @@ def get_alert_stats():
 
 @dashboard_bp.route('/alert-trend', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_alert_trend():
     """获取告警趋势"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -172,12 +171,12 @@ def get_alert_trend():
 
 @dashboard_bp.route('/flight-trend', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_flight_trend():
     """获取飞行任务趋势"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -203,12 +202,12 @@ def get_flight_trend():
 
 @dashboard_bp.route('/inspection-results', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_inspection_results():
     """获取巡检结果统计"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -231,12 +230,12 @@ def get_inspection_results():
 
 @dashboard_bp.route('/inspection-trend', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_inspection_trend():
     """获取巡检结果趋势"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -265,12 +264,12 @@ def get_inspection_trend():
 
 @dashboard_bp.route('/inspection-type-distribution', methods=['GET'])
 @login_required
+@dashboard_cached
 def get_inspection_type_distribution():
     """获取巡检结果类型分布"""
     try:
         # 获取当前用户
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
         
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
@@ -290,3 +289,13 @@ def get_inspection_type_distribution():
     except Exception as e:
         return error_response(f'获取巡检结果类型分布失败: {str(e)}', 500)
 
+
+@dashboard_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """获取看板缓存命中统计（当前进程，仅管理员）"""
+    try:
+        return success_response(data=dashboard_cache.get_stats())
+
+    except Exception as e:
+        return error_response(f'获取缓存统计失败: {str(e)}', 500)
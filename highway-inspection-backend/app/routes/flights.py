@@ -2,10 +2,12 @@ from flask import Blueprint, request
 from flask_jwt_extended import get_jwt_identity
 from marshmallow import ValidationError
 
-from app.models import User
 from app.services import FlightService
 from app.schemas.flight_schema import FlightApplicationCreateSchema, FlightApplicationUpdateSchema, FlightApprovalSchema
-from app.utils import success_response, error_response, paginate_response, admin_required, login_required
+from app.utils import (
+    success_response, error_response, paginate_response, cursor_response, admin_required, login_required,
+    get_current_user, is_cursor_request, cursor_args
+)
 
 flights_bp = Blueprint('flights', __name__)
 
@@ -16,12 +18,23 @@ def get_flights():
     """获取飞行申请列表"""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 20, type=int)
         status = request.args.get('status', None)
 
+        # 游标分页
+        if is_cursor_request():
+            result = FlightService.get_application_page(
+                user_id=user_id,
+                is_admin=user.is_admin(),
+                status=status,
+                page_size=page_size,
+                **cursor_args()
+            )
+            return cursor_response(**result)
+
         result = FlightService.get_application_list(
             user_id=user_id,
             is_admin=user.is_admin(),
@@ -37,6 +50,8 @@ def get_flights():
             page_size=result['page_size']
         )
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f'获取申请列表失败: {str(e)}', 500)
 
@@ -48,7 +63,7 @@ def get_flight(flight_id):
     try:
         from app.models import FlightApplication
         user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         flight = FlightApplication.query.get(flight_id)
         if not flight:
@@ -228,6 +243,19 @@ def get_pending_flights():
         return error_response(f'获取待审批列表失败: {str(e)}', 500)
 
 
+@flights_bp.route('/conflicts', methods=['GET'])
+@admin_required
+def get_flight_conflicts():
+    """检测所有待审批申请的空域冲突（仅管理员）"""
+    try:
+        conflicts = FlightService.detect_conflicts()
+
+        return success_response(data=conflicts)
+
+    except Exception as e:
+        return error_response(f'检测申请冲突失败: {str(e)}', 500)
+
+
 @flights_bp.route('/<int:flight_id>/terminate',methods=['POST'])
 @admin_required
 def terminate_flights(flight_id):
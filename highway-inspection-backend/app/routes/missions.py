@@ -1,8 +1,10 @@
 from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity
 
-from app.models import Mission, User
-from app.utils import success_response, error_response, paginate_response, login_required
+from app.models import Mission
+from app.utils import (
+    success_response, error_response, paginate_response, cursor_response, login_required, get_current_user,
+    is_cursor_request, cursor_args, keyset_paginate
+)
 
 missions_bp = Blueprint('missions', __name__)
 
@@ -12,8 +14,7 @@ missions_bp = Blueprint('missions', __name__)
 def get_missions():
     """获取任务列表"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 20, type=int)
@@ -23,21 +24,38 @@ def get_missions():
 
         # 操作员只能查看自己的任务
         if not user.is_admin():
-            query = query.filter_by(operator_id=user_id)
+            query = query.filter_by(operator_id=user.id)
 
         if status:
             query = query.filter_by(status=status)
 
+        # 游标分页
+        if is_cursor_request():
+            missions, next_cursor, total = keyset_paginate(
+                query.options(*Mission.relation_load_options()), Mission.created_at, Mission.id,
+                page_size=page_size, **cursor_args()
+            )
+            return cursor_response(
+                items=Mission.to_dict_list(missions, include_relations=True),
+                next_cursor=next_cursor,
+                page_size=page_size,
+                total=total
+            )
+
         total = query.count()
-        missions = query.order_by(Mission.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
+        missions = query.options(*Mission.relation_load_options()).order_by(
+            Mission.created_at.desc()
+        ).offset((page - 1) * page_size).limit(page_size).all()
 
         return paginate_response(
-            items=[mission.to_dict(include_relations=True) for mission in missions],
+            items=Mission.to_dict_list(missions, include_relations=True),
             total=total,
             page=page,
             page_size=page_size
         )
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f'获取任务列表失败: {str(e)}', 500)
 
@@ -47,15 +65,14 @@ def get_missions():
 def get_mission(mission_id):
     """获取任务详情"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         mission = Mission.query.get(mission_id)
         if not mission:
             return error_response('任务不存在', 404)
 
         # 操作员只能查看自己的任务
-        if not user.is_admin() and mission.operator_id != user_id:
+        if not user.is_admin() and mission.operator_id != user.id:
             return error_response('无权限查看此任务', 403)
 
         return success_response(data=mission.to_dict(include_relations=True))
@@ -72,16 +89,15 @@ def get_active_missions():
         from datetime import datetime, timezone
         from app.models import db, Airspace
         
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         query = Mission.query.filter_by(status='executing')
 
         # 操作员只能查看自己的任务
         if not user.is_admin():
-            query = query.filter_by(operator_id=user_id)
+            query = query.filter_by(operator_id=user.id)
 
-        missions = query.all()
+        missions = query.options(*Mission.relation_load_options()).all()
         
         # 检查并自动结束超时的任务
         now = datetime.now(timezone.utc).replace(tzinfo=None)
@@ -104,7 +120,7 @@ def get_active_missions():
             print(f"[INFO] 自动结束了 {completed_count} 个超时任务")
 
         return success_response(
-            data=[mission.to_dict(include_relations=True) for mission in missions]
+            data=Mission.to_dict_list(missions, include_relations=True)
         )
 
     except Exception as e:
@@ -119,13 +135,13 @@ def complete_mission(mission_id):
         from datetime import datetime, timezone
         from app.models import db, Airspace
 
-        user_id = int(get_jwt_identity())
+        user = get_current_user()
 
         mission = Mission.query.get(mission_id)
         if not mission:
             return error_response('任务不存在', 404)
 
-        if mission.operator_id != user_id:
+        if mission.operator_id != user.id:
             return error_response('无权限操作此任务', 403)
 
         if mission.status != 'executing':
@@ -5,7 +5,7 @@ from marshmallow import ValidationError
 from app.models import User
 from app.services import AuthService
 from app.schemas.user_schema import UserUpdateSchema
-from app.utils import success_response, error_response, paginate_response, admin_required, login_required
+from app.utils import success_response, error_response, paginate_response, admin_required, login_required, get_current_user, invalidate_user
 
 users_bp = Blueprint('users', __name__)
 
@@ -44,7 +44,7 @@ def get_user(user_id):
     """获取用户详情"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(int(current_user_id))
+        current_user = get_current_user()
 
         # 普通用户只能查看自己，管理员可以查看所有用户
         if not current_user.is_admin() and int(current_user_id) != user_id:
@@ -66,7 +66,7 @@ def update_user(user_id):
     """更新用户信息"""
     try:
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(int(current_user_id))
+        current_user = get_current_user()
 
         # 普通用户只能修改自己，管理员可以修改所有用户
         if not current_user.is_admin() and current_user_id != user_id:
@@ -112,6 +112,7 @@ def delete_user(user_id):
         from app.models import db
         db.session.delete(user)
         db.session.commit()
+        invalidate_user(user_id)
 
         return success_response(message='删除成功')
 
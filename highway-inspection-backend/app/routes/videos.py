@@ -1,16 +1,17 @@
-from flask import Blueprint, request
-from flask_jwt_extended import get_jwt_identity
+from flask import Blueprint, request, current_app
 from marshmallow import ValidationError
 from datetime import datetime
 import os
-from werkzeug.utils import secure_filename
 
-from app.models import db, Video, Mission, User, AnalysisResult
+from app.models import db, Video, Mission, AnalysisResult
 from app.schemas.video_schema import VideoUploadSchema
-from app.utils import success_response, error_response, paginate_response, login_required
+from app.utils import (
+    success_response, error_response, paginate_response, cursor_response, login_required, get_current_user,
+    is_cursor_request, cursor_args, keyset_paginate
+)
 
-# 导入AI服务
-from app.services import ai_service
+from app.services import VideoAnalysisService, AnalysisJobService, MediaUploadService, MediaStore, RenditionService
+from app.services.media_upload_service import save_stream
 
 videos_bp = Blueprint('videos', __name__)
 
@@ -20,8 +21,7 @@ videos_bp = Blueprint('videos', __name__)
 def get_videos():
     """获取视频列表"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 20, type=int)
@@ -33,9 +33,19 @@ def get_videos():
             query = query.filter_by(mission_id=mission_id)
         else:
             # 操作员只能查看自己任务的视频
-            if not user.is_admin():
-                mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user_id).all()]
-                query = query.filter(Video.mission_id.in_(mission_ids))
+            query = Mission.scope_query(query, user, Video.mission_id)
+
+        # 游标分页
+        if is_cursor_request():
+            videos, next_cursor, total = keyset_paginate(
+                query, Video.created_at, Video.id, page_size=page_size, **cursor_args()
+            )
+            return cursor_response(
+                items=[video.to_dict(include_relations=True) for video in videos],
+                next_cursor=next_cursor,
+                page_size=page_size,
+                total=total
+            )
 
         total = query.count()
         videos = query.order_by(Video.created_at.desc()).offset((page - 1) * page_size).limit(page_size).all()
@@ -47,6 +57,8 @@ def get_videos():
             page_size=page_size
         )
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f'获取视频列表失败: {str(e)}', 500)
 
@@ -56,18 +68,23 @@ def get_videos():
 def get_video(video_id):
     """获取视频详情"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(int(user_id))
+        user = get_current_user()
 
         video = Video.query.get(video_id)
         if not video:
             return error_response('视频不存在', 404)
 
         # 操作员只能查看自己任务的视频
-        if not user.is_admin() and video.mission.operator_id != user_id:
+        if not user.is_admin() and video.mission.operator_id != user.id:
             return error_response('无权限查看此视频', 403)
 
-        return success_response(data=video.to_dict(include_relations=True))
+        data = video.to_dict(include_relations=True)
+        # 相同内容的视频已分析过时，分析结果来自该视频
+        data['analysis_video_id'] = MediaStore.analysis_video_id(video)
+        # 网页播放版本（低码率代理 / HLS），ready 时 file_path 可通过 /uploads 访问
+        data['renditions'] = RenditionService.get_for_video(video)
+
+        return success_response(data=data)
 
     except Exception as e:
         return error_response(f'获取视频详情失败: {str(e)}', 500)
@@ -78,7 +95,7 @@ def get_video(video_id):
 def upload_video():
     """上传视频（创建视频记录）"""
     try:
-        user_id = int(get_jwt_identity())
+        user = get_current_user()
 
         # 验证请求数据
         schema = VideoUploadSchema()
@@ -89,7 +106,7 @@ def upload_video():
         if not mission:
             return error_response('任务不存在', 404)
 
-        if mission.operator_id != user_id:
+        if mission.operator_id != user.id:
             return error_response('无权限为此任务上传视频', 403)
 
         # 创建视频记录
@@ -123,23 +140,35 @@ def upload_video():
 def get_video_analysis_results(video_id):
     """获取视频分析结果（支持分页）"""
     try:
-        user_id = int(get_jwt_identity())  # 转换为int类型
-        user = User.query.get(user_id)
+        user = get_current_user()
 
         video = Video.query.get(video_id)
         if not video:
             return error_response('视频不存在', 404)
 
         # 操作员只能查看自己任务的视频
-        if not user.is_admin() and video.mission.operator_id != user_id:
+        if not user.is_admin() and video.mission.operator_id != user.id:
             return error_response('无权限查看此视频分析结果', 403)
 
         # 获取分页参数
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 10, type=int)
 
-        # 查询结果
-        query = video.analysis_results
+        # 查询结果（本视频未分析过时使用相同内容视频的分析结果）
+        query = AnalysisResult.query.filter_by(video_id=MediaStore.analysis_video_id(video))
+
+        # 游标分页（逐页浏览大量检测结果时耗时与翻页深度无关）
+        if is_cursor_request():
+            results, next_cursor, total = keyset_paginate(
+                query, AnalysisResult.occurred_time, AnalysisResult.id, page_size=page_size, **cursor_args()
+            )
+            return cursor_response(
+                items=[result.to_dict() for result in results],
+                next_cursor=next_cursor,
+                page_size=page_size,
+                total=total
+            )
+
         total = query.count()
         results = query.order_by(AnalysisResult.occurred_time.desc()).offset((page - 1) * page_size).limit(page_size).all()
 
@@ -150,6 +179,8 @@ def get_video_analysis_results(video_id):
             page_size=page_size
         )
 
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         return error_response(f'获取分析结果失败: {str(e)}', 500)
 
@@ -159,8 +190,6 @@ def get_video_analysis_results(video_id):
 def upload_media_file():
     """上传媒体文件（图片或视频）并进行AI分析"""
     try:
-        user_id = int(get_jwt_identity())
-        
         # 检查文件是否存在
         if 'file' not in request.files:
             return error_response('未找到文件', 400)
@@ -189,140 +218,37 @@ def upload_media_file():
             return error_response('任务不存在', 404)
         
         # 获取当前用户
-        user = User.query.get(user_id)
+        user = get_current_user()
         if not user:
             return error_response('用户不存在', 404)
         
         # 管理员或任务操作员可以上传文件
-        if not user.is_admin() and mission.operator_id != user_id:
+        if not user.is_admin() and mission.operator_id != user.id:
             return error_response('无权限为此任务上传文件', 403)
         
-        # 保存文件
-        filename = secure_filename(file.filename)
-        upload_folder = os.path.join('uploads', str(mission_id))
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # 添加时间戳避免文件名冲突
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename_with_timestamp = f"{timestamp}_{filename}"
-        file_path = os.path.join(upload_folder, filename_with_timestamp)
-        file.save(file_path)
+        # 保存文件（写入时计算内容哈希）
+        filename, file_path = MediaUploadService.storage_path(mission_id, file.filename)
+        content_hash, _ = save_stream(file.stream, file_path)
         
         print(f"📁 文件已保存: {file_path}")
         
-        # 如果是视频文件，检查是否需要格式转换
-        original_file_path = file_path
-        if media_type == 'video':
-            # 检查文件扩展名是否为 avi，如果是则转换为 mp4
-            file_ext = os.path.splitext(filename)[1].lower()
-            if file_ext == '.avi':
-                # 使用 opencv-python 转换 avi 到 mp4（不需要 ffmpeg 命令）
-                mp4_filename = f"{os.path.splitext(filename_with_timestamp)[0]}.mp4"
-                mp4_file_path = os.path.join(upload_folder, mp4_filename)
-                
-                try:
-                    import cv2
-                    print(f"🔄 开始使用 OpenCV 转换 AVI 到 MP4: {file_path}")
-                    
-                    # 打开原始视频
-                    cap = cv2.VideoCapture(file_path)
-                    if not cap.isOpened():
-                        raise ValueError(f"无法打开视频文件: {file_path}")
-                    
-                    # 获取视频属性
-                    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25  # 默认25fps
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    
-                    print(f"📹 视频信息: {width}x{height}, {fps}fps, {total_frames}帧")
-                    
-                    # 尝试多种编码器，按优先级顺序
-                    # 注意：不同系统支持的编码器可能不同
-                    codecs_to_try = [
-                        ('avc1', 'H.264/AVC'),  # 最佳浏览器兼容性
-                        ('mp4v', 'MPEG-4'),     # 通用MPEG-4
-                        ('XVID', 'Xvid'),        # Xvid编码
-                        ('MJPG', 'Motion JPEG') # Motion JPEG（备用）
-                    ]
-                    
-                    out = None
-                    used_codec = None
-                    for fourcc_str, codec_name in codecs_to_try:
-                        fourcc = cv2.VideoWriter_fourcc(*fourcc_str)
-                        out = cv2.VideoWriter(mp4_file_path, fourcc, fps, (width, height))
-                        if out.isOpened():
-                            used_codec = codec_name
-                            print(f"✅ 使用编码器: {codec_name} ({fourcc_str})")
-                            break
-                        else:
-                            out.release()
-                            out = None
-                    
-                    if out is None or not out.isOpened():
-                        raise ValueError("无法创建输出视频文件，所有编码器都不可用")
-                    
-                    # 逐帧读取并写入
-                    frame_count = 0
-                    while True:
-                        ret, frame = cap.read()
-                        if not ret:
-                            break
-                        out.write(frame)
-                        frame_count += 1
-                        
-                        # 每处理100帧打印一次进度
-                        if frame_count % 100 == 0:
-                            progress = (frame_count / total_frames * 100) if total_frames > 0 else 0
-                            print(f"🔄 转换进度: {frame_count}/{total_frames} ({progress:.1f}%)")
-                    
-                    # 释放资源
-                    cap.release()
-                    out.release()
-                    
-                    print(f"✅ 视频格式转换完成: {mp4_file_path} ({frame_count}帧)")
-                    
-                    # 转换成功后更新文件路径
-                    file_path = mp4_file_path
-                    # 删除原始 avi 文件
-                    try:
-                        os.remove(original_file_path)
-                        print(f"🗑️ 已删除原始 AVI 文件: {original_file_path}")
-                    except Exception as e:
-                        print(f"⚠️ 删除原始文件失败（可忽略）: {e}")
-                        
-                except ImportError:
-                    print("⚠️ OpenCV 未安装，无法转换视频格式")
-                    print("💡 提示: 请安装 opencv-python: pip install opencv-python")
-                except Exception as e:
-                    import traceback
-                    print(f"⚠️ 视频格式转换失败: {e}")
-                    print(traceback.format_exc())
-                    # 即使转换失败，我们也继续使用原始文件
-        
-        # 创建视频记录
-        video = Video(
-            mission_id=mission_id,
-            video_path=file_path,
-            collected_time=datetime.fromisoformat(collected_time.replace('Z', '+00:00')) if collected_time else datetime.now(),
+        # 存入内容寻址存储（相同内容只保留一份，视频需要时做格式转换），然后创建视频记录
+        video = MediaUploadService.create_video(
+            mission_id, file_path, filename, content_hash,
+            media_type=media_type,
+            collected_time=datetime.fromisoformat(collected_time.replace('Z', '+00:00')) if collected_time else None,
             road_section=road_section,
-            file_format=file_format or filename.split('.')[-1],
-            file_size=file_size,
-            duration=0
+            file_format=file_format,
+            file_size=file_size
         )
         
-        db.session.add(video)
-        db.session.commit()
-        
-        print(f"📹 视频记录已创建: ID={video.id}")
-        
         # 不再在上传时进行AI分析，用户需要单独触发分析
         # 保存检测类型到视频记录中，以便后续分析时使用
         # 注意：Video模型可能需要添加detection_type字段，这里先不保存
         
         return success_response(
             data=video.to_dict(include_relations=True),
-            message=f'{"图片" if media_type == "image" else "视频"}上传成功，请点击"开始分析"按钮进行AI分析',
+            message=_upload_message(video, media_type),
             code=201
         )
         
@@ -335,13 +261,155 @@ def upload_media_file():
         return error_response(error_msg, 500)
 
 
+def _upload_message(video, media_type):
+    """上传成功的提示信息"""
+    if video.transcode_status in ('pending', 'processing'):
+        return '视频上传成功，正在后台转换为MP4格式，请稍后刷新查看'
+    return f'{"图片" if media_type == "image" else "视频"}上传成功，请点击"开始分析"按钮进行AI分析'
+
+
+def _check_upload_mission(mission_id, user):
+    """检查任务是否存在且当前用户有权限上传（管理员或任务操作员），有问题时返回错误响应"""
+    if not mission_id:
+        return error_response('任务ID不能为空', 400)
+
+    mission = Mission.query.get(mission_id)
+    if not mission:
+        return error_response('任务不存在', 404)
+
+    if not user.is_admin() and mission.operator_id != user.id:
+        return error_response('无权限为此任务上传文件', 403)
+    return None
+
+
+@videos_bp.route('/uploads', methods=['POST'])
+@login_required
+def init_chunked_upload():
+    """初始化分片上传（断点续传），返回上传ID和分片大小上限"""
+    try:
+        data = request.get_json() or {}
+        user = get_current_user()
+
+        mission_id = data.get('mission_id')
+        error = _check_upload_mission(mission_id, user)
+        if error:
+            return error
+
+        if not data.get('filename'):
+            return error_response('文件名不能为空', 400)
+
+        collected_time = data.get('collected_time')
+        upload = MediaUploadService.init_upload(
+            user.id, mission_id, data['filename'], data.get('total_size'),
+            checksum=data.get('checksum'),
+            media_type=data.get('media_type', 'video'),
+            collected_time=datetime.fromisoformat(collected_time.replace('Z', '+00:00')) if collected_time else None,
+            road_section=data.get('road_section', ''),
+            file_format=data.get('file_format', '')
+        )
+
+        return success_response(
+            data=dict(upload.to_dict(), chunk_size=current_app.config['UPLOAD_CHUNK_SIZE']),
+            message='上传已创建',
+            code=201
+        )
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'创建上传失败: {str(e)}', 500)
+
+
+@videos_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def get_chunked_upload(upload_id):
+    """查询上传进度（续传时从 received_bytes 继续）"""
+    try:
+        upload = MediaUploadService.get_upload(upload_id, get_current_user())
+        return success_response(data=upload.to_dict())
+
+    except ValueError as e:
+        return error_response(str(e), 404)
+    except Exception as e:
+        return error_response(f'查询上传进度失败: {str(e)}', 500)
+
+
+@videos_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """上传分片：请求体为原始字节，偏移量由 Upload-Offset 请求头（或 offset 参数）指定"""
+    try:
+        upload = MediaUploadService.get_upload(upload_id, get_current_user())
+    except ValueError as e:
+        return error_response(str(e), 404)
+
+    try:
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            offset = request.args.get('offset', type=int)
+        if offset is None:
+            return error_response('缺少分片偏移量', 400)
+
+        MediaUploadService.write_chunk(upload, offset, request.stream, request.content_length)
+
+        return success_response(data=upload.to_dict())
+
+    except ValueError as e:
+        return error_response(str(e), 400, {'received_bytes': upload.received_bytes})
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'上传分片失败: {str(e)}', 500)
+
+
+@videos_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def complete_chunked_upload(upload_id):
+    """完成分片上传：校验文件大小和 SHA-256，创建视频记录"""
+    try:
+        upload = MediaUploadService.get_upload(upload_id, get_current_user())
+    except ValueError as e:
+        return error_response(str(e), 404)
+
+    try:
+        data = request.get_json(silent=True) or {}
+        video = MediaUploadService.complete_upload(upload, data.get('checksum'))
+
+        return success_response(
+            data=video.to_dict(include_relations=True),
+            message=_upload_message(video, upload.media_type),
+            code=201
+        )
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return error_response(f'完成上传失败: {str(e)}', 500)
+
+
+@videos_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_chunked_upload(upload_id):
+    """取消分片上传并删除已上传的部分"""
+    try:
+        upload = MediaUploadService.get_upload(upload_id, get_current_user())
+        MediaUploadService.abort_upload(upload)
+
+        return success_response(message='上传已取消')
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(f'取消上传失败: {str(e)}', 500)
+
+
 @videos_bp.route('/<int:video_id>/analyze', methods=['POST'])
 @login_required
 def analyze_video(video_id):
-    """对视频或图片进行AI分析"""
+    """提交视频或图片的AI分析任务（异步执行，立即返回任务ID）"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         # 获取视频记录
         video = Video.query.get(video_id)
@@ -349,171 +417,114 @@ def analyze_video(video_id):
             return error_response('视频不存在', 404)
         
         # 检查权限
-        if not user.is_admin() and video.mission.operator_id != user_id:
+        if not user.is_admin() and video.mission.operator_id != user.id:
             return error_response('无权限分析此视频', 403)
         
         # 获取检测类型（从请求参数或表单数据）
         detection_type = request.json.get('detection_type') if request.is_json else request.form.get('detection_type', 'traffic_congestion')
+        detection_type = detection_type or 'traffic_congestion'
         
         file_path = video.video_path
         if not file_path or not os.path.exists(file_path):
             return error_response('视频文件不存在', 404)
         
         # 判断是图片还是视频
-        file_ext = os.path.splitext(file_path)[1].lower()
-        is_image = file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
-        is_video = file_ext in ['.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv']
-        
-        if not (is_image or is_video):
+        media_type = VideoAnalysisService.get_media_type(file_path)
+        if media_type is None:
             return error_response('不支持的文件格式', 400)
         
-        print(f"🔍 开始AI分析: video_id={video_id}, detection_type={detection_type}, file_type={'image' if is_image else 'video'}")
+        # 相同内容的文件已完成同类分析时直接复用结果（force=true 时重新分析）
+        force = request.json.get('force', False) if request.is_json else request.form.get('force') == 'true'
+        if not force:
+            job = MediaStore.reuse_analysis(video, user.id, detection_type)
+            if job:
+                return success_response(data=job.to_dict(), message=job.message)
         
-        # 图片分析
-        if is_image:
-            if detection_type == 'traffic_congestion' and ai_service.is_traffic_congestion_available():
-                try:
-                    print(f"🔍 开始交通拥堵检测（图片）: {file_path}")
-                    result = ai_service.predict_traffic_congestion(file_path)
-                    
-                    if result:
-                        print(f"📊 交通检测结果: class_name={result['class_name']}, confidence={result['confidence']:.4f}")
-                        
-                        analysis_result = AnalysisResult(
-                            mission_id=video.mission_id,
-                            video_id=video.id,
-                            target_type=result['class_name'],
-                            occurred_time=datetime.now(),
-                            confidence=result['confidence'],
-                            result_image=file_path
-                        )
-                        
-                        db.session.add(analysis_result)
-                        db.session.commit()
-                        print(f"✅ 交通拥堵检测完成: ID={analysis_result.id}")
-                        
-                        return success_response(
-                            data=analysis_result.to_dict(),
-                            message='图片分析完成'
-                        )
-                    
-                except Exception as ai_error:
-                    import traceback
-                    print(f"⚠️ 交通拥堵检测失败: {ai_error}")
-                    print(traceback.format_exc())
-                    return error_response(f'AI分析失败: {str(ai_error)}', 500)
-                    
-            elif detection_type == 'road_damage' and ai_service.is_road_damage_available():
-                try:
-                    print(f"🔍 开始地面破损检测（图片）: {file_path}")
-                    result = ai_service.predict_road_damage(file_path, save_result=True)
-                    
-                    if result:
-                        detections = result['detections']
-                        result_image = result['result_image']
-                        
-                        print(f"📊 地面破损检测结果: 检测到 {len(detections)} 个目标")
-                        
-                        # 为每个检测目标创建分析结果记录
-                        for det in detections:
-                            analysis_result = AnalysisResult(
-                                mission_id=video.mission_id,
-                                video_id=video.id,
-                                target_type=det['class_name'],
-                                occurred_time=datetime.now(),
-                                confidence=det['confidence'],
-                                bounding_box=det['bbox'],
-                                result_image=result_image
-                            )
-                            db.session.add(analysis_result)
-                        
-                        # 如果没有检测到目标，也创建一条记录表示已分析
-                        if not detections:
-                            analysis_result = AnalysisResult(
-                                mission_id=video.mission_id,
-                                video_id=video.id,
-                                target_type='无破损',
-                                occurred_time=datetime.now(),
-                                confidence=1.0,
-                                result_image=result_image
-                            )
-                            db.session.add(analysis_result)
-                        
-                        db.session.commit()
-                        print(f"✅ 地面破损检测完成，结果图片: {result_image}")
-                        
-                        return success_response(
-                            message=f'图片分析完成，检测到 {len(detections)} 个目标'
-                        )
-                    
-                except Exception as ai_error:
-                    import traceback
-                    print(f"⚠️ 地面破损检测失败: {ai_error}")
-                    print(traceback.format_exc())
-                    return error_response(f'AI分析失败: {str(ai_error)}', 500)
-            else:
+        if not VideoAnalysisService.is_detection_available(detection_type, media_type):
+            if media_type == 'image':
                 return error_response(f'检测类型 {detection_type} 的AI模块不可用', 400)
+            return error_response(f'视频检测类型 {detection_type} 暂不支持或AI模块不可用', 400)
         
-        # 视频分析
-        elif is_video:
-            if detection_type == 'traffic_congestion' and ai_service.is_traffic_congestion_available():
-                try:
-                    print(f"🔍 开始交通拥堵视频检测: {file_path}")
-                    
-                    # 定义回调函数，每处理一帧时保存结果到数据库
-                    def process_frame_callback(frame_idx, timestamp_ms, result, frame_image_path=None):
-                        """处理每一帧的回调函数"""
-                        print(f"📊 处理帧 #{frame_idx}: {result['class_name']} ({result['confidence']:.2f})")
-                        analysis_result = AnalysisResult(
-                            mission_id=video.mission_id,
-                            video_id=video.id,
-                            target_type=result['class_name'],
-                            occurred_time=datetime.now(),
-                            confidence=result['confidence'],
-                            result_image=frame_image_path
-                        )
-                        db.session.add(analysis_result)
-                        # 每10帧提交一次，避免数据库操作过多
-                        if frame_idx % 10 == 0:
-                            db.session.commit()
-                            print(f"💾 已提交前 {frame_idx} 帧的分析结果到数据库")
-                    
-                    # 执行视频检测（每5帧处理一次，减少数据库操作）
-                    results = ai_service.predict_traffic_congestion_video(
-                        file_path,
-                        frame_interval=5,
-                        callback=process_frame_callback,
-                        save_result=False,
-                        save_frames=True,
-                        frames_output_dir=None
-                    )
-                    
-                    # 提交剩余的结果
-                    db.session.commit()
-                    
-                    if results:
-                        print(f"✅ 交通拥堵视频检测完成，共处理 {len(results)} 帧")
-                        return success_response(
-                            message=f'视频分析完成，共处理 {len(results)} 帧'
-                        )
-                    else:
-                        return error_response('视频分析未返回结果', 500)
-                    
-                except Exception as ai_error:
-                    import traceback
-                    print(f"⚠️ 交通拥堵视频检测失败: {ai_error}")
-                    print(traceback.format_exc())
-                    return error_response(f'AI分析失败: {str(ai_error)}', 500)
-            else:
-                return error_response(f'视频检测类型 {detection_type} 暂不支持或AI模块不可用', 400)
+        job = AnalysisJobService.enqueue_job(video, user.id, detection_type)
+        print(f"📨 已提交AI分析任务: job_id={job.id}, video_id={video_id}, detection_type={detection_type}")
         
-        return error_response('不支持的文件类型', 400)
+        return success_response(
+            data=job.to_dict(),
+            message='AI分析任务已提交，请稍后查看分析进度',
+            code=202
+        )
         
+    except ValueError as e:
+        return error_response(str(e), 400)
     except Exception as e:
         db.session.rollback()
-        import traceback
-        error_msg = f'AI分析失败: {str(e)}'
-        print(f"🚨 错误详情: {error_msg}")
-        print(traceback.format_exc())
-        return error_response(error_msg, 500)
+        return error_response(f'提交AI分析任务失败: {str(e)}', 500)
+
 
+@videos_bp.route('/<int:video_id>/analysis-jobs', methods=['GET'])
+@login_required
+def get_video_analysis_jobs(video_id):
+    """获取视频的分析任务列表"""
+    try:
+        user = get_current_user()
+
+        video = Video.query.get(video_id)
+        if not video:
+            return error_response('视频不存在', 404)
+
+        if not user.is_admin() and video.mission.operator_id != user.id:
+            return error_response('无权限查看此视频的分析任务', 403)
+
+        jobs = AnalysisJobService.get_video_jobs(video_id)
+
+        return success_response(data=[job.to_dict() for job in jobs])
+
+    except Exception as e:
+        return error_response(f'获取分析任务失败: {str(e)}', 500)
+
+
+@videos_bp.route('/analysis-jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_analysis_job(job_id):
+    """获取分析任务状态和进度"""
+    try:
+        user = get_current_user()
+
+        job = AnalysisJobService.get_job(job_id)
+        if not job:
+            return error_response('分析任务不存在', 404)
+
+        if not user.is_admin() and job.video.mission.operator_id != user.id:
+            return error_response('无权限查看此分析任务', 403)
+
+        return success_response(data=job.to_dict())
+
+    except Exception as e:
+        return error_response(f'获取分析任务失败: {str(e)}', 500)
+
+
+@videos_bp.route('/analysis-jobs/<int:job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_analysis_job(job_id):
+    """取消分析任务"""
+    try:
+        user = get_current_user()
+
+        job = AnalysisJobService.get_job(job_id)
+        if not job:
+            return error_response('分析任务不存在', 404)
+
+        if not user.is_admin() and job.video.mission.operator_id != user.id:
+            return error_response('无权限取消此分析任务', 403)
+
+        job = AnalysisJobService.cancel_job(job_id)
+
+        return success_response(
+            data=job.to_dict(),
+            message='任务已取消' if job.status == 'cancelled' else '已请求取消，任务将在当前帧处理完成后停止'
+        )
+
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(f'取消分析任务失败: {str(e)}', 500)
@@ -2,13 +2,33 @@ from app.services.auth_service import AuthService
 from app.services.airspace_service import AirspaceService
 from app.services.flight_service import FlightService
 from app.services.dashboard_service import DashboardService
-from app.services.ai_service import ai_service
+from app.services.rollup_service import RollupService
+from app.services.video_analysis_service import VideoAnalysisService
+from app.services.analysis_job_service import AnalysisJobService
+from app.services.media_store import MediaStore
+from app.services.transcode_service import TranscodeService
+from app.services.rendition_service import RenditionService
+from app.services.media_upload_service import MediaUploadService
 
 __all__ = [
     'AuthService',
     'AirspaceService',
     'FlightService',
     'DashboardService',
-    'ai_service'
+    'RollupService',
+    'ai_service',
+    'VideoAnalysisService',
+    'AnalysisJobService',
+    'MediaStore',
+    'TranscodeService',
+    'RenditionService',
+    'MediaUploadService'
 ]
 
+
+def __getattr__(name):
+    """ai_service 会导入cv2、模型等重量级依赖，首次访问时才加载"""
+    if name == 'ai_service':
+        from app.services.ai_service import ai_service
+        return ai_service
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
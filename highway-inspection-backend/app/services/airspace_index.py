@@ -0,0 +1,243 @@
+"""
+空域空间索引
+把全部空域的 GeoJSON 范围转换为预处理（prepared）的 Shapely 多边形，装入 STRtree：
+- 航线与空域相交查询先按外包矩形在树中筛选，只对候选空域做精确判断
+- 航线是否在计划空域内、是否穿越禁飞区，数千个空域时也只需毫秒级
+- 地图按视野范围/点位查询空域，并按缩放级别简化多边形，减小返回数据量
+索引在进程内缓存，AirspaceService 增删改空域后失效；其他进程通过空域表的
+(数量, 最后修改时间) 发现变化后在下次查询时重建
+"""
+import math
+import threading
+
+from sqlalchemy import func
+
+from app.models import db, Airspace
+from app.utils.geo import route_coordinates
+
+
+def area_geometry(area):
+    """空域范围（GeoJSON Polygon/MultiPolygon）-> Shapely 几何，数据无效时返回None"""
+    import numpy as np
+    import shapely
+    from shapely.geometry import shape
+
+    if isinstance(area, str):
+        import json
+        area = json.loads(area)
+    if not isinstance(area, dict) or not area.get('coordinates'):
+        return None
+    try:
+        if area.get('type') == 'Polygon':
+            # 直接用坐标数组构造，比 shape() 逐点转换快数倍（空域较多、顶点较密时重建索引明显更快）
+            shell, *holes = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in area['coordinates']]
+            geometry = shapely.polygons(shell, holes=holes or None)
+        else:
+            geometry = shape(area)
+    except (ValueError, TypeError, AttributeError, IndexError, shapely.errors.GEOSException):
+        return None
+    if geometry.is_empty or geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+        return None
+    if not geometry.is_valid:
+        # 自相交等绘制问题，修复后再使用（修复结果中退化出的线、点丢弃）
+        geometry = shapely.make_valid(geometry)
+        if geometry.geom_type == 'GeometryCollection':
+            polygons = [part for part in geometry.geoms if part.geom_type in ('Polygon', 'MultiPolygon')]
+            geometry = shapely.union_all(polygons) if polygons else None
+        if geometry is None or geometry.is_empty or geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+            return None
+    return geometry
+
+
+def route_geometry(route):
+    """航线 -> Shapely LineString（只有一个点时为Point），无坐标时返回None"""
+    from shapely.geometry import LineString, Point
+
+    coord_list = [point[:2] for point in route_coordinates(route)]
+    if not coord_list:
+        return None
+    if len(coord_list) == 1:
+        return Point(coord_list[0])
+    return LineString(coord_list)
+
+
+def zoom_tolerance(zoom, pixels=1.0):
+    """地图缩放级别下 pixels 个像素对应的经纬度跨度（256像素瓦片，赤道处），作为简化容差"""
+    return pixels * 360.0 / (256 * 2 ** zoom)
+
+
+def polygon_geojson(geometry, digits):
+    """Polygon/MultiPolygon -> GeoJSON，坐标保留 digits 位小数（按环用NumPy取坐标并取整，减小返回数据量）"""
+    import numpy as np
+    import shapely
+
+    def rings(polygon):
+        return [np.round(shapely.get_coordinates(ring), digits).tolist()
+                for ring in (polygon.exterior, *polygon.interiors)]
+
+    if geometry.geom_type == 'MultiPolygon':
+        return {'type': 'MultiPolygon', 'coordinates': [rings(polygon) for polygon in geometry.geoms]}
+    return {'type': 'Polygon', 'coordinates': rings(geometry)}
+
+
+class AirspaceGeometries:
+    """一次构建的空域几何快照（只读，可在多个线程中同时查询）"""
+
+    def __init__(self, rows, signature=None):
+        """
+        :param rows: (id, number, type, area) 列表
+        :param signature: 构建时空域表的 (数量, 最后修改时间)，用于判断是否过期
+        """
+        import shapely
+        from shapely import STRtree
+
+        self.signature = signature
+        self.ids = []
+        self.numbers = []
+        self.types = []
+        geometries = []
+        self.invalid_ids = []
+
+        for airspace_id, number, type, area in rows:
+            geometry = area_geometry(area)
+            if geometry is None:
+                self.invalid_ids.append(airspace_id)
+                continue
+            self.ids.append(airspace_id)
+            self.numbers.append(number)
+            self.types.append(type)
+            geometries.append(geometry)
+
+        self.geometries = geometries
+        # 预处理后重复的 contains/covers/intersects 判断不再重新构建边的索引
+        shapely.prepare(geometries)
+        self.tree = STRtree(geometries)
+        self._positions = {airspace_id: i for i, airspace_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_geometry(self, airspace_id):
+        """空域的几何，不存在或范围无效时返回None"""
+        position = self._positions.get(airspace_id)
+        return self.geometries[position] if position is not None else None
+
+    def intersecting(self, geometry, types=None):
+        """与几何相交的空域 [{'id', 'number', 'type'}]，按空域ID排序"""
+        positions = self.tree.query(geometry, predicate='intersects')
+        result = [
+            {'id': self.ids[i], 'number': self.numbers[i], 'type': self.types[i]}
+            for i in positions
+            if types is None or self.types[i] in types
+        ]
+        return sorted(result, key=lambda item: item['id'])
+
+    def check_route(self, route, airspace_id=None):
+        """
+        检查航线：
+        - inside_airspace：航线是否完全在计划空域内（含边界），计划空域范围无效或未指定时为None
+        - no_fly_zones：航线穿越的禁飞区
+        - intersecting：航线经过的全部空域
+        """
+        geometry = route_geometry(route)
+        if geometry is None:
+            return {'inside_airspace': None, 'no_fly_zones': [], 'intersecting': []}
+
+        inside = None
+        if airspace_id is not None:
+            airspace_geometry = self.get_geometry(airspace_id)
+            if airspace_geometry is not None:
+                inside = bool(airspace_geometry.covers(geometry))
+
+        intersecting = self.intersecting(geometry)
+        return {
+            'inside_airspace': inside,
+            'no_fly_zones': [item for item in intersecting if item['type'] == 'no_fly'],
+            'intersecting': intersecting
+        }
+
+    def _ids_at(self, positions, types=None):
+        return sorted(self.ids[i] for i in positions if types is None or self.types[i] in types)
+
+    def in_bbox(self, min_lng, min_lat, max_lng, max_lat, types=None):
+        """与矩形范围相交的空域ID"""
+        from shapely.geometry import box
+
+        return self._ids_at(self.tree.query(box(min_lng, min_lat, max_lng, max_lat), predicate='intersects'), types)
+
+    def at_point(self, lng, lat, types=None):
+        """包含该点（含边界）的空域ID"""
+        from shapely.geometry import Point
+
+        return self._ids_at(self.tree.query(Point(lng, lat), predicate='intersects'), types)
+
+    def simplified_areas(self, airspace_ids, tolerance):
+        """
+        按容差（度）用 Douglas-Peucker 算法简化空域范围，返回 {id: GeoJSON}，坐标保留到容差以下一位小数
+        先整体做普通简化，只对退化消失或自相交的少数空域改用保持拓扑的简化（后者慢一个数量级）
+        """
+        import numpy as np
+        import shapely
+
+        airspace_ids = [airspace_id for airspace_id in airspace_ids if airspace_id in self._positions]
+        geometries = np.array([self.geometries[self._positions[airspace_id]] for airspace_id in airspace_ids],
+                              dtype=object)
+        simplified = shapely.simplify(geometries, tolerance, preserve_topology=False)
+        broken = shapely.is_empty(simplified) | ~shapely.is_valid(simplified)
+        if broken.any():
+            simplified[broken] = shapely.simplify(geometries[broken], tolerance, preserve_topology=True)
+        digits = min(max(math.ceil(-math.log10(tolerance)) + 1, 0), 7)
+        return {
+            airspace_id: polygon_geojson(geometry, digits)
+            for airspace_id, geometry in zip(airspace_ids, simplified)
+        }
+
+
+class AirspaceIndex:
+    """进程内空域索引（首次查询时构建）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._geometries = None
+        self.builds = 0
+
+    @staticmethod
+    def _signature():
+        count, last_updated = db.session.query(func.count(Airspace.id), func.max(Airspace.updated_at)).one()
+        return count, last_updated
+
+    def invalidate(self):
+        """空域增删改后调用，下次查询时重建"""
+        with self._lock:
+            self._geometries = None
+
+    def get(self):
+        """当前的空域几何快照，索引失效或空域表有变化时重建"""
+        signature = self._signature()
+        geometries = self._geometries
+        if geometries is not None and geometries.signature == signature:
+            return geometries
+
+        with self._lock:
+            geometries = self._geometries
+            if geometries is None or geometries.signature != signature:
+                rows = db.session.query(Airspace.id, Airspace.number, Airspace.type, Airspace.area).all()
+                geometries = AirspaceGeometries(rows, signature)
+                if geometries.invalid_ids:
+                    print(f"⚠️ 空域范围数据无效，未加入空间索引: {geometries.invalid_ids}")
+                self._geometries = geometries
+                self.builds += 1
+        return geometries
+
+    def check_route(self, route, airspace_id=None):
+        return self.get().check_route(route, airspace_id)
+
+    def intersecting(self, route, types=None):
+        """航线经过的空域"""
+        geometry = route_geometry(route)
+        if geometry is None:
+            return []
+        return self.get().intersecting(geometry, types)
+
+
+airspace_index = AirspaceIndex()
@@ -1,6 +1,8 @@
 from datetime import datetime
 from app.models import db, Airspace, AirspaceUsage
-from sqlalchemy import and_, or_
+from app.services.airspace_index import airspace_index, zoom_tolerance
+from app.utils.intervals import IntervalIndex
+from sqlalchemy.orm import defer
 
 
 class AirspaceService:
@@ -24,6 +26,7 @@ class AirspaceService:
 
         db.session.add(airspace)
         db.session.commit()
+        airspace_index.invalidate()
 
         return airspace
 
@@ -61,6 +64,8 @@ class AirspaceService:
                 setattr(airspace, key, value)
 
         db.session.commit()
+        if 'area' in kwargs or 'type' in kwargs or 'number' in kwargs:
+            airspace_index.invalidate()
         return airspace
 
     @staticmethod
@@ -76,6 +81,7 @@ class AirspaceService:
 
         db.session.delete(airspace)
         db.session.commit()
+        airspace_index.invalidate()
 
     @staticmethod
     def get_airspace_list(page=1, page_size=20, type=None, status=None):
@@ -102,17 +108,59 @@ class AirspaceService:
         """根据ID获取空域"""
         return Airspace.query.get(airspace_id)
 
+    # 占用空域（参与冲突检测）的使用记录状态
+    OCCUPYING_STATUSES = ('approved', 'active')
+
+    @staticmethod
+    def load_usage_index(airspace_ids=None, start_time=None, end_time=None):
+        """
+        一次查询加载已批准/执行中的空域使用记录，按空域建立区间索引 {airspace_id: IntervalIndex}
+        区间的值为 (飞行申请ID, 使用记录状态)；可限定空域和时间窗口，只加载可能重叠的记录
+        """
+        query = db.session.query(
+            AirspaceUsage.airspace_id,
+            AirspaceUsage.start_time,
+            AirspaceUsage.end_time,
+            AirspaceUsage.flight_application_id,
+            AirspaceUsage.status
+        ).filter(AirspaceUsage.status.in_(AirspaceService.OCCUPYING_STATUSES))
+
+        if airspace_ids is not None:
+            query = query.filter(AirspaceUsage.airspace_id.in_(list(airspace_ids)))
+        if end_time:
+            query = query.filter(AirspaceUsage.start_time < end_time)
+        if start_time:
+            query = query.filter(AirspaceUsage.end_time > start_time)
+
+        intervals = {}
+        for airspace_id, usage_start, usage_end, application_id, status in query:
+            intervals.setdefault(airspace_id, []).append((usage_start, usage_end, (application_id, status)))
+        return {airspace_id: IntervalIndex(items) for airspace_id, items in intervals.items()}
+
     @staticmethod
-    def check_airspace_conflict(airspace_id, start_time, end_time, exclude_application_id=None):
-        """检查空域时间冲突，只在时间段重叠时返回True"""
+    def check_airspace_conflict(airspace_id, start_time, end_time, exclude_application_id=None, usage_index=None):
+        """
+        检查空域时间冲突，只在时间段重叠时返回True
+        传入 load_usage_index 加载的 usage_index 时在内存中判断（批量检查），否则查询数据库
+        """
+        if usage_index is not None:
+            index = usage_index.get(airspace_id)
+            if index is None:
+                return False
+            if not exclude_application_id:
+                return index.overlaps(start_time, end_time)
+            return any(
+                application_id != exclude_application_id
+                for _, _, (application_id, _) in index.iter_overlapping(start_time, end_time)
+            )
+
+        # 已占用时段与 [start_time, end_time) 重叠，等价于原先的三种情况（跨开始、跨结束、被包含）之一，
+        # 两个范围条件可以直接使用 (airspace_id, start_time, end_time) 索引
         query = AirspaceUsage.query.filter(
             AirspaceUsage.airspace_id == airspace_id,
-            AirspaceUsage.status.in_(['approved', 'active']),
-            or_(
-                and_(AirspaceUsage.start_time <= start_time, AirspaceUsage.end_time > start_time),
-                and_(AirspaceUsage.start_time < end_time, AirspaceUsage.end_time >= end_time),
-                and_(AirspaceUsage.start_time >= start_time, AirspaceUsage.end_time <= end_time)
-            )
+            AirspaceUsage.status.in_(AirspaceService.OCCUPYING_STATUSES),
+            AirspaceUsage.start_time < end_time,
+            AirspaceUsage.end_time > start_time
         )
 
         if exclude_application_id:
@@ -122,6 +170,83 @@ class AirspaceService:
         conflict_record = query.first()
         return conflict_record is not None
 
+    @staticmethod
+    def find_airspace_conflicts(slots, exclude_application_id=None):
+        """
+        批量检查多个时段 [(airspace_id, start_time, end_time)]（如长期申请的每日时段、批量排班），
+        一次查询加载相关使用记录，返回每个时段冲突的 [(飞行申请ID, 使用记录状态)]，与输入顺序一致
+        """
+        slots = list(slots)
+        if not slots:
+            return []
+
+        usage_index = AirspaceService.load_usage_index(
+            {airspace_id for airspace_id, _, _ in slots},
+            min(start for _, start, _ in slots),
+            max(end for _, _, end in slots)
+        )
+        conflicts = []
+        for airspace_id, start_time, end_time in slots:
+            index = usage_index.get(airspace_id)
+            found = index.find(start_time, end_time) if index is not None else []
+            conflicts.append([value for _, _, value in found if value[0] != exclude_application_id])
+        return conflicts
+
+    @staticmethod
+    def check_route(route, airspace_id=None):
+        """检查航线与空域的空间关系（是否在计划空域内、是否穿越禁飞区）"""
+        return airspace_index.check_route(route, airspace_id)
+
+    @staticmethod
+    def validate_route(route, airspace_id):
+        """航线必须在计划空域内且不穿越禁飞区，否则抛出 ValueError"""
+        result = airspace_index.check_route(route, airspace_id)
+
+        if result['no_fly_zones']:
+            numbers = '、'.join(item['number'] for item in result['no_fly_zones'])
+            raise ValueError(f'航线穿越禁飞区：{numbers}')
+
+        # 计划空域范围数据无效时无法判断，不阻止申请
+        if result['inside_airspace'] is False:
+            raise ValueError('航线超出申请的空域范围')
+
+        return result
+
+    @staticmethod
+    def _map_items(geometries, airspace_ids, zoom=None, status=None):
+        """地图查询结果：空域信息 + 范围（指定缩放级别时返回简化后的范围）"""
+        if not airspace_ids:
+            return []
+
+        query = Airspace.query.filter(Airspace.id.in_(airspace_ids))
+        if status:
+            query = query.filter(Airspace.status == status)
+        if zoom is not None:
+            query = query.options(defer(Airspace.area))
+        airspaces = query.order_by(Airspace.id).all()
+
+        if zoom is None:
+            return [airspace.to_dict() for airspace in airspaces]
+
+        areas = geometries.simplified_areas([airspace.id for airspace in airspaces], zoom_tolerance(zoom))
+        return [dict(airspace.to_dict(include_area=False), area=areas[airspace.id]) for airspace in airspaces]
+
+    @staticmethod
+    def get_airspaces_in_viewport(min_lng, min_lat, max_lng, max_lat, zoom=None, type=None, status=None):
+        """获取与地图视野范围相交的空域"""
+        if min_lng > max_lng or min_lat > max_lat:
+            raise ValueError('视野范围无效')
+
+        geometries = airspace_index.get()
+        airspace_ids = geometries.in_bbox(min_lng, min_lat, max_lng, max_lat, types=[type] if type else None)
+        return AirspaceService._map_items(geometries, airspace_ids, zoom, status)
+
+    @staticmethod
+    def get_airspaces_at_point(lng, lat, zoom=None):
+        """获取包含该点的空域（地图点击查询）"""
+        geometries = airspace_index.get()
+        return AirspaceService._map_items(geometries, geometries.at_point(lng, lat), zoom)
+
     @staticmethod
     def update_airspace_status(airspace_id, status):
         """更新空域状态"""
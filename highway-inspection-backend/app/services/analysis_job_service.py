@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from app.models import db, AnalysisJob, AnalysisResult
+from app.models.daily_rollup import add_analysis_result_counts
+from app.services.dashboard_cache import mark_dashboard_changed
+
+
+class AnalysisJobService:
+    """AI分析任务队列服务（队列持久化在 analysis_jobs 表中）"""
+
+    @staticmethod
+    def enqueue_job(video, user_id, detection_type):
+        """提交分析任务，立即返回排队中的任务"""
+        active_job = video.analysis_jobs.filter(
+            AnalysisJob.status.in_(AnalysisJob.ACTIVE_STATUSES)
+        ).first()
+        if active_job:
+            raise ValueError(f'该视频已有进行中的分析任务（任务ID: {active_job.id}）')
+
+        job = AnalysisJob(
+            video_id=video.id,
+            user_id=user_id,
+            detection_type=detection_type,
+            status='queued'
+        )
+
+        db.session.add(job)
+        db.session.commit()
+
+        return job
+
+    @staticmethod
+    def get_job(job_id):
+        """根据ID获取分析任务"""
+        return AnalysisJob.query.get(job_id)
+
+    @staticmethod
+    def get_video_jobs(video_id, limit=20):
+        """获取视频最近的分析任务"""
+        return AnalysisJob.query.filter_by(video_id=video_id).order_by(
+            AnalysisJob.created_at.desc()
+        ).limit(limit).all()
+
+    @staticmethod
+    def cancel_job(job_id):
+        """取消分析任务：排队中的任务直接取消，执行中的任务由工作进程在下次上报进度时中止"""
+        job = AnalysisJob.query.get(job_id)
+        if not job:
+            raise ValueError('分析任务不存在')
+
+        if not job.is_active():
+            raise ValueError('分析任务已结束，无法取消')
+
+        now = datetime.utcnow()
+        # 使用带状态条件的UPDATE，避免与正在领取任务的工作进程冲突
+        cancelled = AnalysisJob.query.filter_by(id=job.id, status='queued').update({
+            'status': 'cancelled',
+            'cancel_requested': True,
+            'message': '任务已取消',
+            'finished_at': now
+        }, synchronize_session=False)
+
+        if not cancelled:
+            AnalysisJob.query.filter_by(id=job.id, status='running').update({
+                'cancel_requested': True
+            }, synchronize_session=False)
+
+        db.session.commit()
+        db.session.refresh(job)
+        return job
+
+    @staticmethod
+    def claim_next_job(worker_id):
+        """原子地领取最早排队的任务，没有可执行的任务时返回None"""
+        candidates = AnalysisJob.query.filter_by(status='queued').order_by(
+            AnalysisJob.created_at.asc(), AnalysisJob.id.asc()
+        ).limit(5).all()
+
+        for job in candidates:
+            now = datetime.utcnow()
+            claimed = AnalysisJob.query.filter_by(id=job.id, status='queued').update({
+                'status': 'running',
+                'worker_id': worker_id,
+                'attempts': AnalysisJob.attempts + 1,
+                'progress': 0.0,
+                'processed_frames': 0,
+                'message': None,
+                'started_at': now,
+                'heartbeat_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            # 其他工作进程已抢先领取时继续尝试下一个
+            if claimed:
+                db.session.refresh(job)
+                return job
+
+        return None
+
+    @staticmethod
+    def _owned(job_id, worker_id):
+        """仍由该工作进程执行中的任务（任务被恢复并由其他工作进程领取后不再匹配）"""
+        query = AnalysisJob.query.filter_by(id=job_id, status='running')
+        if worker_id is not None:
+            query = query.filter_by(worker_id=worker_id)
+        return query
+
+    @staticmethod
+    def update_progress(job_id, processed_frames, total_frames=None, worker_id=None):
+        """
+        更新任务进度并刷新心跳，返回是否需要中止：
+        收到取消请求，或任务已不由该工作进程执行（心跳超时后被重新排队、由其他工作进程领取）
+        """
+        values = {
+            'processed_frames': processed_frames,
+            'heartbeat_at': datetime.utcnow()
+        }
+        if total_frames:
+            values['total_frames'] = total_frames
+            # 完成前进度最多到99.9%，由finish_job置为100%
+            values['progress'] = min(processed_frames / total_frames * 100, 99.9)
+
+        updated = AnalysisJobService._owned(job_id, worker_id).update(values, synchronize_session=False)
+        db.session.commit()
+        if not updated:
+            return True
+
+        cancel_requested = db.session.query(AnalysisJob.cancel_requested).filter_by(id=job_id).scalar()
+        return bool(cancel_requested)
+
+    @staticmethod
+    def touch_job(job_id, worker_id=None):
+        """刷新任务心跳"""
+        AnalysisJobService._owned(job_id, worker_id).update({
+            'heartbeat_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def finish_job(job_id, status, message=None, result_count=None, stats=None, worker_id=None):
+        """结束任务（completed / failed / cancelled），返回是否已更新（任务已不由该工作进程执行时不更新）"""
+        now = datetime.utcnow()
+        values = {
+            'status': status,
+            'message': message[:500] if message else message,
+            'finished_at': now,
+            'heartbeat_at': now
+        }
+        if result_count is not None:
+            values['result_count'] = result_count
+        if stats is not None:
+            values['stats'] = stats
+        if status == 'completed':
+            values['progress'] = 100.0
+
+        updated = AnalysisJobService._owned(job_id, worker_id).update(values, synchronize_session=False)
+        db.session.commit()
+        return bool(updated)
+
+    @staticmethod
+    def recover_stale_jobs(stale_seconds=None):
+        """
+        恢复心跳超时的执行中任务（工作进程崩溃或服务重启后）
+        清理上次执行写入的部分结果后重新排队，超过最大执行次数的任务标记为失败
+        """
+        if stale_seconds is None:
+            stale_seconds = current_app.config['ANALYSIS_JOB_STALE_SECONDS']
+        max_attempts = current_app.config['ANALYSIS_JOB_MAX_ATTEMPTS']
+
+        threshold = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        stale_jobs = AnalysisJob.query.filter(
+            AnalysisJob.status == 'running',
+            or_(AnalysisJob.heartbeat_at < threshold, AnalysisJob.heartbeat_at.is_(None))
+        ).all()
+
+        for job in stale_jobs:
+            # 同一视频同时只有一个进行中的任务，按开始时间即可定位本次执行写入的结果
+            if job.started_at:
+                partial = AnalysisResult.query.filter(
+                    AnalysisResult.video_id == job.video_id,
+                    AnalysisResult.created_at >= job.started_at
+                )
+                # 批量删除不触发ORM事件，先从看板每日汇总中扣除
+                day = func.date(AnalysisResult.occurred_time)
+                add_analysis_result_counts(db.session.connection(), partial.with_entities(
+                    day, AnalysisResult.mission_id, AnalysisResult.target_type, func.count(AnalysisResult.id)
+                ).group_by(day, AnalysisResult.mission_id, AnalysisResult.target_type).all(), sign=-1)
+                partial.delete(synchronize_session=False)
+                mark_dashboard_changed(db.session)
+
+            if job.cancel_requested:
+                job.status = 'cancelled'
+                job.message = '任务已取消'
+                job.finished_at = datetime.utcnow()
+            elif job.attempts >= max_attempts:
+                job.status = 'failed'
+                job.message = f'工作进程异常退出，已重试 {job.attempts} 次'
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = 'queued'
+                job.worker_id = None
+                job.progress = 0.0
+                job.processed_frames = 0
+
+        db.session.commit()
+        return len(stale_jobs)
@@ -0,0 +1,223 @@
+"""
+AI分析任务工作进程池
+队列持久化在数据库中，无需外部消息中间件：工作进程轮询 analysis_jobs 表并原子地领取任务
+"""
+import atexit
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class WorkerPool:
+    """本地工作进程池（AI分析和视频转码共用），target(config_name, stop_event) 为工作进程入口"""
+
+    def __init__(self, config_name, size, target=None, name='analysis-worker'):
+        # 使用spawn启动，避免fork出带有数据库连接和调度线程的进程
+        self._ctx = multiprocessing.get_context('spawn')
+        self._stop_event = self._ctx.Event()
+        self._processes = []
+        self.config_name = config_name
+        self.size = size
+        self.target = target or run_worker
+        self.name = name
+
+    def start(self):
+        """启动工作进程"""
+        for index in range(self.size):
+            process = self._ctx.Process(
+                target=self.target,
+                args=(self.config_name, self._stop_event),
+                name=f'{self.name}-{index}',
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        atexit.register(self.stop)
+
+    def join(self):
+        """等待所有工作进程退出"""
+        for process in self._processes:
+            process.join()
+
+    def stop(self, timeout=10):
+        """通知工作进程退出，超时未退出的强制结束"""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+
+def start_worker_pool(app, size=None):
+    """启动进程内唯一的工作进程池（重复调用无副作用）"""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            from app.services.analysis_job_service import AnalysisJobService
+
+            # 恢复上次服务停止时未完成的任务
+            with app.app_context():
+                recovered = AnalysisJobService.recover_stale_jobs()
+                if recovered > 0:
+                    print(f'♻️ 已恢复 {recovered} 个中断的分析任务')
+
+            pool = WorkerPool(
+                app.config['CONFIG_NAME'],
+                size or app.config['ANALYSIS_WORKERS']
+            )
+            pool.start()
+            print(f'🤖 AI分析工作进程池已启动: {pool.size} 个进程')
+            _pool = pool
+
+    return _pool
+
+
+def report_model_stats(app, worker_id):
+    """刷新本进程的模型统计快照"""
+    from app.services.model_registry import model_registry
+    try:
+        model_registry.dump_stats(app.config['AI_MODEL_STATS_DIR'], worker_id)
+    except OSError as e:
+        print(f'⚠️ 写入模型统计失败: {e}')
+
+
+class _HeartbeatThread(threading.Thread):
+    """任务执行期间定期刷新心跳，避免长时间推理被误判为中断"""
+
+    def __init__(self, app, job_id, interval, worker_id=None):
+        super().__init__(daemon=True)
+        self._app = app
+        self._job_id = job_id
+        self._interval = interval
+        self._worker_id = worker_id
+        self._stopped = threading.Event()
+
+    def run(self):
+        from app.models import db
+        from app.services.analysis_job_service import AnalysisJobService
+
+        while not self._stopped.wait(self._interval):
+            with self._app.app_context():
+                try:
+                    AnalysisJobService.touch_job(self._job_id, self._worker_id)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f'⚠️ 刷新分析任务心跳失败: {e}')
+            if self._worker_id:
+                report_model_stats(self._app, self._worker_id)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def run_worker(config_name, stop_event):
+    """工作进程入口：循环领取并执行分析任务"""
+    from app import create_app
+    from app.models import db
+    from app.services.analysis_job_service import AnalysisJobService
+
+    from app.services.model_registry import model_registry
+
+    app = create_app(config_name)
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    poll_interval = app.config['ANALYSIS_POLL_INTERVAL']
+    report_interval = app.config['ANALYSIS_JOB_STALE_SECONDS'] / 4
+
+    print(f'🤖 分析工作进程已启动: {worker_id}')
+
+    # 预加载模型，避免第一个任务承担加载和预热耗时
+    if app.config['AI_MODEL_PRELOAD']:
+        warmed = model_registry.warm_up()
+        print(f'🔥 工作进程 {worker_id} 已预热模型: {warmed}')
+    report_model_stats(app, worker_id)
+    last_report = time.monotonic()
+
+    while not stop_event.is_set():
+        if time.monotonic() - last_report >= report_interval:
+            report_model_stats(app, worker_id)
+            last_report = time.monotonic()
+
+        job_id = None
+        with app.app_context():
+            try:
+                job = AnalysisJobService.claim_next_job(worker_id)
+                job_id = job.id if job else None
+            except Exception as e:
+                db.session.rollback()
+                print(f'⚠️ 领取分析任务失败: {e}')
+
+        if job_id is None:
+            stop_event.wait(poll_interval)
+            continue
+
+        execute_job(app, job_id, worker_id)
+        report_model_stats(app, worker_id)
+        last_report = time.monotonic()
+
+    model_registry.remove_stats(app.config['AI_MODEL_STATS_DIR'])
+
+
+def execute_job(app, job_id, worker_id=None):
+    """执行单个分析任务"""
+    from app.models import db, Video, AnalysisJob
+    from app.services.analysis_job_service import AnalysisJobService
+    from app.services.video_analysis_service import VideoAnalysisService, AnalysisCancelled
+
+    progress_interval = app.config['ANALYSIS_PROGRESS_INTERVAL']
+    heartbeat = _HeartbeatThread(app, job_id, app.config['ANALYSIS_JOB_STALE_SECONDS'] / 4, worker_id)
+    heartbeat.start()
+
+    with app.app_context():
+        job = AnalysisJob.query.get(job_id)
+        print(f'▶️ 开始执行分析任务 #{job_id}: video_id={job.video_id}, detection_type={job.detection_type}')
+
+        last_report = {'time': 0.0}
+
+        def progress_callback(processed_frames, total_frames):
+            # 限制进度写入频率，同时检查是否收到取消请求
+            now = time.monotonic()
+            if now - last_report['time'] < progress_interval:
+                return
+            last_report['time'] = now
+            if AnalysisJobService.update_progress(job_id, processed_frames, total_frames, worker_id):
+                raise AnalysisCancelled()
+
+        try:
+            video = Video.query.get(job.video_id)
+            if not video:
+                raise ValueError('视频不存在')
+
+            result = VideoAnalysisService.analyze(video, job.detection_type, progress_callback)
+            if AnalysisJobService.finish_job(
+                job_id, 'completed', result['message'], result['result_count'], result.get('stats'), worker_id
+            ):
+                print(f'✅ 分析任务 #{job_id} 完成: {result["message"]}')
+            else:
+                print(f'⚠️ 分析任务 #{job_id} 已由其他工作进程接管，忽略本次结果')
+
+        except AnalysisCancelled:
+            # 保留取消前已完成的分析结果
+            db.session.commit()
+            if AnalysisJobService.finish_job(job_id, 'cancelled', '任务已取消', worker_id=worker_id):
+                print(f'⏹️ 分析任务 #{job_id} 已取消')
+            else:
+                print(f'⚠️ 分析任务 #{job_id} 已由其他工作进程接管，停止执行')
+
+        except Exception as e:
+            db.session.rollback()
+            print(f'⚠️ 分析任务 #{job_id} 失败: {e}')
+            print(traceback.format_exc())
+            AnalysisJobService.finish_job(job_id, 'failed', f'AI分析失败: {str(e)}', worker_id=worker_id)
+
+        finally:
+            heartbeat.stop()
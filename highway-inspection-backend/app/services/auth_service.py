@@ -1,5 +1,6 @@
 from app.models import db, User
 from flask_jwt_extended import create_access_token
+from app.utils.current_user import invalidate_user
 
 
 class AuthService:
@@ -30,8 +31,8 @@ class AuthService:
         if not user or not user.check_password(password):
             raise ValueError('用户名或密码错误')
 
-        # 生成JWT token（identity必须是字符串）
-        access_token = create_access_token(identity=str(user.id))
+        # 生成JWT token（identity必须是字符串），附带角色供鉴权校验
+        access_token = create_access_token(identity=str(user.id), additional_claims={'role': user.role})
 
         return {
             'user': user.to_dict(),
@@ -59,5 +60,6 @@ class AuthService:
                 setattr(user, key, value)
 
         db.session.commit()
+        invalidate_user(user.id)
         return user
 
@@ -0,0 +1,242 @@
+"""
+数据看板响应缓存
+按 (接口, 用户数据范围, 开始日期, 结束日期, 天数) 缓存看板接口的返回数据，大屏轮询相同参数时直接返回
+- memory：进程内TTL/LRU缓存，数据修改只能失效本进程的缓存，其他进程依赖有效期过期
+- file：本机共享目录缓存，gunicorn 多个工作进程（以及分析工作进程）共享缓存和失效标记
+任务、巡检结果、告警、空域使用记录提交修改后自动失效
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import wraps
+from datetime import date
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Mission, AnalysisResult, AlertEvent, AirspaceUsage
+from app.utils import success_response, get_current_user
+from app.utils.cache import TTLCache
+
+# 修改后需要失效看板缓存的模型
+DASHBOARD_MODELS = (Mission, AnalysisResult, AlertEvent, AirspaceUsage)
+
+# 参与缓存键的查询参数
+CACHE_KEY_ARGS = ('start_date', 'end_date', 'days')
+
+
+class FileCacheBackend:
+    """本机共享目录缓存：每个条目一个JSON文件，失效时更换目录中的版本标记"""
+
+    CLEANUP_EVERY = 200  # 每写入多少次清理一次过期文件
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation(self):
+        try:
+            with open(os.path.join(self.directory, 'generation'), encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return '0'
+
+    def _path(self, key):
+        digest = hashlib.sha1(f'{self._generation()}:{key}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def _write(self, path, content):
+        # 先写临时文件再替换，其他进程不会读到写了一半的文件
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry['expires_at'] < time.time():
+            return None
+        return entry['data']
+
+    def set(self, key, data):
+        self._write(self._path(key), json.dumps({'expires_at': time.time() + self.ttl, 'data': data}))
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            self.cleanup()
+
+    def clear(self):
+        """更换版本标记，所有进程中的旧条目立即失效"""
+        self._write(os.path.join(self.directory, 'generation'), str(time.time_ns()))
+
+    def cleanup(self):
+        """删除过期（包括版本已失效）的缓存文件"""
+        threshold = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < threshold:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self):
+        return {
+            'size': sum(1 for name in os.listdir(self.directory) if name.endswith('.json')),
+            'ttl': self.ttl,
+            'directory': self.directory
+        }
+
+
+class MemoryCacheBackend:
+    """进程内TTL/LRU缓存"""
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, data):
+        self._cache.set(key, data)
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self):
+        stats = self._cache.get_stats()
+        return {'size': stats['size'], 'maxsize': stats['maxsize'], 'ttl': stats['ttl'],
+                'evictions': stats['evictions']}
+
+
+class DashboardCache:
+    """看板响应缓存（首次使用时按配置创建后端）"""
+
+    def __init__(self):
+        self._backend = None
+        self._backend_name = None
+        self._lock = threading.Lock()
+        self._endpoint_stats = {}  # endpoint -> {'hits': n, 'misses': n}
+        self.invalidations = 0
+
+    def _get_backend(self):
+        if self._backend_name is None:
+            config = current_app.config
+            name = config['DASHBOARD_CACHE_BACKEND']
+            if name == 'file':
+                self._backend = FileCacheBackend(config['DASHBOARD_CACHE_DIR'], config['DASHBOARD_CACHE_TTL'])
+            elif name == 'memory':
+                self._backend = MemoryCacheBackend(config['DASHBOARD_CACHE_SIZE'], config['DASHBOARD_CACHE_TTL'])
+            elif name != 'none':
+                raise ValueError(f'不支持的看板缓存类型: {name}')
+            self._backend_name = name
+        return self._backend
+
+    def _record(self, endpoint, hit):
+        with self._lock:
+            stats = self._endpoint_stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+
+    @staticmethod
+    def make_key(endpoint, user, args):
+        """缓存键：接口、用户数据范围、日期参数（含当天日期，避免跨天后仍返回默认区间的旧数据）"""
+        scope = 'admin' if user is None or user.is_admin() else f'operator:{user.id}'
+        params = '&'.join(f'{name}={args.get(name, "")}' for name in CACHE_KEY_ARGS)
+        return f'{endpoint}|{scope}|{params}|{date.today().isoformat()}'
+
+    def get(self, endpoint, key):
+        backend = self._get_backend()
+        data = backend.get(key) if backend else None
+        self._record(endpoint, data is not None)
+        return data
+
+    def set(self, key, data):
+        backend = self._get_backend()
+        if backend:
+            backend.set(key, data)
+
+    def invalidate(self):
+        """看板相关数据修改后失效全部缓存"""
+        if not has_app_context():
+            return
+        backend = self._get_backend()
+        if backend:
+            backend.clear()
+        with self._lock:
+            self.invalidations += 1
+
+    def get_stats(self):
+        """缓存后端信息以及本进程各看板接口的命中统计"""
+        backend = self._get_backend()
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self._endpoint_stats.items()):
+                lookups = stats['hits'] + stats['misses']
+                endpoints[endpoint] = dict(stats, hit_rate=round(stats['hits'] / lookups, 4) if lookups else None)
+            hits = sum(stats['hits'] for stats in self._endpoint_stats.values())
+            misses = sum(stats['misses'] for stats in self._endpoint_stats.values())
+
+        return {
+            'backend': self._backend_name,
+            'pid': os.getpid(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            'invalidations': self.invalidations,
+            'endpoints': endpoints,
+            'storage': backend.get_stats() if backend else None
+        }
+
+
+dashboard_cache = DashboardCache()
+
+
+def dashboard_cached(fn):
+    """看板接口缓存装饰器（放在 login_required 之后），只缓存成功响应的 data"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = DashboardCache.make_key(request.endpoint, get_current_user(), request.args)
+        data = dashboard_cache.get(request.endpoint, key)
+        if data is not None:
+            return success_response(data=data)
+
+        response, code = fn(*args, **kwargs)
+        if code == 200:
+            dashboard_cache.set(key, response.get_json().get('data'))
+        return response, code
+
+    return wrapper
+
+
+def mark_dashboard_changed(session):
+    """标记本次事务修改了看板数据（Core批量写入/删除时手动调用），提交后失效缓存"""
+    session.info['dashboard_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _detect_dashboard_changes(session, flush_context):
+    for objects in (session.new, session.dirty, session.deleted):
+        if any(isinstance(obj, DASHBOARD_MODELS) for obj in objects):
+            mark_dashboard_changed(session)
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('dashboard_changed', False):
+        dashboard_cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('dashboard_changed', None)
@@ -1,6 +1,33 @@
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func, text
+from sqlalchemy import func, case, literal_column
 from app.models import db, Mission, AirspaceUsage, Airspace, AnalysisResult, AlertEvent, Video
+from app.models.daily_rollup import METRIC_FLIGHT, METRIC_ANALYSIS_RESULT, METRIC_ALERT
+from app.services.rollup_service import RollupService
+from app.utils.geo import route_lengths
+
+
+def duration_seconds(start_column, end_column):
+    """两个时间列之间的秒数（SQL表达式，兼容MySQL和测试用的SQLite）"""
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(end_column) - func.julianday(start_column)) * 86400
+    return func.timestampdiff(literal_column('SECOND'), start_column, end_column)
+
+
+# 拥堵程度、破损程度（与inspection_results.py保持一致）
+CONGESTION_LEVELS = ('轻度 (light)', '中度 (medium)', '重度 (heavy)')
+DAMAGE_LEVELS = ('无破损', '轻度破损', '中度破损', '严重破损')
+
+
+def is_congestion_type(target_type):
+    """交通拥堵类型包含括号，其他类型为道路破损"""
+    return '(' in target_type
+
+
+def date_key(value):
+    """数据库返回的日期统一为 YYYY-MM-DD 字符串（MySQL返回date，SQLite返回字符串）"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()[:10]
+    return str(value)[:10]
 
 
 class DashboardService:
@@ -8,48 +35,45 @@ class DashboardService:
 
     @staticmethod
     def get_flight_statistics(start_date=None, end_date=None, user=None):
-        """获取飞行统计"""
+        """获取飞行统计（次数、时长、距离在数据库中一次聚合）"""
         # 统计所有状态的任务（与get_flight_trend保持一致，但趋势图只显示completed状态）
-        query = Mission.query
+        filters = []
 
         # 如果用户不是管理员，只显示该用户相关的任务
         if user and not user.is_admin():
-            query = query.filter_by(operator_id=user.id)
+            filters.append(Mission.operator_id == user.id)
 
         if start_date:
-            query = query.filter(Mission.start_time >= start_date)
+            filters.append(Mission.start_time >= start_date)
         if end_date:
             # 修复：结束日期应该包含当天的所有结果
             end_date_end = datetime.combine(end_date, datetime.max.time())
-            query = query.filter(Mission.end_time <= end_date_end)
+            filters.append(Mission.end_time <= end_date_end)
 
-        missions = query.all()
+        total_missions, total_seconds, total_distance, missing_distance = db.session.query(
+            func.count(Mission.id),
+            func.sum(duration_seconds(Mission.start_time, Mission.end_time)),
+            func.sum(Mission.route_distance),
+            func.sum(case((Mission.route_distance.is_(None), 1), else_=0))
+        ).filter(*filters).one()
 
-        # 统计总次数
-        total_missions = len(missions)
+        total_distance = float(total_distance or 0)
 
-        # 统计总时长（小时）
-        total_duration = 0
-        # 统计总飞行距离（公里）
-        total_distance = 0
-        for mission in missions:
-            if mission.start_time and mission.end_time:
-                duration = (mission.end_time - mission.start_time).total_seconds() / 3600
-                total_duration += duration
-            
-            # 累加每个任务的飞行距离
-            total_distance += mission.calculate_route_distance()
+        # 尚未回填航线长度的历史任务，仅对这部分任务现场批量计算
+        if missing_distance:
+            routes = db.session.query(Mission.route).filter(*filters, Mission.route_distance.is_(None))
+            total_distance += float(route_lengths([route for route, in routes]).sum())
 
         return {
             'total_missions': total_missions,
-            'total_duration': round(total_duration, 2),
+            'total_duration': round(float(total_seconds or 0) / 3600, 2),
             'total_distance': round(total_distance, 2),
             #'average_duration': round(total_duration / total_missions, 2) if total_missions > 0 else 0
         }
 
     @staticmethod
     def get_flight_trend(days=30, start_date=None, end_date=None, user=None):
-        """获取飞行任务趋势"""
+        """获取飞行任务趋势（已完成任务按开始日期统计，读取每日汇总）"""
 
         if start_date and end_date:
             days_count = (end_date - start_date).days + 1
@@ -58,93 +82,20 @@ class DashboardService:
             start_date = end_date - timedelta(days=29)  # 开始日期是30天前
             days_count = 30
 
-        # 构造基础查询语句（使用日期比较，确保包含边界日期）
-        # 注意：DATE(start_time) 会提取日期部分，比较时应该包含边界
-        # 使用 CAST 或直接比较，确保日期边界正确
-        base_sql = """
-                SELECT 
-                    DATE(start_time) as flight_date,
-                    COUNT(id) as mission_count,
-                    SUM(TIMESTAMPDIFF(SECOND, start_time, end_time)) / 3600 as flight_hours
-                FROM missions 
-                WHERE status = 'completed' 
-                  AND DATE(start_time) >= :start_date
-                  AND DATE(start_time) <= :end_date
-        """
-        
-        # 如果用户不是管理员，添加用户过滤条件
-        if user and not user.is_admin():
-            base_sql += " AND operator_id = :operator_id "
-            
-        base_sql += """
-                GROUP BY DATE(start_time)
-                ORDER BY flight_date
-            """
-        
-        sql_query = text(base_sql)
-        
-        # 准备参数（使用日期对象，不是datetime）
-        params = {
-            'start_date': start_date,
-            'end_date': end_date  # 使用日期对象，SQL的DATE()函数会正确处理
-        }
-        
-        # 如果用户不是管理员，添加用户ID参数
-        if user and not user.is_admin():
-            params['operator_id'] = user.id
-
-        result = db.session.execute(sql_query, params)
-
-        database_rows = result.fetchall()
+        daily_totals = RollupService.get_daily_totals(METRIC_FLIGHT, start_date, end_date, user)
 
         dates_list = []  # 存储日期
         counts_list = []  # 存储任务数量
         hours_list = []  # 存储飞行时长
 
-        # 将数据库结果按日期存储（统一使用YYYY-MM-DD格式）
-        database_data = {}
-        for row in database_rows:
-            # 确保日期格式统一为YYYY-MM-DD字符串
-            # 处理日期对象（可能是date对象或datetime对象）
-            if hasattr(row.flight_date, 'date'):
-                # 如果是datetime对象，提取日期部分
-                flight_date = row.flight_date.date()
-            else:
-                # 如果是date对象，直接使用
-                flight_date = row.flight_date
-            
-            # 统一转换为YYYY-MM-DD格式字符串
-            if hasattr(flight_date, 'strftime'):
-                date_str = flight_date.strftime("%Y-%m-%d")
-            elif hasattr(flight_date, 'isoformat'):
-                date_str = flight_date.isoformat()
-            else:
-                date_str = str(flight_date)
-            
-            database_data[date_str] = {
-                'count': int(row.mission_count) if row.mission_count else 0,
-                'hours': float(row.flight_hours) if row.flight_hours else 0.0
-            }
-
-        # 循环处理每一天，填充三个列表
+        # 循环处理每一天，没有数据的日期补0
         for day_index in range(days_count):
-            # 计算当前要处理的日期
             current_date = start_date + timedelta(days=day_index)
-            date_str = current_date.strftime("%Y-%m-%d")  # 统一使用YYYY-MM-DD格式
-
-            if date_str in database_data:
-                # 如果有数据，使用数据库中的数据
-                day_data = database_data[date_str]
-                day_mission_count = day_data['count']
-                day_flight_hours = day_data['hours']
-            else:
-                # 如果没有数据，使用默认值
-                day_mission_count = 0
-                day_flight_hours = 0.0
+            day_mission_count, day_flight_seconds = daily_totals.get(current_date, (0, 0.0))
 
-            dates_list.append(date_str)
+            dates_list.append(current_date.strftime("%Y-%m-%d"))  # 统一使用YYYY-MM-DD格式
             counts_list.append(day_mission_count)
-            hours_list.append(round(day_flight_hours, 2))
+            hours_list.append(round(day_flight_seconds / 3600, 2))
 
         data = {
             'dates': dates_list,
@@ -159,17 +110,10 @@ class DashboardService:
         """获取空域使用统计"""
         query = AirspaceUsage.query.filter(AirspaceUsage.status.in_(['approved', 'active', 'released']))
 
-        # 如果用户不是管理员，只显示该用户相关的空域使用记录
-        if user and not user.is_admin():
-            # 获取用户任务相关的空域使用记录
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            if mission_ids:
-                query = query.filter(AirspaceUsage.flight_application_id.in_(
-                    db.session.query(Mission.flight_application_id).filter(Mission.id.in_(mission_ids))
-                ))
-            else:
-                # 用户没有任何任务，返回空结果
-                query = query.filter(AirspaceUsage.id.is_(None))  # 返回空结果
+        # 如果用户不是管理员，只显示该用户任务相关的空域使用记录
+        query = Mission.scope_query(
+            query, user, AirspaceUsage.flight_application_id, key=Mission.flight_application_id
+        )
 
         if start_date:
             query = query.filter(AirspaceUsage.start_time >= start_date)
@@ -178,32 +122,20 @@ class DashboardService:
             end_date_end = datetime.combine(end_date, datetime.max.time())
             query = query.filter(AirspaceUsage.end_time <= end_date_end)
 
-        usage_records = query.all()
-
-        # 按空域统计
-        airspace_stats = {}
-        for record in usage_records:
-            airspace_id = record.airspace_id
-            if airspace_id not in airspace_stats:
-                airspace = Airspace.query.get(airspace_id)
-                airspace_stats[airspace_id] = {
-                    'airspace_id': airspace_id,
-                    'airspace_name': airspace.name if airspace else '未知',
-                    'usage_count': 0,
-                    'total_duration': 0
-                }
-
-            airspace_stats[airspace_id]['usage_count'] += 1
-
-            # 计算使用时长（小时）
-            if record.start_time and record.end_time:
-                duration = (record.end_time - record.start_time).total_seconds() / 3600
-                airspace_stats[airspace_id]['total_duration'] += duration
-
-        # 转换为列表并排序
-        result = list(airspace_stats.values())
-        for item in result:
-            item['total_duration'] = round(item['total_duration'], 2)
+        # 按空域分组统计使用次数和使用时长（一次查询，同时取出空域名称）
+        rows = query.outerjoin(Airspace, Airspace.id == AirspaceUsage.airspace_id).with_entities(
+            AirspaceUsage.airspace_id,
+            Airspace.name,
+            func.count(AirspaceUsage.id),
+            func.sum(duration_seconds(AirspaceUsage.start_time, AirspaceUsage.end_time))
+        ).group_by(AirspaceUsage.airspace_id, Airspace.name).all()
+
+        result = [{
+            'airspace_id': airspace_id,
+            'airspace_name': name or '未知',
+            'usage_count': usage_count,
+            'total_duration': round(float(total_seconds or 0) / 3600, 2)
+        } for airspace_id, name, usage_count, total_seconds in rows]
 
         result.sort(key=lambda x: x['usage_count'], reverse=True)
 
@@ -217,9 +149,7 @@ class DashboardService:
         query = AlertEvent.query
 
         # 如果用户不是管理员，只显示该用户相关的告警
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            query = query.filter(AlertEvent.mission_id.in_(mission_ids))
+        query = Mission.scope_query(query, user, AlertEvent.mission_id)
 
         if start_date:
             query = query.filter(AlertEvent.occurred_time >= start_date)
@@ -269,59 +199,26 @@ class DashboardService:
 
     @staticmethod
     def get_alert_trend(days=None, start_date=None, end_date=None, user=None):
-        """获取告警趋势（最近N天）"""
+        """获取告警趋势（最近N天，读取每日汇总）"""
         # 如果提供了开始和结束日期，则使用它们而不是天数
         if start_date and end_date:
             # 计算天数
             days = (end_date - start_date).days + 1
-        elif days:
-            #基于天数计算
-            end_date = datetime.now(timezone.utc).replace(tzinfo=None)
-            start_date = end_date - timedelta(days=days)
-        else:
-            # 默认显示最近30天
-            days = 30
-            end_date = datetime.now(timezone.utc).replace(tzinfo=None)
-            start_date = end_date - timedelta(days=days)
-
-        # 修复：结束日期应该包含当天的所有结果
-        if hasattr(end_date, 'date'):
-            end_date_obj = end_date.date()
         else:
-            end_date_obj = end_date
-            
-        end_date_end = datetime.combine(end_date_obj, datetime.max.time())
-
-        # 构建查询
-        query = db.session.query(
-            func.date(AlertEvent.occurred_time).label('date'),
-            func.count(AlertEvent.id).label('count')
-        )
-        
-        # 如果用户不是管理员，只显示该用户相关的告警
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            query = query.filter(AlertEvent.mission_id.in_(mission_ids))
-
-        query = query.filter(
-            AlertEvent.occurred_time >= start_date,
-            AlertEvent.occurred_time <= end_date_end
-        ).group_by(func.date(AlertEvent.occurred_time))
+            # 基于天数计算（含今天），默认显示最近30天
+            days = days or 30
+            end_date = datetime.now(timezone.utc).replace(tzinfo=None).date()
+            start_date = end_date - timedelta(days=days - 1)
 
-        results = query.all()
+        daily_totals = RollupService.get_daily_totals(METRIC_ALERT, start_date, end_date, user)
 
         # 构建完整的日期序列
         trend = []
         for i in range(days):
-            date = (start_date + timedelta(days=i))
-            count = 0
-            for result in results:
-                if result.date == date:
-                    count = result.count
-                    break
+            date = start_date + timedelta(days=i)
             trend.append({
                 'date': date.isoformat(),
-                'count': count
+                'count': daily_totals.get(date, (0, 0.0))[0]
             })
 
         return trend
@@ -329,71 +226,81 @@ class DashboardService:
     @staticmethod
     def get_inspection_results(start_date=None, end_date=None, user=None):
         """获取巡检成果统计（按类型分组）"""
+        return InspectionAggregate.load(start_date, end_date, user).results()
 
-        # 查询交通拥堵类型的结果
-        traffic_query = db.session.query(
-            AnalysisResult.target_type,
-            func.count(AnalysisResult.id).label('total_count')
-        ).filter(AnalysisResult.target_type.contains('('))  # 交通拥堵类型包含括号
-
-        # 查询道路破损类型的结果
-        damage_query = db.session.query(
-            AnalysisResult.target_type,
-            func.count(AnalysisResult.id).label('total_count')
-        ).filter(~AnalysisResult.target_type.contains('('))  # 道路破损类型不包含括号
+    @staticmethod
+    def get_inspection_results_statistics(start_date=None, end_date=None, user=None):
+        """获取巡检结果统计（与inspection_results.py保持完全一致）"""
+        return InspectionAggregate.load(start_date, end_date, user).statistics()
 
-        # 如果用户不是管理员，只显示该用户相关的巡检结果
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            traffic_query = traffic_query.filter(AnalysisResult.mission_id.in_(mission_ids))
-            damage_query = damage_query.filter(AnalysisResult.mission_id.in_(mission_ids))
+    @staticmethod
+    def get_inspection_results_trend(start_date=None, end_date=None, user=None, days=None):
+        """获取巡检结果趋势（读取每日汇总，未提供时间范围时可按最近N天统计）"""
+        if not (start_date and end_date) and days:
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=days - 1)
 
-        if start_date:
-            traffic_query = traffic_query.filter(AnalysisResult.occurred_time >= start_date)
-            damage_query = damage_query.filter(AnalysisResult.occurred_time >= start_date)
-        if end_date:
-            # 修复：结束日期应该包含当天的所有结果
-            end_date_end = datetime.combine(end_date, datetime.max.time())
-            traffic_query = traffic_query.filter(AnalysisResult.occurred_time <= end_date_end)
-            damage_query = damage_query.filter(AnalysisResult.occurred_time <= end_date_end)
+        daily_totals = RollupService.get_daily_totals(METRIC_ANALYSIS_RESULT, start_date, end_date, user)
 
-        # 按类型分组统计总数
-        traffic_results = traffic_query.group_by(AnalysisResult.target_type).all()
-        damage_results = damage_query.group_by(AnalysisResult.target_type).all()
+        # 如果没有提供时间范围，直接返回有数据的日期
+        if not (start_date and end_date):
+            return [{'date': day.isoformat(), 'count': count} for day, (count, _) in daily_totals.items()]
 
-        # 构建返回数据
-        categories = []
-        found = []
+        # 提供了时间范围时补齐没有数据的日期
+        trend = []
+        for i in range((end_date - start_date).days + 1):
+            date = start_date + timedelta(days=i)
+            trend.append({
+                'date': date.isoformat(),
+                'count': daily_totals.get(date, (0, 0.0))[0]
+            })
+        return trend
 
-        # 添加交通拥堵类型统计
-        for target_type, count in traffic_results:
-            categories.append(f'交通拥堵-{target_type}')
-            found.append(count)
+    @staticmethod
+    def get_inspection_type_distribution(start_date=None, end_date=None, user=None):
+        """获取巡检结果类型分布"""
+        return InspectionAggregate.load(start_date, end_date, user).type_distribution()
 
-        # 添加道路破损类型统计
-        for target_type, count in damage_results:
-            categories.append(f'道路破损-{target_type}')
-            found.append(count)
+    @staticmethod
+    def get_dashboard_overview(start_date=None, end_date=None, user=None):
+        """
+        获取看板总览
+        每张表只扫描一次：任务表一次聚合，空域使用记录一次分组，巡检结果一次按(日期, 类型)分组，
+        巡检结果的统计、趋势和分类面板都由同一份分组结果计算
+        """
+        flight_stats = DashboardService.get_flight_statistics(start_date, end_date, user)
+        airspace_stats = DashboardService.get_airspace_usage_statistics(start_date, end_date, user)
+        inspection = InspectionAggregate.load(start_date, end_date, user)
 
         return {
-            'categories': categories,
-            'found': found,
-            'resolved': [0] * len(categories)  # 简化处理，暂不区分已处理和未处理
+            'flight_statistics': flight_stats,
+            'airspace_usage': airspace_stats,
+            # 使用巡检结果统计替代告警统计
+            'inspection_statistics': inspection.statistics(),
+            'inspection_trend': inspection.trend(start_date, end_date),
+            'inspection_results': inspection.results()
         }
 
-    @staticmethod
-    def get_inspection_results_statistics(start_date=None, end_date=None, user=None):
-        """获取巡检结果统计（与inspection_results.py保持完全一致）"""
-        from app.models import AnalysisResult, Mission
-        
-        query = AnalysisResult.query
+
+class InspectionAggregate:
+    """
+    巡检结果分组计数
+    按 (日期, 类型) 分组查询一次，各巡检结果面板都在这份计数上汇总，不再逐条读取ORM对象
+    """
+
+    def __init__(self, rows):
+        # [(YYYY-MM-DD, target_type, count), ...]
+        self.rows = [(date_key(day), target_type, count) for day, target_type, count in rows]
+
+    @classmethod
+    def load(cls, start_date=None, end_date=None, user=None):
+        """按时间范围和用户数据范围查询分组计数"""
+        day = func.date(AnalysisResult.occurred_time)
+        query = db.session.query(day, AnalysisResult.target_type, func.count(AnalysisResult.id))
 
         # 操作员只能查看自己任务的巡检结果（与inspection_results.py保持一致）
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            query = query.filter(AnalysisResult.mission_id.in_(mission_ids))
+        query = Mission.scope_query(query, user, AnalysisResult.mission_id)
 
-        # 根据时间范围筛选（与inspection_results.py保持一致）
         if start_date:
             query = query.filter(AnalysisResult.occurred_time >= start_date)
         if end_date:
@@ -401,168 +308,85 @@ class DashboardService:
             end_date_end = datetime.combine(end_date, datetime.max.time())
             query = query.filter(AnalysisResult.occurred_time <= end_date_end)
 
-        results = query.all()
-
-        # 统计总数（与inspection_results.py保持一致）
-        total_results = len(results)
-
-        # 按事件类型统计（与inspection_results.py保持完全一致）
+        return cls(query.group_by(day, AnalysisResult.target_type).all())
+
+    def type_counts(self):
+        """各类型的结果数量 {target_type: count}，按类型排序"""
+        counts = {}
+        for _, target_type, count in self.rows:
+            counts[target_type] = counts.get(target_type, 0) + count
+        return dict(sorted(counts.items()))
+
+    def day_counts(self):
+        """每天的结果数量 {YYYY-MM-DD: count}，按日期排序"""
+        counts = {}
+        for day, _, count in self.rows:
+            counts[day] = counts.get(day, 0) + count
+        return dict(sorted(counts.items()))
+
+    def statistics(self):
+        """总数、事件类型数量以及拥堵/破损程度统计"""
+        congestion_stats = {level: 0 for level in CONGESTION_LEVELS}
+        damage_stats = {level: 0 for level in DAMAGE_LEVELS}
         traffic_congestion_count = 0
         road_damage_count = 0
-        
-        # 拥堵程度统计
-        congestion_stats = {
-            '轻度 (light)': 0,
-            '中度 (medium)': 0,
-            '重度 (heavy)': 0
-        }
-        
-        # 破损程度统计
-        damage_stats = {
-            '无破损': 0,
-            '轻度破损': 0,
-            '中度破损': 0,
-            '严重破损': 0
-        }
 
-        for result in results:
+        for target_type, count in self.type_counts().items():
             # 根据target_type判断事件类型（与inspection_results.py保持完全一致）
-            if result.target_type in congestion_stats:
-                traffic_congestion_count += 1
-                congestion_stats[result.target_type] += 1
-            elif result.target_type in damage_stats:
-                road_damage_count += 1
-                damage_stats[result.target_type] += 1
-            elif '(' in result.target_type:
+            if target_type in congestion_stats:
+                congestion_stats[target_type] += count
+                traffic_congestion_count += count
+            elif target_type in damage_stats:
+                damage_stats[target_type] += count
+                road_damage_count += count
+            elif is_congestion_type(target_type):
                 # 其他包含括号的类型归类为交通拥堵
-                traffic_congestion_count += 1
+                traffic_congestion_count += count
             else:
                 # 其他类型归类为道路破损
-                road_damage_count += 1
+                road_damage_count += count
 
         return {
-            'total_results': total_results,
+            'total_results': traffic_congestion_count + road_damage_count,
             'traffic_congestion_count': traffic_congestion_count,
             'road_damage_count': road_damage_count,
             'congestion_stats': congestion_stats,
             'damage_stats': damage_stats
         }
 
-    @staticmethod
-    def get_inspection_results_trend(start_date=None, end_date=None, user=None):
-        """获取巡检结果趋势"""
-        # 修复：查询所有数据，然后根据时间过滤
-        query = db.session.query(
-            func.date(AnalysisResult.occurred_time).label('date'),
-            func.count(AnalysisResult.id).label('count')
-        )
-        
-        # 如果用户不是管理员，只显示该用户相关的巡检结果
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            query = query.filter(AnalysisResult.mission_id.in_(mission_ids))
-        
-        if start_date:
-            query = query.filter(AnalysisResult.occurred_time >= start_date)
-        if end_date:
-            # 修复：结束日期应该包含当天的所有结果
-            end_date_end = datetime.combine(end_date, datetime.max.time())
-            query = query.filter(AnalysisResult.occurred_time <= end_date_end)
-            
-        results = query.group_by(func.date(AnalysisResult.occurred_time)).all()
-
-        # 如果提供了时间范围，则构建完整的日期序列
-        if start_date and end_date:
-            days = (end_date - start_date).days + 1
-            trend = []
-            result_dict = {result.date: result.count for result in results}
-            
-            for i in range(days):
-                date = (start_date + timedelta(days=i))
-                count = result_dict.get(date, 0)
-                trend.append({
-                    'date': date.isoformat(),
-                    'count': count
-                })
-            return trend
-        else:
-            # 如果没有提供时间范围，直接返回查询结果
-            return [{'date': r.date.isoformat(), 'count': r.count} for r in results]
-
-    def get_inspection_type_distribution(start_date=None, end_date=None, user=None):
-        """获取巡检结果类型分布"""
-        query = AnalysisResult.query
-
-        # 如果用户不是管理员，只显示该用户相关的巡检结果
-        if user and not user.is_admin():
-            mission_ids = [m.id for m in Mission.query.filter_by(operator_id=user.id).all()]
-            query = query.filter(AnalysisResult.mission_id.in_(mission_ids))
+    def trend(self, start_date=None, end_date=None):
+        """每日结果数量；提供时间范围时补齐没有数据的日期"""
+        day_counts = self.day_counts()
+        if not (start_date and end_date):
+            return [{'date': day, 'count': count} for day, count in day_counts.items()]
 
-        if start_date:
-            query = query.filter(AnalysisResult.occurred_time >= start_date)
-        if end_date:
-            # 修复：结束日期应该包含当天的所有结果
-            end_date_end = datetime.combine(end_date, datetime.max.time())
-            query = query.filter(AnalysisResult.occurred_time <= end_date_end)
+        trend = []
+        for i in range((end_date - start_date).days + 1):
+            day = (start_date + timedelta(days=i)).isoformat()
+            trend.append({'date': day, 'count': day_counts.get(day, 0)})
+        return trend
 
-        results = query.all()
+    def results(self):
+        """巡检成果分类数量（交通拥堵在前，道路破损在后）"""
+        type_counts = self.type_counts()
+        traffic = [(f'交通拥堵-{t}', c) for t, c in type_counts.items() if is_congestion_type(t)]
+        damage = [(f'道路破损-{t}', c) for t, c in type_counts.items() if not is_congestion_type(t)]
 
-        # 拥堵程度统计（与inspection_results.py保持一致）
-        congestion_stats = {
-            '轻度 (light)': 0,
-            '中度 (medium)': 0,
-            '重度 (heavy)': 0
-        }
-        
-        # 破损程度统计（与inspection_results.py保持一致）
-        damage_stats = {
-            '无破损': 0,
-            '轻度破损': 0,
-            '中度破损': 0,
-            '严重破损': 0
+        categories = [category for category, _ in traffic + damage]
+        return {
+            'categories': categories,
+            'found': [count for _, count in traffic + damage],
+            'resolved': [0] * len(categories)  # 简化处理，暂不区分已处理和未处理
         }
 
-        for result in results:
-            # 根据target_type判断事件类型并统计（与inspection_results.py逻辑一致）
-            if result.target_type in congestion_stats:
-                congestion_stats[result.target_type] += 1
-            elif result.target_type in damage_stats:
-                damage_stats[result.target_type] += 1
-            elif '(' in result.target_type:
-                # 其他包含括号的类型归类为交通拥堵，但不计入具体统计
-                pass
-            else:
-                # 其他类型归类为道路破损，但不计入具体统计
-                pass
-
-        # 合并统计数据
+    def type_distribution(self):
+        """拥堵/破损程度分布，只包含有数据的项（其他类型不计入）"""
+        type_counts = self.type_counts()
         type_distribution = {}
-        # 添加交通拥堵统计
-        for level, count in congestion_stats.items():
-            if count > 0:  # 只添加有数据的项
-                type_distribution[f'交通拥堵-{level}'] = count
-        
-        # 添加道路破损统计
-        for level, count in damage_stats.items():
-            if count > 0:  # 只添加有数据的项
-                type_distribution[f'道路破损-{level}'] = count
-
+        for level in CONGESTION_LEVELS:
+            if type_counts.get(level):
+                type_distribution[f'交通拥堵-{level}'] = type_counts[level]
+        for level in DAMAGE_LEVELS:
+            if type_counts.get(level):
+                type_distribution[f'道路破损-{level}'] = type_counts[level]
         return type_distribution
-
-    @staticmethod
-    def get_dashboard_overview(start_date=None, end_date=None, user=None):
-        """获取看板总览"""
-        flight_stats = DashboardService.get_flight_statistics(start_date, end_date, user)
-        airspace_stats = DashboardService.get_airspace_usage_statistics(start_date, end_date, user)
-        # 使用新的巡检结果统计替代告警统计
-        inspection_stats = DashboardService.get_inspection_results_statistics(start_date, end_date, user)
-        inspection_trend = DashboardService.get_inspection_results_trend(start_date=start_date, end_date=end_date, user=user)
-        inspection_results = DashboardService.get_inspection_results(start_date, end_date, user)
-
-        return {
-            'flight_statistics': flight_stats,
-            'airspace_usage': airspace_stats,
-            'inspection_statistics': inspection_stats,  
-            'inspection_trend': inspection_trend,
-            'inspection_results': inspection_results
-        }
\ No newline at end of file
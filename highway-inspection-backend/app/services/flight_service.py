@@ -1,6 +1,9 @@
 from datetime import datetime, timezone, timedelta
+from sqlalchemy.orm import load_only
 from app.models import db, FlightApplication, AirspaceUsage, Mission, Airspace
 from app.services.airspace_service import AirspaceService
+from app.utils.intervals import overlapping_pairs
+from app.utils.pagination import keyset_paginate
 
 
 class FlightService:
@@ -113,31 +116,163 @@ class FlightService:
         if not application.can_be_submitted():
             raise ValueError('申请状态不允许提交')
 
+        # 检查航线是否在计划空域内、是否穿越禁飞区
+        AirspaceService.validate_route(application.route, application.planned_airspace_id)
+
+        # 长期申请的每日时段不能跨越午夜
+        FlightService._daily_window(application)
+
         # 检查空域冲突
-        if AirspaceService.check_airspace_conflict(
-            application.planned_airspace_id,
-            application.planned_start_time,
-            application.planned_end_time
-        ):
+        if FlightService.has_airspace_conflict(application):
             raise ValueError('申请的时间段内空域已被占用')
 
         application.status = 'pending'
         db.session.commit()
 
-        # 创建空域使用记录
-        usage = AirspaceUsage(
-            flight_application_id=application.id,
-            airspace_id=application.planned_airspace_id,
-            start_time=application.planned_start_time,
-            end_time=application.planned_end_time,
-            status='applied'
-        )
-        db.session.add(usage)
+        # 创建空域使用记录（长期申请每天一条）
+        FlightService._record_usages(application, 'applied')
         db.session.commit()
 
         return application
 
-    #此处应该添加一个函数，用于检测当前所有申请的冲突情况，并返回具体冲突对象编号
+    @staticmethod
+    def _record_usages(application, status):
+        """按申请占用的时段重建空域使用记录（不提交事务），撤回后重新提交时替换原有记录"""
+        for usage in application.usage_records:
+            db.session.delete(usage)
+
+        for airspace_id, start_time, end_time in FlightService.get_occupied_slots(application):
+            db.session.add(AirspaceUsage(
+                flight_application_id=application.id,
+                airspace_id=airspace_id,
+                start_time=start_time,
+                end_time=end_time,
+                status=status
+            ))
+
+    @staticmethod
+    def _to_local(dt):
+        """UTC的无时区datetime转换为北京时间"""
+        return dt.replace(tzinfo=timezone.utc).astimezone(FlightService.LOCAL_TZ)
+
+    @staticmethod
+    def _daily_window(application):
+        """
+        长期申请每天占用的时段（北京时间的计划开始时刻、计划结束时刻），非长期申请返回 None
+        每日时段跨越午夜时抛出 ValueError
+        """
+        if not (application.is_long_term and application.long_term_start and application.long_term_end):
+            return None
+
+        daily_start = FlightService._to_local(application.planned_start_time).time()
+        daily_end = FlightService._to_local(application.planned_end_time).time()
+        if daily_end <= daily_start:
+            raise ValueError('长期申请的每日飞行时段不能跨越午夜')
+        return daily_start, daily_end
+
+    @staticmethod
+    def get_occupied_slots(application):
+        """
+        申请占用空域的时段 [(airspace_id, start_time, end_time)]，按开始时间排序
+        长期申请在 long_term_start ~ long_term_end 的每一天（北京时间）占用计划开始时刻到计划结束时刻的时段；
+        提交时尚未校验每日时段的历史长期申请（每日时段跨越午夜）按计划时段占用
+        """
+        try:
+            window = FlightService._daily_window(application)
+        except ValueError:
+            window = None
+        if window is None:
+            return [(application.planned_airspace_id, application.planned_start_time, application.planned_end_time)]
+
+        def to_utc(day, time_of_day):
+            local = datetime.combine(day, time_of_day, tzinfo=FlightService.LOCAL_TZ)
+            return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+        daily_start, daily_end = window
+        day = FlightService._to_local(application.long_term_start).date()
+        last_day = FlightService._to_local(application.long_term_end).date()
+        slots = []
+        while day <= last_day:
+            slots.append((application.planned_airspace_id, to_utc(day, daily_start), to_utc(day, daily_end)))
+            day += timedelta(days=1)
+        return slots
+
+    @staticmethod
+    def is_expired(application, now=None):
+        """待审批/已批准的申请是否已过最后一个占用时段（长期申请为最后一天的时段）"""
+        now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+        if application.status not in ('pending', 'approved') or now <= application.planned_end_time:
+            return False
+        return now > FlightService.get_occupied_slots(application)[-1][2]
+
+    @staticmethod
+    def has_airspace_conflict(application, exclude_application_id=None):
+        """申请占用的时段是否与已批准/执行中的空域使用冲突（长期申请的多个时段一次批量检查）"""
+        slots = FlightService.get_occupied_slots(application)
+        if len(slots) == 1:
+            return AirspaceService.check_airspace_conflict(*slots[0], exclude_application_id=exclude_application_id)
+        return any(AirspaceService.find_airspace_conflicts(slots, exclude_application_id))
+
+    @staticmethod
+    def detect_conflicts():
+        """
+        检测当前所有待审批申请的空域冲突，返回具体冲突对象编号：
+        - 待审批申请之间：按空域分组，扫描线一次找出所有时段重叠的申请对
+        - 与已批准/执行中的空域使用：一次加载相关空域的区间索引后逐个时段查询
+        同一对申请只返回最早的一段重叠时间
+        """
+        applications = FlightApplication.query.options(load_only(
+            FlightApplication.id, FlightApplication.planned_airspace_id,
+            FlightApplication.planned_start_time, FlightApplication.planned_end_time,
+            FlightApplication.is_long_term, FlightApplication.long_term_start, FlightApplication.long_term_end
+        )).filter_by(status='pending').all()
+
+        slots_by_airspace = {}
+        for application in applications:
+            for airspace_id, start_time, end_time in FlightService.get_occupied_slots(application):
+                slots_by_airspace.setdefault(airspace_id, []).append((start_time, end_time, application.id))
+        if not slots_by_airspace:
+            return []
+
+        conflicts = {}
+
+        def add(airspace_id, application_id, other_id, conflict_type, overlap_start, overlap_end):
+            key = (airspace_id, application_id, other_id, conflict_type)
+            if key not in conflicts or overlap_start < conflicts[key]['overlap_start']:
+                conflicts[key] = {
+                    'airspace_id': airspace_id,
+                    'application_id': application_id,
+                    'conflict_application_id': other_id,
+                    'conflict_type': conflict_type,  # pending：待审批申请之间；approved/active：已占用的空域使用
+                    'overlap_start': overlap_start,
+                    'overlap_end': overlap_end
+                }
+
+        for airspace_id, slots in slots_by_airspace.items():
+            for (start_a, end_a, id_a), (start_b, end_b, id_b) in overlapping_pairs(slots):
+                if id_a != id_b:
+                    add(airspace_id, min(id_a, id_b), max(id_a, id_b), 'pending', max(start_a, start_b), min(end_a, end_b))
+
+        all_slots = [slot for slots in slots_by_airspace.values() for slot in slots]
+        usage_index = AirspaceService.load_usage_index(
+            slots_by_airspace.keys(),
+            min(start for start, _, _ in all_slots),
+            max(end for _, end, _ in all_slots)
+        )
+        for airspace_id, slots in slots_by_airspace.items():
+            index = usage_index.get(airspace_id)
+            if index is None:
+                continue
+            for start_time, end_time, application_id in slots:
+                for usage_start, usage_end, (other_id, status) in index.iter_overlapping(start_time, end_time):
+                    if other_id != application_id:
+                        add(airspace_id, application_id, other_id, status,
+                            max(start_time, usage_start), min(end_time, usage_end))
+
+        return [
+            dict(item, overlap_start=item['overlap_start'].isoformat(), overlap_end=item['overlap_end'].isoformat())
+            for _, item in sorted(conflicts.items(), key=lambda entry: (entry[0][1], entry[0][2], entry[0][0]))
+        ]
 
     @staticmethod
     def approve_application(application_id):
@@ -150,29 +285,24 @@ class FlightService:
             raise ValueError('申请状态不允许审批')
 
         # 检查是否已过期
-        if application.is_expired():
+        if FlightService.is_expired(application):
             application.status = 'expired'
             db.session.commit()
             raise ValueError('申请已过期')
 
+        # 再次检查航线（提交后空域范围可能被修改）
+        AirspaceService.validate_route(application.route, application.planned_airspace_id)
+
         # 再次检查空域冲突
-        if AirspaceService.check_airspace_conflict(
-            application.planned_airspace_id,
-            application.planned_start_time,
-            application.planned_end_time,
-            exclude_application_id=application.id
-        ):
+        if FlightService.has_airspace_conflict(application, exclude_application_id=application.id):
             raise ValueError('申请的时间段内空域已被占用')
 
         application.status = 'approved'
         application.rejection_reason = None
-        db.session.commit()
 
-        # 更新空域使用记录状态
-        usage = AirspaceUsage.query.filter_by(flight_application_id=application.id).first()
-        if usage:
-            usage.status = 'approved'
-            db.session.commit()
+        # 按审批时检查的时段写入空域使用记录
+        FlightService._record_usages(application, 'approved')
+        db.session.commit()
 
         return application
 
@@ -221,11 +351,9 @@ class FlightService:
         db.session.commit()
 
         #更新空域使用情况
-
-        usage = AirspaceUsage.query.filter_by(flight_application_id=application.id).first()
-        if usage:
+        for usage in application.usage_records:
             usage.status = 'released'
-            db.session.commit()
+        db.session.commit()
 
         return application
 
@@ -258,23 +386,25 @@ class FlightService:
         if not application.can_be_launched():
             raise ValueError('申请状态不允许放飞')
 
-        # 检查时间是否在申请范围内
+        # 检查时间是否在申请占用的时段内（长期申请为当天的时段）
         # 使用timezone-aware的UTC时间，确保正确性
         now = datetime.now(timezone.utc).replace(tzinfo=None)
 
-        
-        if now < application.planned_start_time or now > application.planned_end_time:
-            error_msg = f'当前时间不在申请的飞行时间范围内 (当前UTC: {now}, 申请时间: {application.planned_start_time} ~ {application.planned_end_time})'
+        slots = FlightService.get_occupied_slots(application)
+        slot = next(((start, end) for _, start, end in slots if start <= now <= end), None)
+        if slot is None:
+            error_msg = f'当前时间不在申请的飞行时间范围内 (当前UTC: {now}, 申请时间: {slots[0][1]} ~ {slots[-1][2]})'
             raise ValueError(error_msg)
-        
+        slot_start, slot_end = slot
+
         # 验证预计结束时间
         estimated_finish_time = now + timedelta(minutes=application.total_time)
 
-        if estimated_finish_time > application.planned_end_time:
-            time_shortage = (estimated_finish_time - application.planned_end_time).total_seconds() / 60
+        if estimated_finish_time > slot_end:
+            time_shortage = (estimated_finish_time - slot_end).total_seconds() / 60
             error_msg = (
                 f'预计结束时间（{estimated_finish_time.strftime("%H:%M:%S")}）'
-                f'超出计划结束时间（{application.planned_end_time.strftime("%H:%M:%S")}）约{int(time_shortage)}分钟，'
+                f'超出计划结束时间（{slot_end.strftime("%H:%M:%S")}）约{int(time_shortage)}分钟，'
                 f'无法在计划时间内完成飞行任务，不得放飞'
             )
             raise ValueError(error_msg)
@@ -300,13 +430,19 @@ class FlightService:
             end_time=estimated_end_time,  # 设置预计结束时间
             status='executing'
         )
+        # 航线和飞行时长在任务创建后不再变化，预先计算几何指标和飞行速度
+        mission.flight_application = application
+        mission.update_route_metrics()
+        mission.update_flight_speed()
         db.session.add(mission)
 
         # 更新空域状态
         airspace.status = 'occupied'
 
-        # 更新空域使用记录
-        usage = AirspaceUsage.query.filter_by(flight_application_id=application.id).first()
+        # 更新空域使用记录（长期申请为当前所在的时段）
+        usage = application.usage_records.filter(
+            AirspaceUsage.start_time <= slot_start, AirspaceUsage.end_time >= slot_end
+        ).first() or application.usage_records.order_by(AirspaceUsage.start_time).first()
         if usage:
             usage.status = 'active'
 
@@ -336,6 +472,29 @@ class FlightService:
             'page_size': page_size
         }
 
+    @staticmethod
+    def get_application_page(user_id=None, is_admin=False, status=None, cursor=None, page_size=20, with_total=False):
+        """获取申请列表（游标分页）"""
+        query = FlightApplication.query
+
+        # 操作员只能看到自己的申请
+        if not is_admin and user_id:
+            query = query.filter_by(user_id=user_id)
+
+        if status:
+            query = query.filter_by(status=status)
+
+        applications, next_cursor, total = keyset_paginate(
+            query, FlightApplication.created_at, FlightApplication.id, cursor, page_size, with_total
+        )
+
+        return {
+            'items': [app.to_dict(include_relations=True) for app in applications],
+            'next_cursor': next_cursor,
+            'page_size': page_size,
+            'total': total
+        }
+
     @staticmethod
     def get_pending_applications():
         """获取待审批的申请"""
@@ -345,11 +504,13 @@ class FlightService:
     def check_expired_applications():
         """检查并更新过期的申请"""
         now = datetime.now(timezone.utc).replace(tzinfo=None)
-        expired_apps = FlightApplication.query.filter(
+        candidates = FlightApplication.query.filter(
             FlightApplication.status.in_([ 'pending','approved']),
             FlightApplication.planned_end_time < now
         ).all()    #此处应该是超过计划结束时间，已修改
 
+        # 长期申请在最后一天的时段结束后才过期
+        expired_apps = [app for app in candidates if FlightService.is_expired(app, now)]
         for app in expired_apps:
             app.status = 'expired'
 
@@ -0,0 +1,170 @@
+"""
+交通拥堵帧分类器（批量推理）
+将多帧堆叠为一个 NCHW 张量，一次 ONNX Runtime / ultralytics 调用完成整批分类
+"""
+import ast
+import os
+
+# 模型输出的英文类别 -> 系统中使用的拥堵等级名称（与看板统计保持一致）
+CONGESTION_LABELS = {
+    'light': '轻度 (light)',
+    'medium': '中度 (medium)',
+    'heavy': '重度 (heavy)'
+}
+
+DEFAULT_MODEL_PATH = os.path.join('ai', 'models', 'best.onnx')
+
+
+def resolve_model_path(model_path=None):
+    """解析模型路径，相对路径以后端项目根目录为基准"""
+    model_path = model_path or DEFAULT_MODEL_PATH
+    if os.path.isabs(model_path):
+        return model_path
+    backend_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(backend_root, model_path)
+
+
+class FrameBatchClassifier:
+    """帧批量分类器，首次调用时加载模型"""
+
+    def __init__(self, model_path, image_size=224, intra_op_threads=0, inter_op_threads=0):
+        self.model_path = model_path
+        self.image_size = image_size
+        # 0 表示由 ONNX Runtime 自行决定线程数
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.names = {}
+        self._backend = None
+        self._session = None
+        self._input_name = None
+        self._fixed_batch = None
+        self._model = None
+
+    def is_available(self):
+        """模型文件存在且推理依赖可导入"""
+        if not os.path.exists(self.model_path):
+            return False
+        try:
+            self.load()
+        except Exception as e:
+            print(f"⚠️ 批量分类模型加载失败: {e}")
+            return False
+        return True
+
+    def load(self):
+        """加载模型（重复调用无副作用）"""
+        if self._backend is not None:
+            return
+
+        if self.model_path.lower().endswith('.onnx'):
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.intra_op_threads
+            options.inter_op_num_threads = self.inter_op_threads
+            session = ort.InferenceSession(
+                self.model_path, sess_options=options, providers=['CPUExecutionProvider']
+            )
+            model_input = session.get_inputs()[0]
+            batch_dim, _, height, _ = model_input.shape
+            # 导出时未开启动态batch的模型只能按固定batch运行
+            self._fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+            if isinstance(height, int):
+                self.image_size = height
+
+            metadata = session.get_modelmeta().custom_metadata_map
+            if 'names' in metadata:
+                self.names = ast.literal_eval(metadata['names'])
+
+            self._session = session
+            self._input_name = model_input.name
+            self._backend = 'onnx'
+        else:
+            from ultralytics import YOLO
+
+            self._model = YOLO(self.model_path, task='classify')
+            self.names = self._model.names
+            self._backend = 'ultralytics'
+
+        print(f"✅ 批量分类模型已加载: {self.model_path} ({self._backend})")
+
+    def warmup(self):
+        """用空白帧执行一次推理，提前完成内存分配和算子初始化"""
+        import numpy as np
+
+        self.load()
+        frame = np.zeros((self.image_size, self.image_size, 3), dtype=np.uint8)
+        self.predict_batch([frame] * (self._fixed_batch or 1))
+
+    def _preprocess(self, frames):
+        """BGR帧 -> 短边缩放 + 中心裁剪 -> RGB、归一化后的 NCHW float32 张量"""
+        import cv2
+        import numpy as np
+
+        size = self.image_size
+        batch = np.empty((len(frames), 3, size, size), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            height, width = frame.shape[:2]
+            scale = size / min(height, width)
+            resized = cv2.resize(
+                frame,
+                (max(size, round(width * scale)), max(size, round(height * scale))),
+                interpolation=cv2.INTER_AREA
+            )
+            top = (resized.shape[0] - size) // 2
+            left = (resized.shape[1] - size) // 2
+            cropped = resized[top:top + size, left:left + size]
+            batch[i] = cropped[:, :, ::-1].transpose(2, 0, 1)
+        batch /= 255.0
+        return batch
+
+    def _run_onnx(self, tensor):
+        import numpy as np
+
+        if not self._fixed_batch or self._fixed_batch == len(tensor):
+            return self._session.run(None, {self._input_name: tensor})[0]
+
+        # 固定batch的模型：按模型batch切分，最后一组补齐
+        outputs = []
+        step = self._fixed_batch
+        for start in range(0, len(tensor), step):
+            chunk = tensor[start:start + step]
+            count = len(chunk)
+            if count < step:
+                chunk = np.concatenate([chunk, np.repeat(chunk[-1:], step - count, axis=0)])
+            outputs.append(self._session.run(None, {self._input_name: chunk})[0][:count])
+        return np.concatenate(outputs)
+
+    def _label(self, class_id):
+        name = str(self.names.get(int(class_id), class_id))
+        return CONGESTION_LABELS.get(name.lower(), name)
+
+    def predict_batch(self, frames):
+        """
+        对一批BGR帧进行分类
+        返回与输入顺序一致的 [{'class_name': str, 'confidence': float}, ...]
+        """
+        if not frames:
+            return []
+        self.load()
+
+        if self._backend == 'ultralytics':
+            results = self._model.predict(frames, imgsz=self.image_size, verbose=False)
+            return [
+                {'class_name': self._label(r.probs.top1), 'confidence': float(r.probs.top1conf)}
+                for r in results
+            ]
+
+        import numpy as np
+
+        probs = self._run_onnx(self._preprocess(frames))
+        # 输出不是概率分布时做softmax
+        if not np.allclose(probs.sum(axis=1), 1.0, atol=1e-3):
+            exp = np.exp(probs - probs.max(axis=1, keepdims=True))
+            probs = exp / exp.sum(axis=1, keepdims=True)
+
+        top1 = probs.argmax(axis=1)
+        return [
+            {'class_name': self._label(class_id), 'confidence': float(probs[i, class_id])}
+            for i, class_id in enumerate(top1)
+        ]
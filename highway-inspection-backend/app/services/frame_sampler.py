@@ -0,0 +1,134 @@
+"""
+视频抽帧策略
+- fixed: 固定间隔抽帧
+- adaptive: 基于缩略图帧差和灰度直方图距离的自适应抽帧，画面静止时跳过，场景变化时密集采样
+"""
+
+
+class FixedIntervalSampler:
+    """固定间隔抽帧"""
+
+    mode = 'fixed'
+
+    def __init__(self, interval):
+        self.interval = max(1, interval)
+        self.frames_seen = 0
+        self.analyzed = 0
+
+    def needs_frame(self, frame_idx):
+        """该帧是否需要解码（不需要的帧只grab）"""
+        return frame_idx % self.interval == 0
+
+    def frame_read(self, frame_idx):
+        """第 frame_idx 帧（从0开始）已读取或跳过"""
+        self.frames_seen = frame_idx + 1
+
+    def should_analyze(self, frame_idx, frame):
+        """已解码的帧是否送入模型"""
+        self.analyzed += 1
+        return True
+
+    def get_stats(self):
+        return {
+            'mode': self.mode,
+            'frames_seen': self.frames_seen,
+            'decoded': self.analyzed,
+            'analyzed': self.analyzed,
+            'skipped': self.frames_seen - self.analyzed
+        }
+
+
+class AdaptiveFrameSampler:
+    """
+    自适应抽帧
+    每 min_interval 帧解码一次并生成小尺寸灰度缩略图，与上一次送检帧比较：
+    平均灰度差或直方图巴氏距离超过阈值时送检；画面静止时最多 max_interval 帧送检一次
+    """
+
+    mode = 'adaptive'
+
+    def __init__(self, min_interval=2, max_interval=50, diff_threshold=12.0,
+                 hist_threshold=0.2, thumb_width=64):
+        self.min_interval = max(1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.diff_threshold = diff_threshold
+        self.hist_threshold = hist_threshold
+        self.thumb_width = thumb_width
+
+        self.frames_seen = 0
+        self.decoded = 0
+        self.analyzed = 0
+        self.scene_changes = 0
+        self.keepalive = 0
+
+        self._ref_gray = None
+        self._ref_hist = None
+        self._last_analyzed_idx = None
+
+    def needs_frame(self, frame_idx):
+        return frame_idx % self.min_interval == 0
+
+    def frame_read(self, frame_idx):
+        self.frames_seen = frame_idx + 1
+
+    def _signature(self, frame):
+        """缩略图灰度图 + 归一化直方图"""
+        import cv2
+
+        height, width = frame.shape[:2]
+        thumb_height = max(1, round(height * self.thumb_width / width))
+        small = cv2.resize(frame, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+        hist = cv2.calcHist([gray], [0], None, [32], [0, 256])
+        cv2.normalize(hist, hist)
+        return gray, hist
+
+    def should_analyze(self, frame_idx, frame):
+        import cv2
+
+        self.decoded += 1
+        gray, hist = self._signature(frame)
+
+        if self._ref_gray is None:
+            analyze = True
+        elif frame_idx - self._last_analyzed_idx >= self.max_interval:
+            # 画面长时间无变化时仍定期送检，避免遗漏缓慢变化
+            analyze = True
+            self.keepalive += 1
+        else:
+            diff = float(cv2.absdiff(gray, self._ref_gray).mean())
+            hist_distance = cv2.compareHist(hist, self._ref_hist, cv2.HISTCMP_BHATTACHARYYA)
+            analyze = diff >= self.diff_threshold or hist_distance >= self.hist_threshold
+            if analyze:
+                self.scene_changes += 1
+
+        if analyze:
+            self._ref_gray = gray
+            self._ref_hist = hist
+            self._last_analyzed_idx = frame_idx
+            self.analyzed += 1
+        return analyze
+
+    def get_stats(self):
+        return {
+            'mode': self.mode,
+            'frames_seen': self.frames_seen,
+            'decoded': self.decoded,
+            'analyzed': self.analyzed,
+            'skipped': self.frames_seen - self.analyzed,
+            'scene_changes': self.scene_changes,
+            'keepalive': self.keepalive
+        }
+
+
+def create_frame_sampler(app_config, fixed_interval):
+    """根据配置创建抽帧策略"""
+    if app_config.get('AI_FRAME_SAMPLER', 'adaptive') == 'fixed':
+        return FixedIntervalSampler(fixed_interval)
+
+    return AdaptiveFrameSampler(
+        min_interval=app_config.get('AI_SAMPLER_MIN_INTERVAL', 2),
+        max_interval=app_config.get('AI_SAMPLER_MAX_INTERVAL', 50),
+        diff_threshold=app_config.get('AI_SAMPLER_DIFF_THRESHOLD', 12.0),
+        hist_threshold=app_config.get('AI_SAMPLER_HIST_THRESHOLD', 0.2)
+    )
@@ -0,0 +1,101 @@
+"""
+上传文件访问（/uploads/<path>）
+- 支持 Range 请求（206 / 416）和 If-Range，浏览器拖动视频进度条时只读取需要的字节
+- 强 ETag：内容寻址存储的文件直接使用文件名中的内容哈希，历史文件使用登记的内容哈希，
+  其余文件使用 Werkzeug 按修改时间和大小生成的 ETag
+- 内容寻址文件、播放版本和带时间戳文件名的文件内容不会改变，使用一年的 immutable 缓存；
+  其他文件（如检测帧）每次校验 ETag
+- 可选 X-Accel-Redirect（Nginx）/ X-Sendfile（Apache 等）：条件请求由应用处理，文件内容由反向代理发送
+- 上传过程中的文件（uploads/incoming/ 和 .part 文件）仍在写入，不对外提供
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from flask import current_app, request, send_file, Response
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from app.models import MediaBlob
+
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# uploads/blobs/<2>/<2>/<sha256><扩展名>
+BLOB_PATH = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<hash>[0-9a-f]{64})\.\w+$')
+# uploads/blobs/<2>/<2>/<sha256>/ 下的播放版本（代理 MP4、HLS 播放列表和切片，完成后才发布，重新生成时使用新路径）
+RENDITION_PATH = re.compile(r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}/[^/]+(/[^/]+)?$')
+# uploads/<任务ID>/<YYYYmmdd_HHMMSS>_<文件名>（历史上传文件）
+TIMESTAMPED_PATH = re.compile(r'^\d+/\d{8}_\d{6}_[^/]+$')
+# 上传过程中的文件
+INCOMING_DIR = 'incoming'
+PARTIAL_SUFFIX = '.part'
+
+
+def media_cache_info(filename):
+    """返回 (内容哈希或None, 内容是否不可变)"""
+    match = BLOB_PATH.match(filename)
+    if match:
+        return match.group('hash'), True
+
+    if RENDITION_PATH.match(filename):
+        return None, True
+
+    if TIMESTAMPED_PATH.match(filename):
+        # 内容哈希回填后历史文件保留在原路径
+        blob = MediaBlob.query.filter_by(file_path=os.path.join('uploads', filename)).first()
+        return (blob.content_hash if blob else None), True
+
+    return None, False
+
+
+def send_media(uploads_base, filename):
+    """发送 uploads 目录下的文件，文件不存在时抛出 NotFound"""
+    filename = posixpath.normpath(filename.replace(os.sep, '/'))
+    if filename.split('/', 1)[0] == INCOMING_DIR or filename.endswith(PARTIAL_SUFFIX):
+        raise NotFound()
+
+    path = safe_join(uploads_base, filename)
+    if path is None or not os.path.isfile(path):
+        raise NotFound()
+
+    content_hash, immutable = media_cache_info(filename)
+    etag = f'sha256-{content_hash}' if content_hash else None
+    offload = current_app.config['MEDIA_OFFLOAD']
+
+    if offload:
+        response = _offload_response(path, filename, etag, offload)
+    else:
+        # conditional=True 时 Werkzeug 处理 If-None-Match / If-Modified-Since / Range / If-Range
+        response = send_file(path, conditional=True, etag=etag if etag else True)
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def _offload_response(path, filename, etag, offload):
+    """由反向代理发送文件内容（代理自行处理 Range），应用只处理条件请求"""
+    stat = os.stat(path)
+    if etag is None:
+        etag = f'{int(stat.st_mtime)}-{stat.st_size}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    response = Response(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.headers['Accept-Ranges'] = 'bytes'
+    if offload == 'x-accel':
+        prefix = current_app.config['MEDIA_ACCEL_PREFIX'].rstrip('/')
+        response.headers['X-Accel-Redirect'] = quote(f'{prefix}/{filename}')
+    else:
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    return response
@@ -0,0 +1,121 @@
+"""
+内容寻址媒体存储
+上传的文件按上传内容的 SHA-256 存放在 uploads/blobs/<前2位>/<3-4位>/<hash><扩展名>，相同内容只保存一份：
+- 视频记录通过 content_hash 引用文件，media_blobs.ref_count 记录引用该文件的视频记录数；
+  系统不提供删除视频记录的功能，已存储的文件不会被回收
+- 重复上传时丢弃新文件直接引用已有文件（AVI 也不再重复转换），
+  并复用相同内容视频已有的分析结果，不再重复执行AI分析
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, Video, AnalysisResult, AnalysisJob, MediaBlob
+
+BLOB_ROOT = os.path.join('uploads', 'blobs')
+
+
+class MediaStore:
+    """内容寻址媒体存储服务"""
+
+    @staticmethod
+    def blob_path(content_hash, extension):
+        """按哈希前4位分两级目录，避免单个目录下文件过多"""
+        return os.path.join(BLOB_ROOT, content_hash[:2], content_hash[2:4], f'{content_hash}{extension.lower()}')
+
+    @staticmethod
+    def get(content_hash, lock=False):
+        """
+        获取已存储的文件，没有记录或文件已丢失时返回None
+        lock=True 时锁定文件记录直到事务结束（转码进程更新文件路径和转码状态前同样先锁定）
+        """
+        query = MediaBlob.query.filter_by(content_hash=content_hash)
+        if lock:
+            query = query.with_for_update().populate_existing()
+        blob = query.first()
+        if blob and os.path.exists(blob.file_path):
+            return blob
+        return None
+
+    @staticmethod
+    def put(content_hash, file_path, size=None):
+        """把文件移动到内容寻址路径并登记（不提交事务），返回 MediaBlob"""
+        target = MediaStore.blob_path(content_hash, os.path.splitext(file_path)[1])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # 并发上传相同内容时目标文件内容一致，直接覆盖即可
+        os.replace(file_path, target)
+
+        blob = MediaBlob.query.get(content_hash)
+        if blob:
+            # 记录存在但文件已丢失，用本次上传的文件补回
+            blob.file_path = target
+            return blob
+
+        try:
+            with db.session.begin_nested():
+                blob = MediaBlob(content_hash=content_hash, file_path=target, size=size, ref_count=0)
+                db.session.add(blob)
+        except IntegrityError:
+            # 其他进程同时登记了相同内容
+            blob = MediaBlob.query.get(content_hash)
+        return blob
+
+    @staticmethod
+    def add_ref(content_hash):
+        """增加引用数（原子更新，不提交事务）"""
+        MediaBlob.query.filter_by(content_hash=content_hash).update(
+            {'ref_count': MediaBlob.ref_count + 1}, synchronize_session=False
+        )
+
+    @staticmethod
+    def analysis_video_id(video):
+        """
+        分析结果所属的视频ID：视频本身有分析结果时为自身，
+        否则为最早的有分析结果的相同内容视频（都没有时为自身）
+        """
+        if not video.content_hash or \
+                db.session.query(AnalysisResult.id).filter_by(video_id=video.id).first():
+            return video.id
+
+        has_results = db.session.query(AnalysisResult.id).filter(AnalysisResult.video_id == Video.id).exists()
+        source = db.session.query(Video.id).filter(
+            Video.content_hash == video.content_hash,
+            Video.id != video.id,
+            has_results
+        ).order_by(Video.id).first()
+        return source.id if source else video.id
+
+    @staticmethod
+    def reuse_analysis(video, user_id, detection_type):
+        """
+        相同内容的其他视频已完成同类分析时，为本视频创建一条已完成的任务记录并复用其分析结果，
+        返回该任务；没有可复用的分析时返回None
+        """
+        source_video_id = MediaStore.analysis_video_id(video)
+        if source_video_id == video.id:
+            return None
+
+        source_job = AnalysisJob.query.filter_by(
+            video_id=source_video_id, detection_type=detection_type, status='completed'
+        ).order_by(AnalysisJob.finished_at.desc()).first()
+        if not source_job:
+            return None
+
+        now = datetime.utcnow()
+        job = AnalysisJob(
+            video_id=video.id,
+            user_id=user_id,
+            detection_type=detection_type,
+            status='completed',
+            progress=100.0,
+            processed_frames=source_job.processed_frames,
+            total_frames=source_job.total_frames,
+            result_count=source_job.result_count,
+            message=f'相同文件已完成分析，复用视频 {source_video_id} 的分析结果',
+            started_at=now,
+            finished_at=now
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
@@ -0,0 +1,315 @@
+"""
+媒体文件上传
+- 普通上传：整个 multipart 请求一次上传
+- 分片上传（断点续传）：初始化 -> 按偏移量 PUT 分片 -> 完成时校验 SHA-256；
+  分片直接流式写入 .part 文件（不在内存中缓存整个分片，也不需要合并），
+  上传进度保存在数据库中，任意工作进程都可以继续处理同一个上传，连接中断后从 received_bytes 续传
+上传过程中的文件写在 uploads/incoming/ 下（不通过 /uploads 对外提供，避免未写完的文件被当作不可变内容缓存），
+上传完成的文件按内容 SHA-256 存入内容寻址存储（见 media_store），相同内容只保存一份；
+AVI 视频由转码工作进程在后台转为 MP4（见 transcode_service），并生成网页播放版本（见 rendition_service），
+上传请求不等待转码
+"""
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app.models import db, Video, UploadSession
+from app.services.media_store import MediaStore
+from app.services.transcode_service import TranscodeService
+from app.services.rendition_service import RenditionService
+
+UPLOAD_ROOT = 'uploads'
+# 上传过程中的临时文件目录（与内容寻址存储在同一文件系统，完成后直接重命名）
+INCOMING_ROOT = os.path.join(UPLOAD_ROOT, 'incoming')
+
+# 流式读写的块大小
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """流式计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_stream(stream, path):
+    """把上传的文件流写入 path，同时计算 SHA-256，返回 (哈希, 字节数)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'wb') as f:
+        for block in iter(lambda: stream.read(COPY_BLOCK_SIZE), b''):
+            digest.update(block)
+            f.write(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+class MediaUploadService:
+    """媒体文件上传服务"""
+
+    @staticmethod
+    def storage_path(mission_id, filename):
+        """
+        上传过程中的文件路径 uploads/incoming/<mission_id>/<随机串>_<文件名>，返回 (安全文件名, 路径)
+        保存完成后由 create_video 移入内容寻址存储
+        """
+        filename = secure_filename(filename)
+        upload_folder = os.path.join(INCOMING_ROOT, str(mission_id))
+        os.makedirs(upload_folder, exist_ok=True)
+
+        # 添加随机前缀避免同时上传的同名文件互相覆盖
+        return filename, os.path.join(upload_folder, f"{secrets.token_hex(8)}_{filename}")
+
+    @staticmethod
+    def create_video(mission_id, file_path, filename, content_hash, media_type='video', collected_time=None,
+                     road_section='', file_format='', file_size=None, commit=True):
+        """
+        文件保存完成后存入内容寻址存储并创建视频记录
+        相同内容已存储时删除本次上传的文件直接引用已有文件；AVI 视频标记为待转码，由转码工作进程处理
+        commit=False 时只 flush，由调用方与其他修改一起提交
+        """
+        # 锁定文件记录后再读取文件路径和相同内容视频的转码状态，避免与同时完成的转码交错
+        blob = MediaStore.get(content_hash, lock=True)
+        if blob:
+            os.remove(file_path)
+            print(f"♻️ 相同内容的文件已存在，直接引用: {blob.file_path}")
+        else:
+            blob = MediaStore.put(content_hash, file_path, os.path.getsize(file_path))
+
+        transcode_status = TranscodeService.initial_status(media_type, filename, content_hash)
+        video = Video(
+            mission_id=mission_id,
+            video_path=blob.file_path,
+            collected_time=collected_time or datetime.now(),
+            road_section=road_section,
+            file_format=file_format or filename.split('.')[-1],
+            file_size=file_size or blob.size,
+            duration=0,
+            content_hash=content_hash,
+            transcode_status=transcode_status,
+            # 沿用正在进行的转码时记录心跳，避免在转码进程下次上报进度前被当作中断的转码恢复
+            transcode_heartbeat_at=datetime.utcnow() if transcode_status == 'processing' else None
+        )
+
+        db.session.add(video)
+        MediaStore.add_ref(content_hash)
+        if media_type == 'video':
+            # 登记网页播放版本（低码率代理 / HLS），由转码工作进程在后台生成
+            RenditionService.enqueue(content_hash)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+        print(f"📹 视频记录已创建: ID={video.id}")
+        return video
+
+    @staticmethod
+    def init_upload(user_id, mission_id, filename, total_size, checksum=None, media_type='video',
+                    collected_time=None, road_section='', file_format=''):
+        """初始化分片上传，创建空的 .part 文件"""
+        if total_size is None or total_size <= 0:
+            raise ValueError('文件大小无效')
+
+        max_size = current_app.config['MAX_CONTENT_LENGTH']
+        if max_size and total_size > max_size:
+            raise ValueError(f'文件大小超过限制（{max_size // (1024 * 1024)}MB）')
+
+        filename = secure_filename(filename)
+        if not filename:
+            raise ValueError('文件名无效')
+
+        # 文件按上传ID命名，同一任务同时上传多个同名文件（如多架无人机的 DJI_0001.MP4）时互不覆盖
+        upload_id = secrets.token_hex(16)
+        upload_folder = os.path.join(INCOMING_ROOT, str(mission_id))
+        os.makedirs(upload_folder, exist_ok=True)
+        file_path = os.path.join(upload_folder, f'{upload_id}{os.path.splitext(filename)[1].lower()}')
+
+        upload = UploadSession(
+            id=upload_id,
+            user_id=user_id,
+            mission_id=mission_id,
+            filename=filename,
+            media_type=media_type,
+            collected_time=collected_time,
+            road_section=road_section,
+            file_format=file_format,
+            total_size=total_size,
+            received_bytes=0,
+            checksum=checksum.lower() if checksum else None,
+            file_path=file_path,
+            status='uploading'
+        )
+        open(upload.part_path, 'wb').close()
+
+        db.session.add(upload)
+        db.session.commit()
+        return upload
+
+    @staticmethod
+    def get_upload(upload_id, user):
+        """获取上传会话（管理员或上传者本人）"""
+        upload = UploadSession.query.get(upload_id)
+        if not upload or (not user.is_admin() and upload.user_id != user.id):
+            raise ValueError('上传不存在')
+        return upload
+
+    @staticmethod
+    def write_chunk(upload, offset, stream, length):
+        """
+        把请求体流式写入 .part 文件的 offset 处，返回写入的字节数
+        offset 不能超过已接收的字节数（允许重传已接收的部分）；连接中途断开时已写入的部分同样计入进度
+        """
+        if upload.status != 'uploading':
+            raise ValueError('上传已结束')
+        if length is None:
+            raise ValueError('缺少 Content-Length')
+
+        chunk_limit = current_app.config['UPLOAD_CHUNK_SIZE']
+        if length > chunk_limit:
+            raise ValueError(f'分片大小超过限制（{chunk_limit} 字节）')
+
+        # 进程崩溃时数据库中的进度可能领先于磁盘，以文件实际大小为准
+        try:
+            disk_size = os.path.getsize(upload.part_path)
+        except FileNotFoundError:
+            raise ValueError('上传文件已丢失，请重新上传')
+        received = min(upload.received_bytes or 0, disk_size)
+
+        if offset < 0 or offset > received:
+            raise ValueError(f'分片偏移量不连续，请从 {received} 字节处继续上传')
+        if offset + length > upload.total_size:
+            raise ValueError('分片超出文件大小')
+
+        written = 0
+        try:
+            with open(upload.part_path, 'r+b') as f:
+                f.seek(offset)
+                while written < length:
+                    block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+                    if not block:
+                        break
+                    f.write(block)
+                    written += len(block)
+        finally:
+            upload.received_bytes = max(received, offset + written)
+            db.session.commit()
+
+        if written < length:
+            raise ValueError(f'分片未完整接收，请从 {upload.received_bytes} 字节处继续上传')
+        return written
+
+    @staticmethod
+    def complete_upload(upload, checksum=None):
+        """
+        所有分片上传完成后校验大小和 SHA-256，重命名为最终文件并创建视频记录
+        先用条件更新把会话标记为 completing，同一个上传只有一个请求能继续完成；
+        校验失败时恢复为 uploading 以便续传，进程中途退出遗留的 completing 由过期清理处理
+        """
+        if upload.status == 'completed':
+            return Video.query.get(upload.video_id)
+        if upload.status == 'completing':
+            raise ValueError('上传正在完成，请稍后查询上传状态')
+        if upload.status != 'uploading':
+            raise ValueError('上传已结束')
+
+        expected = (checksum or upload.checksum or '').lower()
+        if not expected:
+            raise ValueError('缺少文件校验值（SHA-256）')
+
+        claimed = UploadSession.query.filter_by(id=upload.id, status='uploading').update(
+            {'status': 'completing', 'updated_at': datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        if not claimed:
+            if upload.status == 'completed':
+                return Video.query.get(upload.video_id)
+            if upload.status == 'completing':
+                raise ValueError('上传正在完成，请稍后查询上传状态')
+            raise ValueError('上传已结束')
+
+        try:
+            if upload.received_bytes != upload.total_size or os.path.getsize(upload.part_path) != upload.total_size:
+                raise ValueError(f'文件尚未上传完整（{upload.received_bytes}/{upload.total_size} 字节）')
+
+            actual = file_sha256(upload.part_path)
+            if actual != expected:
+                raise ValueError('文件校验失败，请从 0 字节处重新上传')
+        except Exception:
+            # 未完成重命名，恢复为上传中，客户端可以继续上传或重试
+            db.session.rollback()
+            UploadSession.query.filter_by(id=upload.id, status='completing').update(
+                {'status': 'uploading'}, synchronize_session=False
+            )
+            db.session.commit()
+            raise
+
+        os.replace(upload.part_path, upload.file_path)
+        print(f"📁 分片上传完成: {upload.file_path}")
+
+        # 视频记录与上传状态在同一个事务中提交
+        video = MediaUploadService.create_video(
+            upload.mission_id, upload.file_path, upload.filename, actual,
+            media_type=upload.media_type,
+            collected_time=upload.collected_time,
+            road_section=upload.road_section,
+            file_format=upload.file_format,
+            file_size=upload.total_size,
+            commit=False
+        )
+        upload.checksum = actual
+        upload.status = 'completed'
+        upload.video_id = video.id
+        db.session.commit()
+        return video
+
+    @staticmethod
+    def abort_upload(upload):
+        """取消上传并删除临时文件"""
+        if upload.status != 'uploading':
+            raise ValueError('上传已结束')
+        upload.status = 'aborted'
+        db.session.commit()
+        try:
+            os.remove(upload.part_path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def cleanup_expired_uploads(hours):
+        """
+        清理超过 hours 小时没有进展的未完成上传（包括完成过程中进程退出遗留的 completing），返回清理的数量
+        completing 的文件可能已重命名为最终文件，两个路径都删除
+        """
+        threshold = datetime.utcnow() - timedelta(hours=hours)
+        uploads = UploadSession.query.filter(
+            UploadSession.status.in_(('uploading', 'completing')),
+            UploadSession.updated_at < threshold
+        ).all()
+
+        count = 0
+        for upload in uploads:
+            # 条件更新，避免与同时完成或续传的请求冲突
+            aborted = UploadSession.query.filter(
+                UploadSession.id == upload.id,
+                UploadSession.status == upload.status,
+                UploadSession.updated_at < threshold
+            ).update({'status': 'aborted'}, synchronize_session=False)
+            db.session.commit()
+            if not aborted:
+                continue
+
+            for path in (upload.part_path, upload.file_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            count += 1
+        return count
@@ -0,0 +1,279 @@
+"""
+AI模型注册表
+模型在首次使用时才加载，加载后立即执行一次预热推理；每个模型维护一个推理会话池，
+并发任务各自占用一个会话，互不争用。各进程的模型加载耗时与内存占用可通过管理接口查看
+"""
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+CONGESTION_MODEL = 'traffic_congestion'
+
+
+def _current_rss_bytes():
+    """当前进程常驻内存（Linux读取/proc，其他平台退化为峰值内存，无法获取时返回None）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以KB为单位
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class ModelPool:
+    """单个模型的推理会话池，会话按需创建，最多 size 个"""
+
+    def __init__(self, name, factory, size=1, check=None, description=None):
+        """
+        :param factory: 创建模型实例的函数，实例需提供 warmup() 方法（可选）
+        :param check: 判断模型是否可用的轻量检查（如模型文件是否存在）
+        """
+        self.name = name
+        self.factory = factory
+        self.size = max(1, size)
+        self.check = check
+        self.description = description or {}
+
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._calls = 0
+        self._wait_seconds = 0.0
+        self._loads = []
+        self._error = None
+
+    def _create(self):
+        """创建并预热一个会话，记录加载耗时和内存增量"""
+        rss_before = _current_rss_bytes()
+        started = time.perf_counter()
+        model = self.factory()
+        if hasattr(model, 'load'):
+            model.load()
+        loaded = time.perf_counter()
+        if hasattr(model, 'warmup'):
+            model.warmup()
+        warmed = time.perf_counter()
+
+        rss_after = _current_rss_bytes()
+        self._loads.append({
+            'load_seconds': round(loaded - started, 3),
+            'warmup_seconds': round(warmed - loaded, 3),
+            'memory_bytes': max(0, rss_after - rss_before) if rss_before is not None else None
+        })
+        print(f"🔥 模型 {self.name} 会话 #{len(self._loads)} 已加载并预热: "
+              f"{loaded - started:.2f}s + {warmed - loaded:.2f}s")
+        return model
+
+    def _take(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+
+        if create:
+            try:
+                model = self._create()
+            except Exception as e:
+                with self._lock:
+                    self._created -= 1
+                self._error = str(e)
+                raise
+            self._error = None
+            return model
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ValueError(f'模型 {self.name} 的推理会话全部繁忙，请稍后重试')
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """占用一个推理会话，使用完毕后自动归还"""
+        started = time.perf_counter()
+        model = self._take(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._calls += 1
+            self._wait_seconds += time.perf_counter() - started
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(model)
+
+    def is_available(self):
+        """模型可用（轻量检查通过且至少能成功加载一个会话）"""
+        if self.check and not self.check():
+            return False
+        if self._created > 0:
+            return True
+        try:
+            self.warm_up()
+        except Exception as e:
+            print(f"⚠️ 模型 {self.name} 加载失败: {e}")
+            return False
+        return True
+
+    def warm_up(self):
+        """提前加载并预热一个会话"""
+        with self.acquire():
+            pass
+
+    def get_stats(self):
+        loads = list(self._loads)
+        return {
+            'name': self.name,
+            **self.description,
+            'loaded': self._created > 0,
+            'pool_size': self.size,
+            'sessions': self._created,
+            'in_use': self._in_use,
+            'calls': self._calls,
+            'wait_seconds': round(self._wait_seconds, 3),
+            'load_seconds': loads[0]['load_seconds'] if loads else None,
+            'warmup_seconds': loads[0]['warmup_seconds'] if loads else None,
+            'memory_bytes': sum(item['memory_bytes'] or 0 for item in loads),
+            'sessions_detail': loads,
+            'error': self._error
+        }
+
+
+class ModelRegistry:
+    """进程内模型注册表"""
+
+    def __init__(self):
+        self._pools = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, size=1, check=None, description=None, key=None):
+        """
+        注册模型（不会立即加载）
+        key 相同的重复注册会被忽略，避免多次创建应用时丢弃已加载的会话
+        """
+        with self._lock:
+            if name in self._pools and key is not None and self._keys.get(name) == key:
+                return self._pools[name]
+            pool = ModelPool(name, factory, size, check, description)
+            self._pools[name] = pool
+            self._keys[name] = key
+            return pool
+
+    def get_pool(self, name):
+        pool = self._pools.get(name)
+        if pool is None:
+            raise ValueError(f'模型未注册: {name}')
+        return pool
+
+    def is_available(self, name):
+        """模型已注册且可以成功加载（未加载时会触发加载）"""
+        return name in self._pools and self._pools[name].is_available()
+
+    def has_model(self, name):
+        """模型已注册且通过轻量检查（不触发加载）"""
+        pool = self._pools.get(name)
+        return pool is not None and (pool.check is None or pool.check())
+
+    def acquire(self, name, timeout=None):
+        return self.get_pool(name).acquire(timeout)
+
+    def warm_up(self, names=None):
+        """预热指定模型（默认全部），返回成功预热的模型名称"""
+        warmed = []
+        for name in names or list(self._pools):
+            if self.is_available(name):
+                warmed.append(name)
+        return warmed
+
+    def get_stats(self):
+        return {
+            'pid': os.getpid(),
+            'rss_bytes': _current_rss_bytes(),
+            'models': [pool.get_stats() for pool in self._pools.values()]
+        }
+
+    def dump_stats(self, stats_dir, worker_id):
+        """把本进程的模型统计写入快照文件，供Web进程的管理接口汇总"""
+        os.makedirs(stats_dir, exist_ok=True)
+        stats = self.get_stats()
+        stats['worker_id'] = worker_id
+        stats['updated_at'] = time.time()
+        path = os.path.join(stats_dir, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def remove_stats(stats_dir):
+        """进程退出时删除快照文件"""
+        try:
+            os.remove(os.path.join(stats_dir, f'{os.getpid()}.json'))
+        except OSError:
+            pass
+
+    @staticmethod
+    def load_worker_stats(stats_dir, max_age):
+        """读取各工作进程的模型统计快照（超过 max_age 秒未刷新的视为进程已退出）"""
+        snapshots = []
+        now = time.time()
+        for path in sorted(glob.glob(os.path.join(stats_dir, '*.json'))):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    stats = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - stats.get('updated_at', 0) <= max_age:
+                snapshots.append(stats)
+        return snapshots
+
+
+model_registry = ModelRegistry()
+
+
+def register_models(app_config):
+    """按配置注册系统使用的模型"""
+    from app.services.frame_classifier import FrameBatchClassifier, resolve_model_path
+
+    model_path = resolve_model_path(app_config.get('AI_MODEL_PATH'))
+    image_size = app_config.get('AI_IMAGE_SIZE', 224)
+    intra_op_threads = app_config.get('AI_INTRA_OP_THREADS', 0)
+    inter_op_threads = app_config.get('AI_INTER_OP_THREADS', 0)
+    pool_size = app_config.get('AI_MODEL_POOL_SIZE', 1)
+
+    model_registry.register(
+        CONGESTION_MODEL,
+        lambda: FrameBatchClassifier(
+            model_path,
+            image_size=image_size,
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=inter_op_threads
+        ),
+        size=pool_size,
+        check=lambda: os.path.exists(model_path),
+        description={
+            'model_path': model_path,
+            'intra_op_threads': intra_op_threads,
+            'inter_op_threads': inter_op_threads
+        },
+        key=(model_path, image_size, intra_op_threads, inter_op_threads, pool_size)
+    )
+    return model_registry
@@ -0,0 +1,315 @@
+"""
+视频网页播放版本（低码率代理 / HLS 切片）
+视频上传后为其内容登记待生成的版本，由转码工作进程池在没有转码任务时生成（仅使用 CPU）：
+- proxy：按比例缩小到 RENDITION_HEIGHT 的低码率 MP4（H.264 + faststart，弱网环境可以直接播放）；
+  编码时按切片时长强制关键帧
+- hls：把 proxy 直接复制码流切分为 TS 切片并生成点播播放列表，不再重新编码
+生成的文件放在原文件旁边的 uploads/blobs/<2>/<2>/<hash>/ 目录下，相同内容的视频共用；
+每次生成（包括失败重试、中断恢复）使用带随机生成编号的新文件名/目录，先写入临时路径，完成后再发布，
+已发布路径下的内容不会改变（按 immutable 缓存），新版本发布后删除同类的旧版本
+有 ffmpeg 时使用 libx264 编码；没有 ffmpeg 时 proxy 用 OpenCV 生成，hls 无法生成并标记为失败
+"""
+import functools
+import os
+import secrets
+import shutil
+import subprocess
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from app.models import db, Video, MediaBlob, MediaRendition
+from app.services.media_store import BLOB_ROOT
+from app.services.transcode_service import transcode_to_mp4, PROGRESS_INTERVAL
+
+RENDITION_KINDS = ('proxy', 'hls')
+
+HLS_PLAYLIST = 'index.m3u8'
+
+
+@functools.lru_cache(maxsize=4)
+def find_ffmpeg(command):
+    """查找 ffmpeg 可执行文件（每个进程只查找一次），找不到时返回None"""
+    return shutil.which(command)
+
+
+def rendition_dir(content_hash):
+    """内容对应的播放版本目录（与原文件同一目录）"""
+    return os.path.join(BLOB_ROOT, content_hash[:2], content_hash[2:4], content_hash)
+
+
+def _run_ffmpeg(args, heartbeat):
+    """执行 ffmpeg，运行期间定期调用 heartbeat()，失败时抛出ValueError"""
+    process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    while True:
+        try:
+            _, stderr = process.communicate(timeout=PROGRESS_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            heartbeat()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+    if process.returncode != 0:
+        error = stderr.decode('utf-8', errors='replace').strip().splitlines()
+        raise ValueError(f'ffmpeg 执行失败: {error[-1] if error else process.returncode}')
+
+
+def _video_size(path):
+    """读取视频分辨率，无法读取时返回 (None, None)"""
+    try:
+        import cv2
+        cap = cv2.VideoCapture(path)
+        try:
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        finally:
+            cap.release()
+    except Exception:
+        return None, None
+    return (width, height) if width and height else (None, None)
+
+
+class RenditionService:
+    """视频播放版本生成服务（队列即 media_renditions 表中 status='pending' 的记录）"""
+
+    @staticmethod
+    def enqueue(content_hash):
+        """登记内容的各个播放版本（已登记的跳过，不提交事务）"""
+        if not current_app.config['RENDITION_ENABLED']:
+            return
+
+        existing = {kind for kind, in db.session.query(MediaRendition.kind).filter_by(content_hash=content_hash)}
+        for kind in RENDITION_KINDS:
+            if kind in existing:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(MediaRendition(content_hash=content_hash, kind=kind, status='pending'))
+            except IntegrityError:
+                # 其他进程同时上传了相同内容
+                pass
+
+    @staticmethod
+    def get_for_video(video):
+        """视频的播放版本列表"""
+        if not video.content_hash:
+            return []
+        renditions = MediaRendition.query.filter_by(content_hash=video.content_hash).all()
+        return [rendition.to_dict() for rendition in sorted(renditions, key=lambda r: RENDITION_KINDS.index(r.kind))]
+
+    @staticmethod
+    def claim_next(worker_id):
+        """
+        原子地领取最早的待生成版本，没有时返回None
+        hls 需要 proxy 已生成；原文件还在等待或正在转码为 MP4 时不领取（转码完成后会删除原文件），
+        避免同一内容被两个工作进程同时编码
+        """
+        proxy = aliased(MediaRendition)
+        proxy_ready = db.session.query(proxy.id).filter(
+            proxy.content_hash == MediaRendition.content_hash,
+            proxy.kind == 'proxy',
+            proxy.status == 'ready'
+        ).exists()
+        transcoding = db.session.query(Video.id).filter(
+            Video.content_hash == MediaRendition.content_hash,
+            Video.transcode_status.in_(('pending', 'processing'))
+        ).exists()
+        candidates = MediaRendition.query.filter(
+            MediaRendition.status == 'pending',
+            or_(MediaRendition.kind == 'proxy', proxy_ready),
+            ~transcoding
+        ).order_by(MediaRendition.id.asc()).limit(5).all()
+
+        for rendition in candidates:
+            claimed = MediaRendition.query.filter_by(id=rendition.id, status='pending').update({
+                'status': 'processing',
+                'message': None,
+                'heartbeat_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+
+            # 其他工作进程已抢先领取时继续尝试下一个
+            if claimed:
+                db.session.refresh(rendition)
+                print(f'▶️ 转码进程 {worker_id} 领取播放版本 #{rendition.id}（{rendition.kind}）')
+                return rendition
+
+        return None
+
+    @staticmethod
+    def touch(rendition_id):
+        """刷新心跳"""
+        MediaRendition.query.filter_by(id=rendition_id, status='processing').update({
+            'heartbeat_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def generate(rendition):
+        """生成播放版本，返回是否成功"""
+        rendition_id = rendition.id
+        content_hash = rendition.content_hash
+        kind = rendition.kind
+        config = current_app.config
+
+        last_report = {'time': time.monotonic()}
+
+        def heartbeat(*_):
+            now = time.monotonic()
+            if now - last_report['time'] >= PROGRESS_INTERVAL:
+                last_report['time'] = now
+                RenditionService.touch(rendition_id)
+
+        started = time.monotonic()
+        try:
+            blob = MediaBlob.query.get(content_hash)
+            if not blob or not os.path.exists(blob.file_path):
+                raise ValueError('原始文件不存在')
+
+            output_dir = rendition_dir(content_hash)
+            os.makedirs(output_dir, exist_ok=True)
+            height = config['RENDITION_HEIGHT']
+            ffmpeg = find_ffmpeg(config['FFMPEG_PATH'])
+            # 每次生成使用新的路径，客户端已缓存的旧版本播放列表和切片不会与新版本混用
+            generation = secrets.token_hex(4)
+
+            if kind == 'proxy':
+                file_path = os.path.join(output_dir, f'proxy_{height}p_{generation}.mp4')
+                RenditionService._generate_proxy(blob.file_path, file_path, ffmpeg, config, heartbeat)
+                file_size = os.path.getsize(file_path)
+                width, height = _video_size(file_path)
+            else:
+                if not ffmpeg:
+                    raise ValueError('未安装 ffmpeg，无法生成 HLS 切片')
+                # HLS 切片与代理版本的分辨率相同
+                proxy = MediaRendition.query.filter_by(content_hash=content_hash, kind='proxy').first()
+                hls_dir = os.path.join(output_dir, f'hls_{height}p_{generation}')
+                RenditionService._generate_hls(proxy.file_path, hls_dir, ffmpeg, config, heartbeat)
+                file_path = os.path.join(hls_dir, HLS_PLAYLIST)
+                file_size = sum(entry.stat().st_size for entry in os.scandir(hls_dir))
+                width, height = proxy.width, proxy.height
+
+        except Exception as e:
+            db.session.rollback()
+            print(f'⚠️ 播放版本 #{rendition_id}（{kind}）生成失败: {e}')
+            RenditionService._fail(rendition_id, str(e))
+            if kind == 'proxy':
+                # 没有代理版本时无法切片
+                MediaRendition.query.filter_by(content_hash=content_hash, kind='hls', status='pending').update({
+                    'status': 'failed',
+                    'message': '低码率版本生成失败'
+                }, synchronize_session=False)
+                db.session.commit()
+            return False
+
+        MediaRendition.query.filter_by(id=rendition_id).update({
+            'status': 'ready',
+            'file_path': file_path,
+            'file_size': file_size,
+            'width': width,
+            'height': height,
+            'message': None,
+            'heartbeat_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        RenditionService._remove_old_generations(output_dir, kind, file_path)
+
+        print(f'✅ 播放版本 #{rendition_id}（{kind}）生成完成: {file_path}（{time.monotonic() - started:.1f}秒）')
+        return True
+
+    @staticmethod
+    def _generate_proxy(src_path, dst_path, ffmpeg, config, heartbeat):
+        """生成低码率代理 MP4，先写入临时文件再替换"""
+        height = config['RENDITION_HEIGHT']
+        if not ffmpeg:
+            transcode_to_mp4(src_path, dst_path, heartbeat, max_height=height)
+            return
+
+        bitrate = config['RENDITION_VIDEO_KBPS']
+        tmp_path = f'{os.path.splitext(dst_path)[0]}.tmp.mp4'
+        try:
+            _run_ffmpeg([
+                ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+                '-i', src_path,
+                '-vf', f"scale=-2:'min({height},ih)'",
+                '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+                '-b:v', f'{bitrate}k', '-maxrate', f'{bitrate}k', '-bufsize', f'{bitrate * 2}k',
+                # 关键帧对齐切片边界，切片时可以直接复制码流
+                '-force_key_frames', f"expr:gte(t,n_forced*{config['RENDITION_HLS_SEGMENT_SECONDS']})",
+                '-c:a', 'aac', '-b:a', '64k', '-ac', '2',
+                '-movflags', '+faststart',
+                '-threads', str(config['RENDITION_FFMPEG_THREADS']),
+                tmp_path
+            ], heartbeat)
+            os.replace(tmp_path, dst_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _generate_hls(proxy_path, hls_dir, ffmpeg, config, heartbeat):
+        """把代理版本切分为 HLS 切片，先写入临时目录再替换"""
+        tmp_dir = f'{hls_dir}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        try:
+            _run_ffmpeg([
+                ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+                '-i', proxy_path,
+                '-c', 'copy',
+                '-f', 'hls',
+                '-hls_time', str(config['RENDITION_HLS_SEGMENT_SECONDS']),
+                '-hls_playlist_type', 'vod',
+                '-hls_segment_filename', os.path.join(tmp_dir, 'seg_%05d.ts'),
+                os.path.join(tmp_dir, HLS_PLAYLIST)
+            ], heartbeat)
+            shutil.rmtree(hls_dir, ignore_errors=True)
+            os.replace(tmp_dir, hls_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _remove_old_generations(output_dir, kind, published_path):
+        """删除同类播放版本之前生成的文件（上一次发布的版本、中断后遗留的临时文件）"""
+        keep = os.path.relpath(published_path, output_dir).split(os.sep)[0]
+        for entry in os.scandir(output_dir):
+            if not entry.name.startswith(f'{kind}_') or entry.name == keep:
+                continue
+            try:
+                if entry.is_dir():
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+            except OSError as e:
+                print(f'⚠️ 删除旧的播放版本失败（可忽略）: {e}')
+
+    @staticmethod
+    def _fail(rendition_id, message):
+        """标记为生成失败"""
+        MediaRendition.query.filter_by(id=rendition_id).update({
+            'status': 'failed',
+            'message': message[:500],
+            'heartbeat_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def recover_stale(stale_seconds=None):
+        """把心跳超时的生成任务（工作进程崩溃或服务重启后）重新标记为待生成，返回恢复的数量"""
+        if stale_seconds is None:
+            stale_seconds = current_app.config['TRANSCODE_STALE_SECONDS']
+
+        threshold = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        count = MediaRendition.query.filter(
+            MediaRendition.status == 'processing',
+            or_(MediaRendition.heartbeat_at < threshold, MediaRendition.heartbeat_at.is_(None))
+        ).update({'status': 'pending'}, synchronize_session=False)
+        db.session.commit()
+        return count
@@ -0,0 +1,88 @@
+"""
+分析结果批量写入
+逐帧结果先以元组形式缓存在内存中，按数量或时间攒批后用 Core insert 一次性 executemany 入库，
+避免为每一帧创建ORM对象带来的 unit-of-work 开销
+"""
+import time
+from datetime import datetime
+
+from app.models import db, AnalysisResult
+from app.models.daily_rollup import add_analysis_result_counts
+from app.services.dashboard_cache import mark_dashboard_changed
+
+
+class AnalysisResultSink:
+    """分析结果缓冲写入器"""
+
+    COLUMNS = (
+        'mission_id', 'video_id', 'target_type', 'occurred_time',
+        'confidence', 'bounding_box', 'result_image', 'created_at'
+    )
+
+    def __init__(self, flush_size=500, flush_seconds=2.0, before_flush=None, after_flush=None):
+        """
+        :param flush_size: 缓存达到多少条时写入
+        :param flush_seconds: 距上次写入超过多少秒时写入（在 add 时检查，None 表示不按时间写入）
+        :param before_flush: 写入数据库前的回调（如先落盘结果图片）
+        :param after_flush: 提交成功后的回调，参数为本次写入的条数
+        """
+        self.flush_size = max(1, flush_size)
+        self.flush_seconds = flush_seconds
+        self.before_flush = before_flush
+        self.after_flush = after_flush
+
+        self.total = 0
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, mission_id, video_id, target_type, occurred_time=None,
+            confidence=None, bounding_box=None, result_image=None):
+        """缓存一条分析结果，达到批量条件时自动写入"""
+        self._rows.append((
+            mission_id,
+            video_id,
+            target_type,
+            occurred_time or datetime.now(),
+            confidence,
+            bounding_box,
+            result_image,
+            datetime.utcnow()
+        ))
+
+        if len(self._rows) >= self.flush_size or (
+                self.flush_seconds is not None and
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """写入并提交缓存的结果，返回写入条数"""
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return 0
+
+        if self.before_flush:
+            self.before_flush()
+
+        rows = [dict(zip(self.COLUMNS, row)) for row in self._rows]
+        try:
+            db.session.execute(AnalysisResult.__table__.insert(), rows)
+            # Core批量写入不触发ORM事件，在同一事务中更新看板每日汇总
+            add_analysis_result_counts(db.session.connection(), (
+                (row['occurred_time'], row['mission_id'], row['target_type'], 1) for row in rows
+            ))
+            mark_dashboard_changed(db.session)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        count = len(rows)
+        self.total += count
+        self._rows.clear()
+
+        if self.after_flush:
+            self.after_flush(count)
+        return count
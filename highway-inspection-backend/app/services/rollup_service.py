@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import db, Mission, AnalysisResult, AlertEvent, DailyRollup
+from app.models.daily_rollup import METRIC_FLIGHT, METRIC_ANALYSIS_RESULT, METRIC_ALERT, as_date, lock_rollups
+from app.services.dashboard_cache import mark_dashboard_changed
+
+
+class RollupService:
+    """看板每日汇总服务"""
+
+    @staticmethod
+    def get_daily_totals(metric, start_date=None, end_date=None, user=None):
+        """
+        读取每日汇总 {date: (数量, 秒数)}，按日期排序
+        只扫描汇总表中范围内的日期，与原始数据量无关
+        """
+        query = db.session.query(
+            DailyRollup.day,
+            func.sum(DailyRollup.count),
+            func.sum(DailyRollup.total_seconds)
+        ).filter(DailyRollup.metric == metric)
+
+        # 如果用户不是管理员，只统计该用户的数据
+        if user and not user.is_admin():
+            query = query.filter(DailyRollup.operator_id == user.id)
+
+        if start_date:
+            query = query.filter(DailyRollup.day >= start_date)
+        if end_date:
+            query = query.filter(DailyRollup.day <= end_date)
+
+        rows = query.group_by(DailyRollup.day).order_by(DailyRollup.day).all()
+        return {
+            as_date(day): (int(count or 0), float(seconds or 0))
+            for day, count, seconds in rows if count
+        }
+
+    @staticmethod
+    def _aggregate_facts(start_date=None, end_date=None):
+        """从原始数据重新计算汇总行（时间条件直接比较原始时间列，可以使用索引）"""
+        start_time = datetime.combine(start_date, datetime.min.time()) if start_date else None
+        end_time = datetime.combine(end_date + timedelta(days=1), datetime.min.time()) if end_date else None
+
+        def time_range(column):
+            filters = []
+            if start_time:
+                filters.append(column >= start_time)
+            if end_time:
+                filters.append(column < end_time)
+            return filters
+
+        from app.services.dashboard_service import duration_seconds
+
+        flight_day = func.date(Mission.start_time)
+        flights = db.session.query(
+            flight_day, Mission.operator_id, func.count(Mission.id),
+            func.sum(duration_seconds(Mission.start_time, Mission.end_time))
+        ).filter(
+            Mission.status == 'completed', Mission.start_time.isnot(None), *time_range(Mission.start_time)
+        ).group_by(flight_day, Mission.operator_id)
+
+        result_day = func.date(AnalysisResult.occurred_time)
+        results = db.session.query(
+            result_day, Mission.operator_id, AnalysisResult.target_type, func.count(AnalysisResult.id)
+        ).join(Mission, Mission.id == AnalysisResult.mission_id).filter(
+            *time_range(AnalysisResult.occurred_time)
+        ).group_by(result_day, Mission.operator_id, AnalysisResult.target_type)
+
+        alert_day = func.date(AlertEvent.occurred_time)
+        alerts = db.session.query(
+            alert_day, Mission.operator_id, AlertEvent.event_type, func.count(AlertEvent.id)
+        ).join(Mission, Mission.id == AlertEvent.mission_id).filter(
+            *time_range(AlertEvent.occurred_time)
+        ).group_by(alert_day, Mission.operator_id, AlertEvent.event_type)
+
+        now = datetime.utcnow()
+        rows = []
+        for day, operator_id, count, seconds in flights:
+            rows.append((METRIC_FLIGHT, day, operator_id, '', count, float(seconds or 0)))
+        for metric, query in ((METRIC_ANALYSIS_RESULT, results), (METRIC_ALERT, alerts)):
+            for day, operator_id, category, count in query:
+                rows.append((metric, day, operator_id, category, count, 0.0))
+
+        return [{
+            'metric': metric,
+            'day': as_date(day),
+            'operator_id': operator_id,
+            'category': category,
+            'count': count,
+            'total_seconds': seconds,
+            'updated_at': now
+        } for metric, day, operator_id, category, count, seconds in rows]
+
+    @staticmethod
+    def reconcile(days=None):
+        """
+        对账：用原始数据重新计算最近 days 天（含今天）的汇总，days 为None时重建全部汇总
+        修正增量更新遗漏（如直接修改数据库、任务完成后修改时间）的偏差，返回写入的汇总行数
+        先取得汇总排他锁再读取原始数据：进行中的增量提交后才开始统计，统计到写入期间的增量等待对账完成，
+        多个进程同时对账也会依次执行
+        """
+        start_date = end_date = None
+        if days is not None:
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=days - 1)
+
+        try:
+            lock_rollups(db.session.connection(), exclusive=True)
+            rows = RollupService._aggregate_facts(start_date, end_date)
+
+            delete = DailyRollup.query
+            if start_date:
+                delete = delete.filter(DailyRollup.day >= start_date, DailyRollup.day <= end_date)
+            delete.delete(synchronize_session=False)
+
+            if rows:
+                db.session.execute(DailyRollup.__table__.insert(), rows)
+            mark_dashboard_changed(db.session)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return len(rows)
@@ -0,0 +1,272 @@
+"""
+AVI 转 MP4 后台转码
+上传时只把视频记录标记为待转码（transcode_status='pending'）并立即返回，由转码工作进程池轮询领取：
+- 相同内容的视频共用一个文件，按 content_hash 一起领取、一起更新，同一文件只转码一次
+- 可用的编码器在每个进程中只探测一次并缓存
+- 转码先写入临时文件，完成后原子替换，再更新文件记录和所有相同内容视频的 video_path
+"""
+import functools
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_
+
+from app.models import db, Video, MediaBlob
+from app.services.media_store import MediaStore
+
+# 尝试多种编码器，按优先级顺序（不同系统支持的编码器可能不同）
+CODEC_CANDIDATES = (
+    ('avc1', 'H.264/AVC'),   # 最佳浏览器兼容性
+    ('mp4v', 'MPEG-4'),      # 通用MPEG-4
+    ('XVID', 'Xvid'),        # Xvid编码
+    ('MJPG', 'Motion JPEG')  # Motion JPEG（备用）
+)
+
+# 转码进度写入间隔（秒），同时作为心跳
+PROGRESS_INTERVAL = 2.0
+
+
+@functools.lru_cache(maxsize=1)
+def probe_codec():
+    """探测本进程可用的 MP4 编码器（只探测一次），返回 (fourcc, 名称)，都不可用时返回None"""
+    import cv2
+
+    fd, probe_path = tempfile.mkstemp(suffix='.mp4')
+    os.close(fd)
+    try:
+        for fourcc_str, codec_name in CODEC_CANDIDATES:
+            writer = cv2.VideoWriter(probe_path, cv2.VideoWriter_fourcc(*fourcc_str), 25, (64, 64))
+            opened = writer.isOpened()
+            writer.release()
+            if opened:
+                print(f"✅ 转码使用编码器: {codec_name} ({fourcc_str})")
+                return fourcc_str, codec_name
+        return None
+    finally:
+        try:
+            os.remove(probe_path)
+        except OSError:
+            pass
+
+
+def transcode_to_mp4(src_path, dst_path, progress_callback=None, max_height=None):
+    """
+    使用 OpenCV 把视频转码为 MP4（不需要 ffmpeg 命令），先写入临时文件，完成后替换为 dst_path
+    max_height 不为空且原视频更高时按比例缩小（宽度取偶数）
+    progress_callback(processed_frames, total_frames) 在处理过程中被调用，返回写入的帧数
+    """
+    import cv2
+
+    codec = probe_codec()
+    if codec is None:
+        raise ValueError('无法创建输出视频文件，所有编码器都不可用')
+
+    cap = cv2.VideoCapture(src_path)
+    if not cap.isOpened():
+        raise ValueError(f'无法打开视频文件: {src_path}')
+
+    tmp_path = f'{os.path.splitext(dst_path)[0]}.transcoding.mp4'
+    out = None
+    try:
+        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 25  # 默认25fps
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        size = (width, height)
+        if max_height and height > max_height:
+            size = (max(2, round(width * max_height / height / 2) * 2), max_height)
+
+        out = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*codec[0]), fps, size)
+        if not out.isOpened():
+            raise ValueError(f'无法创建输出视频文件（{codec[1]}）')
+
+        frame_count = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if size != (width, height):
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            out.write(frame)
+            frame_count += 1
+            if progress_callback:
+                progress_callback(frame_count, total_frames)
+    except Exception:
+        if out is not None:
+            out.release()
+            out = None
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    finally:
+        cap.release()
+        if out is not None:
+            out.release()
+
+    if frame_count == 0:
+        os.remove(tmp_path)
+        raise ValueError('视频没有可读取的帧')
+
+    os.replace(tmp_path, dst_path)
+    return frame_count
+
+
+class TranscodeService:
+    """视频后台转码服务（队列即 videos 表中 transcode_status='pending' 的记录）"""
+
+    @staticmethod
+    def needs_transcode(media_type, filename):
+        """判断上传的文件是否需要转码为 MP4"""
+        return media_type == 'video' and os.path.splitext(filename)[1].lower() == '.avi'
+
+    @staticmethod
+    def initial_status(media_type, filename, content_hash):
+        """
+        新视频记录的转码状态：相同内容已上传过时沿用已有视频的状态，已有视频转码失败时连同它们重新排队
+        调用方需先锁定文件记录（MediaStore.get(lock=True)），转码进程完成或失败时也先锁定，状态不会在提交前过期
+        """
+        if not TranscodeService.needs_transcode(media_type, filename):
+            return None
+
+        # 共享锁读取最新提交的状态（不使用事务开始时的快照）
+        sibling_status = db.session.query(Video.transcode_status).filter(
+            Video.content_hash == content_hash
+        ).order_by(Video.id.desc()).limit(1).with_for_update(read=True).scalar()
+        if sibling_status == 'failed':
+            Video.query.filter(
+                Video.content_hash == content_hash, Video.transcode_status == 'failed'
+            ).update({'transcode_status': 'pending', 'transcode_progress': 0.0}, synchronize_session=False)
+            return 'pending'
+        if sibling_status:
+            return sibling_status
+
+        blob = MediaBlob.query.get(content_hash)
+        if blob and os.path.splitext(blob.file_path)[1].lower() == '.mp4':
+            return 'ready'
+        return 'pending'
+
+    @staticmethod
+    def _same_file(video):
+        """与该视频共用文件的所有视频记录"""
+        if video.content_hash:
+            return Video.query.filter(Video.content_hash == video.content_hash)
+        return Video.query.filter(Video.id == video.id)
+
+    @staticmethod
+    def _lock_blob(video):
+        """
+        更新转码结果前锁定文件记录：同时上传的相同内容视频（create_video 同样先锁定）
+        要么在本次更新前提交并被一起更新，要么等待提交后读取到新的路径和状态
+        """
+        if video.content_hash:
+            MediaBlob.query.filter_by(content_hash=video.content_hash).with_for_update().first()
+
+    @staticmethod
+    def claim_next(worker_id):
+        """原子地领取最早的待转码视频（连同相同内容的视频），没有时返回None"""
+        candidates = Video.query.filter_by(transcode_status='pending').order_by(Video.id.asc()).limit(5).all()
+
+        for video in candidates:
+            now = datetime.utcnow()
+            claimed = TranscodeService._same_file(video).filter(Video.transcode_status == 'pending').update({
+                'transcode_status': 'processing',
+                'transcode_progress': 0.0,
+                'transcode_heartbeat_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            # 其他工作进程已抢先领取时继续尝试下一个
+            if claimed:
+                db.session.refresh(video)
+                print(f'▶️ 转码进程 {worker_id} 领取视频 #{video.id}')
+                return video
+
+        return None
+
+    @staticmethod
+    def update_progress(video, processed_frames, total_frames):
+        """更新转码进度并刷新心跳"""
+        values = {'transcode_heartbeat_at': datetime.utcnow()}
+        if total_frames:
+            # 完成前进度最多到99.9%
+            values['transcode_progress'] = min(processed_frames / total_frames * 100, 99.9)
+
+        TranscodeService._same_file(video).filter(Video.transcode_status == 'processing').update(
+            values, synchronize_session=False
+        )
+        db.session.commit()
+
+    @staticmethod
+    def transcode(video):
+        """执行转码并更新文件记录和所有相同内容视频的路径，失败时保留原文件并标记为 failed"""
+        src_path = video.video_path
+        if video.content_hash:
+            dst_path = MediaStore.blob_path(video.content_hash, '.mp4')
+        else:
+            dst_path = f'{os.path.splitext(src_path)[0]}.mp4'
+
+        last_report = {'time': time.monotonic()}
+
+        def progress_callback(processed_frames, total_frames):
+            now = time.monotonic()
+            if now - last_report['time'] >= PROGRESS_INTERVAL:
+                last_report['time'] = now
+                TranscodeService.update_progress(video, processed_frames, total_frames)
+
+        started = time.monotonic()
+        try:
+            frame_count = transcode_to_mp4(src_path, dst_path, progress_callback)
+        except Exception as e:
+            db.session.rollback()
+            print(f'⚠️ 视频 #{video.id} 转码失败，继续使用原始文件: {e}')
+            TranscodeService._lock_blob(video)
+            TranscodeService._same_file(video).filter(Video.transcode_status == 'processing').update({
+                'transcode_status': 'failed',
+                'transcode_heartbeat_at': datetime.utcnow()
+            }, synchronize_session=False)
+            db.session.commit()
+            return False
+
+        TranscodeService._lock_blob(video)
+        TranscodeService._same_file(video).update({
+            'video_path': dst_path,
+            'file_format': 'mp4',
+            'transcode_status': 'ready',
+            'transcode_progress': 100.0,
+            'transcode_heartbeat_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if video.content_hash:
+            MediaBlob.query.filter_by(content_hash=video.content_hash).update(
+                {'file_path': dst_path}, synchronize_session=False
+            )
+        db.session.commit()
+
+        # 删除原始 avi 文件（正在读取的进程不受影响）
+        if os.path.abspath(src_path) != os.path.abspath(dst_path):
+            try:
+                os.remove(src_path)
+            except OSError as e:
+                print(f'⚠️ 删除原始文件失败（可忽略）: {e}')
+
+        print(f'✅ 视频 #{video.id} 转码完成: {dst_path}（{frame_count}帧，{time.monotonic() - started:.1f}秒）')
+        return True
+
+    @staticmethod
+    def recover_stale(stale_seconds=None):
+        """把心跳超时的转码（工作进程崩溃或服务重启后）重新标记为待转码，返回恢复的视频数"""
+        if stale_seconds is None:
+            stale_seconds = current_app.config['TRANSCODE_STALE_SECONDS']
+
+        threshold = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        count = Video.query.filter(
+            Video.transcode_status == 'processing',
+            or_(Video.transcode_heartbeat_at < threshold, Video.transcode_heartbeat_at.is_(None))
+        ).update({'transcode_status': 'pending', 'transcode_progress': 0.0}, synchronize_session=False)
+        db.session.commit()
+        return count
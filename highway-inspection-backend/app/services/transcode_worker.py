@@ -0,0 +1,76 @@
+"""
+视频转码工作进程池
+与AI分析工作进程相同，队列持久化在数据库中：工作进程轮询 videos 表中待转码的记录并原子地领取，
+没有待转码的视频时生成网页播放版本（media_renditions 表）
+"""
+import os
+import socket
+import threading
+
+from app.services.analysis_worker import WorkerPool
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_transcode_pool(app, size=None):
+    """启动进程内唯一的转码工作进程池（重复调用无副作用）"""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            from app.services.transcode_service import TranscodeService
+            from app.services.rendition_service import RenditionService
+
+            # 恢复上次服务停止时未完成的转码和播放版本
+            with app.app_context():
+                recovered = TranscodeService.recover_stale() + RenditionService.recover_stale()
+                if recovered > 0:
+                    print(f'♻️ 已恢复 {recovered} 个中断的视频转码')
+
+            pool = WorkerPool(
+                app.config['CONFIG_NAME'],
+                size or app.config['TRANSCODE_WORKERS'],
+                target=run_transcode_worker,
+                name='transcode-worker'
+            )
+            pool.start()
+            print(f'🎞️ 视频转码工作进程池已启动: {pool.size} 个进程')
+            _pool = pool
+
+    return _pool
+
+
+def run_transcode_worker(config_name, stop_event):
+    """工作进程入口：循环领取并执行转码，转码优先于生成播放版本"""
+    from app import create_app
+    from app.models import db
+    from app.services.transcode_service import TranscodeService
+    from app.services.rendition_service import RenditionService
+
+    app = create_app(config_name)
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    poll_interval = app.config['TRANSCODE_POLL_INTERVAL']
+
+    print(f'🎞️ 转码工作进程已启动: {worker_id}')
+
+    while not stop_event.is_set():
+        task = None
+        with app.app_context():
+            try:
+                task = TranscodeService.claim_next(worker_id)
+                if task is not None:
+                    TranscodeService.transcode(task)
+                else:
+                    task = RenditionService.claim_next(worker_id)
+                    if task is not None:
+                        RenditionService.generate(task)
+            except Exception as e:
+                db.session.rollback()
+                print(f'⚠️ 视频转码失败: {e}')
+                task = None
+
+        if task is None:
+            stop_event.wait(poll_interval)
@@ -0,0 +1,271 @@
+"""
+视频/图片AI分析服务
+由分析任务工作进程调用，执行模型推理并将结果写入 analysis_results 表
+"""
+import os
+from datetime import datetime
+from flask import current_app
+
+from app.models import db, AnalysisResult
+from app.services.model_registry import model_registry, CONGESTION_MODEL
+from app.services.video_pipeline import VideoAnalysisPipeline
+from app.services.frame_sampler import create_frame_sampler
+from app.services.result_sink import AnalysisResultSink
+
+
+class AnalysisCancelled(Exception):
+    """分析任务在执行过程中被取消"""
+
+
+def get_ai_service():
+    """按需加载AI服务（会导入cv2、模型等重量级依赖），AI功能未启用时抛出ValueError"""
+    if not current_app.config.get('AI_ENABLED', True):
+        raise ValueError('AI功能未启用')
+    from app.services.ai_service import ai_service
+    return ai_service
+
+
+class VideoAnalysisService:
+    """AI分析服务"""
+
+    IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+    VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv')
+
+    # 固定抽帧模式下每隔多少帧检测一次
+    VIDEO_FRAME_INTERVAL = 5
+
+    @staticmethod
+    def get_media_type(file_path):
+        """根据扩展名判断媒体类型，返回 image / video / None"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext in VideoAnalysisService.IMAGE_EXTENSIONS:
+            return 'image'
+        if file_ext in VideoAnalysisService.VIDEO_EXTENSIONS:
+            return 'video'
+        return None
+
+    @staticmethod
+    def is_detection_available(detection_type, media_type):
+        """判断指定检测类型在该媒体类型上是否可用"""
+        if not current_app.config.get('AI_ENABLED', True):
+            return False
+
+        if media_type == 'image':
+            if detection_type == 'traffic_congestion':
+                return get_ai_service().is_traffic_congestion_available()
+            if detection_type == 'road_damage':
+                return get_ai_service().is_road_damage_available()
+        elif media_type == 'video' and detection_type == 'traffic_congestion':
+            # 批量推理模型文件存在时无需在Web进程中加载AI服务
+            return model_registry.has_model(CONGESTION_MODEL) or \
+                get_ai_service().is_traffic_congestion_available()
+        return False
+
+    @staticmethod
+    def analyze(video, detection_type, progress_callback=None):
+        """
+        对视频记录对应的文件执行AI分析
+        progress_callback(processed_frames, total_frames) 在处理过程中被调用，
+        可抛出 AnalysisCancelled 以中止分析
+        返回 {'result_count': int, 'message': str}，视频流水线额外返回各阶段统计 'stats'
+        """
+        file_path = video.video_path
+        if not file_path or not os.path.exists(file_path):
+            raise ValueError('视频文件不存在')
+
+        media_type = VideoAnalysisService.get_media_type(file_path)
+        if media_type is None:
+            raise ValueError('不支持的文件格式')
+
+        if not VideoAnalysisService.is_detection_available(detection_type, media_type):
+            if media_type == 'image':
+                raise ValueError(f'检测类型 {detection_type} 的AI模块不可用')
+            raise ValueError(f'视频检测类型 {detection_type} 暂不支持或AI模块不可用')
+
+        print(f"🔍 开始AI分析: video_id={video.id}, detection_type={detection_type}, file_type={media_type}")
+
+        if media_type == 'image':
+            if detection_type == 'traffic_congestion':
+                return VideoAnalysisService._analyze_image_congestion(video, file_path)
+            return VideoAnalysisService._analyze_image_damage(video, file_path)
+
+        return VideoAnalysisService._analyze_video_congestion(video, file_path, progress_callback)
+
+    @staticmethod
+    def _analyze_image_congestion(video, file_path):
+        """交通拥堵检测（图片）"""
+        print(f"🔍 开始交通拥堵检测（图片）: {file_path}")
+        result = get_ai_service().predict_traffic_congestion(file_path)
+        if not result:
+            raise ValueError('图片分析未返回结果')
+
+        print(f"📊 交通检测结果: class_name={result['class_name']}, confidence={result['confidence']:.4f}")
+
+        analysis_result = AnalysisResult(
+            mission_id=video.mission_id,
+            video_id=video.id,
+            target_type=result['class_name'],
+            occurred_time=datetime.now(),
+            confidence=result['confidence'],
+            result_image=file_path
+        )
+        db.session.add(analysis_result)
+        db.session.commit()
+        print(f"✅ 交通拥堵检测完成: ID={analysis_result.id}")
+
+        return {'result_count': 1, 'message': '图片分析完成'}
+
+    @staticmethod
+    def _analyze_image_damage(video, file_path):
+        """地面破损检测（图片）"""
+        print(f"🔍 开始地面破损检测（图片）: {file_path}")
+        result = get_ai_service().predict_road_damage(file_path, save_result=True)
+        if not result:
+            raise ValueError('图片分析未返回结果')
+
+        detections = result['detections']
+        result_image = result['result_image']
+
+        print(f"📊 地面破损检测结果: 检测到 {len(detections)} 个目标")
+
+        # 为每个检测目标创建分析结果记录
+        for det in detections:
+            db.session.add(AnalysisResult(
+                mission_id=video.mission_id,
+                video_id=video.id,
+                target_type=det['class_name'],
+                occurred_time=datetime.now(),
+                confidence=det['confidence'],
+                bounding_box=det['bbox'],
+                result_image=result_image
+            ))
+
+        # 如果没有检测到目标，也创建一条记录表示已分析
+        if not detections:
+            db.session.add(AnalysisResult(
+                mission_id=video.mission_id,
+                video_id=video.id,
+                target_type='无破损',
+                occurred_time=datetime.now(),
+                confidence=1.0,
+                result_image=result_image
+            ))
+
+        db.session.commit()
+        print(f"✅ 地面破损检测完成，结果图片: {result_image}")
+
+        return {
+            'result_count': max(len(detections), 1),
+            'message': f'图片分析完成，检测到 {len(detections)} 个目标'
+        }
+
+    @staticmethod
+    def _analyze_video_congestion(video, file_path, progress_callback=None):
+        """交通拥堵检测（视频）"""
+        print(f"🔍 开始交通拥堵视频检测: {file_path}")
+
+        # 解码/批量推理/写入流水线，执行期间独占一个推理会话
+        if model_registry.is_available(CONGESTION_MODEL):
+            with model_registry.acquire(CONGESTION_MODEL) as classifier:
+                return VideoAnalysisService._analyze_video_congestion_pipeline(
+                    video, file_path, classifier, progress_callback
+                )
+        print("⚠️ 批量推理模型不可用，改用AI服务逐帧检测")
+
+        frame_interval = VideoAnalysisService.VIDEO_FRAME_INTERVAL
+        total_frames = VideoAnalysisService._count_frames(file_path)
+        sink = AnalysisResultSink(
+            flush_size=current_app.config.get('AI_WRITE_BATCH_SIZE', 200),
+            flush_seconds=current_app.config.get('AI_WRITE_FLUSH_SECONDS', 2.0)
+        )
+
+        # 定义回调函数，每处理一帧时缓存结果，攒批后批量入库
+        def process_frame_callback(frame_idx, timestamp_ms, result, frame_image_path=None):
+            """处理每一帧的回调函数"""
+            print(f"📊 处理帧 #{frame_idx}: {result['class_name']} ({result['confidence']:.2f})")
+            sink.add(
+                video.mission_id,
+                video.id,
+                result['class_name'],
+                confidence=result['confidence'],
+                result_image=frame_image_path
+            )
+
+            if progress_callback:
+                progress_callback(frame_idx + 1, total_frames)
+
+        # 执行视频检测（每5帧处理一次）
+        try:
+            results = get_ai_service().predict_traffic_congestion_video(
+                file_path,
+                frame_interval=frame_interval,
+                callback=process_frame_callback,
+                save_result=False,
+                save_frames=True,
+                frames_output_dir=None
+            )
+        except AnalysisCancelled:
+            # 保留取消前已完成的分析结果
+            sink.flush()
+            raise
+
+        # 写入剩余的结果
+        sink.flush()
+
+        if not results:
+            raise ValueError('视频分析未返回结果')
+
+        print(f"✅ 交通拥堵视频检测完成，共处理 {len(results)} 帧")
+        return {
+            'result_count': len(results),
+            'message': f'视频分析完成，共处理 {len(results)} 帧'
+        }
+
+    @staticmethod
+    def _analyze_video_congestion_pipeline(video, file_path, classifier, progress_callback=None):
+        """交通拥堵检测（视频，解码/推理/写入三阶段流水线）"""
+        config = current_app.config
+        pipeline = VideoAnalysisPipeline(
+            current_app._get_current_object(),
+            video,
+            file_path,
+            classifier,
+            sampler=create_frame_sampler(config, VideoAnalysisService.VIDEO_FRAME_INTERVAL),
+            batch_size=config.get('AI_VIDEO_BATCH_SIZE', 1),
+            frames_dir=os.path.join('uploads', 'detected_frames', str(video.id)),
+            queue_size=config.get('AI_PIPELINE_QUEUE_SIZE', 32),
+            write_batch_size=config.get('AI_WRITE_BATCH_SIZE', 200),
+            flush_seconds=config.get('AI_WRITE_FLUSH_SECONDS', 2.0),
+            progress_callback=progress_callback
+        )
+        print(f"📹 视频分析流水线: batch_size={pipeline.batch_size}, 抽帧策略={pipeline.sampler.mode}")
+
+        count = pipeline.run()
+        stats = pipeline.get_stats()
+        print(f"📈 流水线统计: {stats}")
+
+        if count == 0:
+            raise ValueError('视频分析未返回结果')
+
+        skipped = stats['sampler']['skipped']
+        print(f"✅ 交通拥堵视频检测完成，共处理 {count} 帧，跳过 {skipped} 帧")
+        return {
+            'result_count': count,
+            'message': f'视频分析完成，共处理 {count} 帧，跳过 {skipped} 帧',
+            'stats': stats
+        }
+
+    @staticmethod
+    def _count_frames(file_path):
+        """获取视频总帧数（用于计算进度），无法获取时返回None"""
+        try:
+            import cv2
+            cap = cv2.VideoCapture(file_path)
+            try:
+                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            finally:
+                cap.release()
+        except Exception:
+            return None
+
+        return frame_count if frame_count > 0 else None
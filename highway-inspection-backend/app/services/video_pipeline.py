@@ -0,0 +1,263 @@
+"""
+视频分析流水线
+解码线程 -> 推理阶段 -> 写入线程，阶段之间使用有界队列衔接：
+磁盘或数据库写入变慢时只会阻塞写入队列，不会拖慢模型推理
+"""
+import os
+import queue
+import threading
+import time
+
+_END = object()
+
+
+class StageCounter:
+    """流水线阶段吞吐计数器"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items, seconds):
+        with self._lock:
+            self.items += items
+            self.calls += 1
+            self.busy_seconds += seconds
+
+    def to_dict(self, wall_seconds):
+        return {
+            'items': self.items,
+            'calls': self.calls,
+            'busy_seconds': round(self.busy_seconds, 3),
+            # 阶段自身处理速度（不含等待）
+            'items_per_second': round(self.items / self.busy_seconds, 2) if self.busy_seconds > 0 else None,
+            # 整体有效速度
+            'wall_items_per_second': round(self.items / wall_seconds, 2) if wall_seconds > 0 else None
+        }
+
+
+class VideoAnalysisPipeline:
+    """交通拥堵视频分析流水线"""
+
+    def __init__(self, app, video, file_path, classifier, sampler, batch_size,
+                 frames_dir, queue_size=32, write_batch_size=200, flush_seconds=2.0,
+                 progress_callback=None):
+        self.app = app
+        self.mission_id = video.mission_id
+        self.video_id = video.id
+        self.file_path = file_path
+        self.classifier = classifier
+        self.sampler = sampler
+        self.batch_size = max(1, batch_size)
+        self.frames_dir = frames_dir
+        self.write_batch_size = write_batch_size
+        self.flush_seconds = flush_seconds
+        self.progress_callback = progress_callback
+
+        self.total_frames = None
+        self.persisted = 0
+        self.last_frame_idx = -1
+        self.counters = {
+            'decode': StageCounter('decode'),
+            'infer': StageCounter('infer'),
+            'write': StageCounter('write')
+        }
+
+        self._decode_queue = queue.Queue(maxsize=queue_size)
+        self._write_queue = queue.Queue(maxsize=max(2, queue_size // self.batch_size))
+        self._stop = threading.Event()
+        self._errors = []
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, target_queue, item):
+        """有界队列写入，流水线中止时放弃"""
+        while not self._stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source_queue):
+        """有界队列读取，流水线中止时返回结束标记"""
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _decode(self, cap):
+        """解码线程：按抽帧策略解码，只把需要检测的帧送入推理队列"""
+        try:
+            counter = self.counters['decode']
+            frame_idx = 0
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                if self.sampler.needs_frame(frame_idx):
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    self.sampler.frame_read(frame_idx)
+                    analyze = self.sampler.should_analyze(frame_idx, frame)
+                    counter.record(1, time.perf_counter() - started)
+                    if analyze and not self._put(self._decode_queue, (frame_idx, frame)):
+                        break
+                elif cap.grab():
+                    # 非采样帧只grab不解码
+                    self.sampler.frame_read(frame_idx)
+                else:
+                    break
+                frame_idx += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            cap.release()
+            self._put(self._decode_queue, _END)
+
+    def _infer(self):
+        """推理阶段（在调用线程中运行）：凑满一批后一次推理"""
+        counter = self.counters['infer']
+        batch = []
+
+        def run_batch():
+            started = time.perf_counter()
+            results = self.classifier.predict_batch([frame for _, frame in batch])
+            counter.record(len(batch), time.perf_counter() - started)
+            return self._put(self._write_queue, (list(batch), results))
+
+        try:
+            while True:
+                item = self._get(self._decode_queue)
+                if item is _END:
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    if not run_batch():
+                        return
+                    batch.clear()
+
+            if batch and not self._stop.is_set():
+                run_batch()
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(self._write_queue, _END)
+
+    def _write(self):
+        """写入线程：帧图片和分析结果攒批后统一写盘、入库"""
+        import cv2
+        from app.services.result_sink import AnalysisResultSink
+
+        counter = self.counters['write']
+        pending_files = []
+        # 本批已落盘但结果尚未提交的图片，入库失败时删除
+        written_files = []
+        pending_last_idx = {'value': -1}
+        flush_started = {'value': 0.0}
+
+        def write_files():
+            flush_started['value'] = time.perf_counter()
+            for path, data in pending_files:
+                written_files.append(path)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            pending_files.clear()
+
+        def on_flushed(count):
+            written_files.clear()
+            self.persisted += count
+            self.last_frame_idx = pending_last_idx['value']
+            counter.record(count, time.perf_counter() - flush_started['value'])
+            print(f"💾 已提交 {self.persisted} 帧的分析结果到数据库")
+
+            # 进度按已处理到的视频帧位置计算
+            if self.progress_callback:
+                self.progress_callback(self.last_frame_idx + 1, self.total_frames)
+
+        with self.app.app_context():
+            sink = AnalysisResultSink(
+                flush_size=self.write_batch_size,
+                flush_seconds=self.flush_seconds,
+                before_flush=write_files,
+                after_flush=on_flushed
+            )
+            try:
+                while True:
+                    item = self._get(self._write_queue)
+                    if item is _END:
+                        break
+
+                    batch, results = item
+                    for (frame_idx, frame), result in zip(batch, results):
+                        pending_last_idx['value'] = frame_idx
+                        frame_image_path = os.path.join(self.frames_dir, f'frame_{frame_idx:06d}.jpg')
+                        # 到达即编码为JPEG，避免攒批时占用大量原始帧内存
+                        ok, encoded = cv2.imencode('.jpg', frame)
+                        if ok:
+                            pending_files.append((frame_image_path, encoded.tobytes()))
+                        sink.add(
+                            self.mission_id,
+                            self.video_id,
+                            result['class_name'],
+                            confidence=result['confidence'],
+                            result_image=frame_image_path if ok else None
+                        )
+
+                if not self._stop.is_set():
+                    sink.flush()
+            except Exception as e:
+                for path in written_files:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._fail(e)
+
+    def run(self):
+        """执行流水线，返回已写入的结果数量"""
+        import cv2
+
+        os.makedirs(self.frames_dir, exist_ok=True)
+        cap = cv2.VideoCapture(self.file_path)
+        if not cap.isOpened():
+            raise ValueError(f'无法打开视频文件: {self.file_path}')
+
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count > 0:
+            self.total_frames = frame_count
+
+        started = time.perf_counter()
+        decoder = threading.Thread(target=self._decode, args=(cap,), name='video-decoder', daemon=True)
+        writer = threading.Thread(target=self._write, name='result-writer', daemon=True)
+        decoder.start()
+        writer.start()
+
+        self._infer()
+
+        writer.join()
+        self._stop.set()
+        decoder.join()
+        self.wall_seconds = time.perf_counter() - started
+
+        if self._errors:
+            raise self._errors[0]
+
+        return self.persisted
+
+    def get_stats(self):
+        """各阶段吞吐统计"""
+        wall_seconds = getattr(self, 'wall_seconds', 0.0)
+        return {
+            'wall_seconds': round(wall_seconds, 3),
+            'batch_size': self.batch_size,
+            'sampler': self.sampler.get_stats(),
+            'stages': {name: counter.to_dict(wall_seconds) for name, counter in self.counters.items()}
+        }
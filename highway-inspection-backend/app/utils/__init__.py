@@ -1,11 +1,22 @@
-from app.utils.response import success_response, error_response, paginate_response
-from app.utils.decorators import login_required, admin_required
+from app.utils.response import success_response, error_response, paginate_response, cursor_response
+from app.utils.pagination import is_cursor_request, cursor_args, keyset_paginate
+from app.utils.decorators import login_required, admin_required, get_current_user
+from app.utils.current_user import invalidate_user
+from app.utils.query_counter import count_queries, assert_max_queries
 
 __all__ = [
     'success_response',
     'error_response',
     'paginate_response',
+    'cursor_response',
+    'is_cursor_request',
+    'cursor_args',
+    'keyset_paginate',
     'login_required',
-    'admin_required'
+    'admin_required',
+    'get_current_user',
+    'invalidate_user',
+    'count_queries',
+    'assert_max_queries'
 ]
 
@@ -0,0 +1,78 @@
+"""
+当前登录用户
+每个请求只解析一次登录用户并保存在 flask.g 上；用户的角色记录缓存在进程内（TTL/LRU），
+缓存命中时鉴权不查询数据库。用户被修改或删除时调用 invalidate_user 失效缓存
+"""
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from app.models import User
+from app.utils.cache import TTLCache
+
+_user_cache = None
+
+
+class CurrentUser:
+    """鉴权使用的用户记录（只包含ID、用户名和角色）"""
+
+    __slots__ = ('id', 'username', 'role')
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.username, user.role)
+
+    def is_admin(self):
+        """判断是否是管理员"""
+        return self.role == 'admin'
+
+    def __repr__(self):
+        return f'<CurrentUser {self.username}>'
+
+
+def get_user_cache():
+    """进程内用户角色缓存（首次使用时按配置创建）"""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = TTLCache(
+            maxsize=current_app.config['AUTH_USER_CACHE_SIZE'],
+            ttl=current_app.config['AUTH_USER_CACHE_TTL']
+        )
+    return _user_cache
+
+
+def invalidate_user(user_id):
+    """用户信息修改或删除后失效缓存"""
+    if _user_cache is not None:
+        _user_cache.pop(int(user_id))
+
+
+def load_user(user_id):
+    """读取用户角色记录，优先使用缓存，用户不存在时返回None"""
+    cache = get_user_cache()
+    user = cache.get(user_id)
+    if user is None:
+        model = User.query.get(user_id)
+        if not model:
+            return None
+        user = CurrentUser.from_model(model)
+        cache.set(user_id, user)
+    return user
+
+
+def resolve_current_user():
+    """解析本次请求的登录用户（需在 verify_jwt_in_request 之后调用），结果保存在 g 上"""
+    if 'current_user' not in g:
+        # JWT identity是字符串，需要转换为整数
+        g.current_user = load_user(int(get_jwt_identity()))
+    return g.current_user
+
+
+def token_role_matches(user):
+    """token 中的角色是否与用户当前角色一致（旧版本签发的 token 不含角色，视为一致）"""
+    role = get_jwt().get('role')
+    return role is None or role == user.role
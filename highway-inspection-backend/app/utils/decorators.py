@@ -1,23 +1,34 @@
 from functools import wraps
 from flask import request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.models import User
+from flask_jwt_extended import verify_jwt_in_request
+from app.utils.current_user import resolve_current_user, token_role_matches
 from app.utils.response import error_response
 
 
+def _authenticate():
+    """验证JWT并解析当前用户，返回 (用户, 错误响应)"""
+    verify_jwt_in_request()
+    user = resolve_current_user()
+
+    if not user:
+        return None, error_response('用户不存在', 401)
+
+    # 角色修改后，之前签发的 token 需要重新登录
+    if not token_role_matches(user):
+        return None, error_response('用户角色已变更，请重新登录', 401)
+
+    return user, None
+
+
 def login_required(fn):
     """登录验证装饰器"""
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            # JWT identity是字符串，需要转换为整数
-            user = User.query.get(int(user_id))
-            
-            if not user:
-                return error_response('用户不存在', 401)
-            
+            user, error = _authenticate()
+            if error:
+                return error
+
             return fn(*args, **kwargs)
         except Exception as e:
             return error_response(f'身份验证失败: {str(e)}', 401)
@@ -30,17 +41,13 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         try:
-            verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            # JWT identity是字符串，需要转换为整数
-            user = User.query.get(int(user_id))
-            
-            if not user:
-                return error_response('用户不存在', 401)
-            
+            user, error = _authenticate()
+            if error:
+                return error
+
             if not user.is_admin():
                 return error_response('需要管理员权限', 403)
-            
+
             return fn(*args, **kwargs)
         except Exception as e:
             return error_response(f'权限验证失败: {str(e)}', 403)
@@ -49,11 +56,8 @@ def admin_required(fn):
 
 
 def get_current_user():
-    """获取当前登录用户"""
+    """获取当前登录用户（同一请求内只加载一次）"""
     try:
-        user_id = get_jwt_identity()
-        # JWT identity是字符串，需要转换为整数
-        return User.query.get(int(user_id))
+        return resolve_current_user()
     except:
         return None
-
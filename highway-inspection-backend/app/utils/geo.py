@@ -0,0 +1,132 @@
+"""
+航线几何计算
+批量Haversine：把一条或多条航线的所有顶点拼成一个数组，用NumPy一次算出全部航段长度；
+顶点很少的航线直接用纯Python计算，避免数组创建的固定开销（numpy在首次使用时才导入）
+"""
+import json
+import math
+from itertools import chain
+
+EARTH_RADIUS_KM = 6371
+
+# 顶点数少于该值时纯Python循环更快
+VECTORIZE_MIN_VERTICES = 32
+
+
+def route_coordinates(route):
+    """从航线数据中提取 [[lng, lat], ...] 坐标列表"""
+    if isinstance(route, str):
+        route = json.loads(route)
+    if not route:
+        return []
+
+    # 处理GeoJSON格式：可能是直接数组或包含coordinates的对象
+    if isinstance(route, dict) and 'coordinates' in route:
+        # GeoJSON LineString格式: {"type": "LineString", "coordinates": [[lng, lat], ...]}
+        return route['coordinates'] or []
+    if isinstance(route, list):
+        # 直接数组格式: [[lng, lat], ...]
+        return route
+    return []
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """计算两点间距离（公里）"""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + \
+        math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
+        math.sin(dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def _to_array(coords):
+    """坐标列表 -> (n, 2) 的 float64 数组（GeoJSON顺序 [lng, lat]，忽略高度）"""
+    import numpy as np
+
+    if not len(coords):
+        return np.empty((0, 2), dtype=np.float64)
+    # 逐个读取坐标值比把嵌套列表交给 np.asarray 快一倍以上
+    values = np.fromiter(chain.from_iterable(coords), dtype=np.float64)
+    if values.size == 2 * len(coords):
+        return values.reshape(-1, 2)
+    # 顶点带高度时只取经纬度
+    return np.asarray([point[:2] for point in coords], dtype=np.float64)
+
+
+def _haversine_array(lng1, lat1, lng2, lat2):
+    """逐元素计算Haversine距离（公里），参数为角度制数组"""
+    import numpy as np
+
+    lng1, lat1, lng2, lat2 = (np.radians(value) for value in (lng1, lat1, lng2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def segment_lengths(coords):
+    """航线每个航段的长度（公里），返回长度为 n-1 的NumPy数组"""
+    array = _to_array(coords)
+    if len(array) < 2:
+        import numpy as np
+        return np.zeros(0, dtype=np.float64)
+    return _haversine_array(array[:-1, 0], array[:-1, 1], array[1:, 0], array[1:, 1])
+
+
+def route_length(coords):
+    """单条航线总长度（公里）"""
+    if len(coords) < 2:
+        return 0.0
+    if len(coords) < VECTORIZE_MIN_VERTICES:
+        total_distance = 0.0
+        for i in range(len(coords) - 1):
+            lon1, lat1 = coords[i][:2]
+            lon2, lat2 = coords[i + 1][:2]
+            total_distance += haversine_distance(lat1, lon1, lat2, lon2)
+        return total_distance
+    return float(segment_lengths(coords).sum())
+
+
+def route_lengths(routes):
+    """
+    批量计算多条航线的总长度（公里），返回与输入顺序一致的NumPy数组
+    所有顶点拼接后一次计算全部航段（含航线之间的连接段），再按区间求和
+    """
+    import numpy as np
+
+    arrays = [_to_array(route_coordinates(route)) for route in routes]
+    totals = np.zeros(len(arrays), dtype=np.float64)
+    if not arrays:
+        return totals
+
+    counts = np.array([len(array) for array in arrays])
+    if counts.sum() < 2:
+        return totals
+
+    points = np.concatenate(arrays)
+    segments = _haversine_array(points[:-1, 0], points[:-1, 1], points[1:, 0], points[1:, 1])
+
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    # 第i条航线的航段为 segments[starts[i]:ends[i]-1]，用前缀和相减求区间和，
+    # 航线之间的连接段（下标 ends[i]-1）不会落入任何区间
+    cumulative = np.concatenate([[0.0], np.cumsum(segments)])
+    has_segments = counts >= 2
+    totals[has_segments] = cumulative[ends[has_segments] - 1] - cumulative[starts[has_segments]]
+    return totals
+
+
+def route_bbox(coords):
+    """航线外包矩形 (min_lng, min_lat, max_lng, max_lat)，无坐标时返回None"""
+    if not coords:
+        return None
+    if len(coords) < VECTORIZE_MIN_VERTICES:
+        lngs = [point[0] for point in coords]
+        lats = [point[1] for point in coords]
+        return min(lngs), min(lats), max(lngs), max(lats)
+    array = _to_array(coords)
+    min_lng, min_lat = array.min(axis=0)
+    max_lng, max_lat = array.max(axis=0)
+    return float(min_lng), float(min_lat), float(max_lng), float(max_lat)
@@ -0,0 +1,100 @@
+"""
+时间区间索引
+用于空域占用冲突检测，区间均为左闭右开 [start, end)，首尾相接不算重叠：
+- IntervalIndex：静态区间索引，按开始时间排序后建立结束时间的前缀最大值和线段树，
+  判断是否与某个区间重叠 O(log n)，列出全部重叠区间 O((k+1)·log n)
+- overlapping_pairs：扫描线，一次排序找出一组区间中所有相互重叠的区间对
+"""
+import heapq
+from bisect import bisect_left
+from itertools import count
+from operator import itemgetter
+
+
+def _later(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a >= b else b
+
+
+class IntervalIndex:
+    """静态区间索引（构建后只读），区间为 (start, end, value)"""
+
+    def __init__(self, intervals=()):
+        items = sorted(intervals, key=itemgetter(0))
+        self.starts = [start for start, _, _ in items]
+        self.ends = [end for _, end, _ in items]
+        self.values = [value for _, _, value in items]
+
+        # 前缀最大结束时间：开始时间早于查询结束时间的区间是一个前缀，只要其中最晚的结束时间晚于查询开始时间就有重叠
+        self._prefix_max_end = []
+        latest = None
+        for end in self.ends:
+            latest = _later(latest, end)
+            self._prefix_max_end.append(latest)
+
+        # 结束时间的最大值线段树（叶子数补齐为2的幂），用于找出前缀中所有结束时间晚于查询开始时间的区间
+        size = 1
+        while size < len(items):
+            size *= 2
+        self._size = size
+        tree = [None] * (2 * size)
+        tree[size:size + len(items)] = self.ends
+        for node in range(size - 1, 0, -1):
+            tree[node] = _later(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start, end):
+        """是否有区间与 [start, end) 重叠"""
+        limit = bisect_left(self.starts, end)
+        return limit > 0 and self._prefix_max_end[limit - 1] > start
+
+    def _positions(self, limit, start):
+        """下标小于 limit 且结束时间晚于 start 的区间下标（升序）"""
+        tree = self._tree
+
+        def visit(node, low, high):
+            if low >= limit or tree[node] is None or tree[node] <= start:
+                return
+            if high - low == 1:
+                yield low
+                return
+            middle = (low + high) // 2
+            yield from visit(2 * node, low, middle)
+            yield from visit(2 * node + 1, middle, high)
+
+        return visit(1, 0, self._size)
+
+    def iter_overlapping(self, start, end):
+        """按开始时间依次返回与 [start, end) 重叠的区间 (start, end, value)"""
+        if not self.overlaps(start, end):
+            return
+        for position in self._positions(bisect_left(self.starts, end), start):
+            yield self.starts[position], self.ends[position], self.values[position]
+
+    def find(self, start, end):
+        """与 [start, end) 重叠的全部区间"""
+        return list(self.iter_overlapping(start, end))
+
+
+def overlapping_pairs(intervals):
+    """
+    扫描线：按开始时间排序，维护按结束时间排列的进行中区间堆，
+    新区间开始前先移除已结束的区间，剩余的都与它重叠；O(n·log n + 重叠对数)
+    返回 [(区间a, 区间b)]，a 的开始时间不晚于 b
+    """
+    active = []
+    sequence = count()
+    pairs = []
+    for interval in sorted(intervals, key=itemgetter(0)):
+        start, end = interval[0], interval[1]
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        pairs.extend((other, interval) for _, _, other in active)
+        heapq.heappush(active, (end, next(sequence), interval))
+    return pairs
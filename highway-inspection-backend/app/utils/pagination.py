@@ -0,0 +1,71 @@
+"""
+游标（keyset）分页
+按 (排序时间, id) 倒序翻页，下一页条件为 (时间, id) < 上一页最后一条，配合索引每页耗时与翻页深度无关；
+游标是对最后一条记录排序值的不透明编码，客户端原样回传即可
+"""
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(order_value, record_id):
+    """把最后一条记录的排序值和ID编码为游标"""
+    if isinstance(order_value, datetime):
+        order_value = order_value.isoformat()
+    payload = json.dumps([order_value, record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，返回 (排序值, ID)"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        order_value, record_id = json.loads(payload)
+        return datetime.fromisoformat(order_value), int(record_id)
+    except (ValueError, TypeError):
+        raise ValueError('无效的分页游标')
+
+
+def is_cursor_request():
+    """请求是否使用游标分页（带 cursor 参数，首页传空值）"""
+    return 'cursor' in request.args
+
+
+def cursor_args():
+    """从请求中读取游标分页参数：cursor 和 with_total（true 时返回精确总数）"""
+    return {
+        'cursor': request.args.get('cursor') or None,
+        'with_total': request.args.get('with_total', 'false').lower() in ('1', 'true')
+    }
+
+
+def keyset_paginate(query, order_column, id_column, cursor=None, page_size=20, with_total=False):
+    """
+    按 (order_column, id_column) 倒序取一页
+    :param cursor: 上一页返回的 next_cursor，为空表示第一页
+    :param with_total: 是否统计总数（需要额外的 COUNT 查询，默认不统计）
+    :return: (本页记录, 下一页游标（没有更多时为None）, 总数或None)
+    """
+    page_size = max(1, page_size)
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        order_value, record_id = decode_cursor(cursor)
+        # 展开写法而不是行值比较，MySQL 可以直接用 (时间, id) 索引做范围扫描
+        query = query.filter(or_(
+            order_column < order_value,
+            and_(order_column == order_value, id_column < record_id)
+        ))
+
+    records = query.order_by(order_column.desc(), id_column.desc()).limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        last = records[-1]
+        next_cursor = encode_cursor(getattr(last, order_column.key), getattr(last, id_column.key))
+
+    return records, next_cursor, total
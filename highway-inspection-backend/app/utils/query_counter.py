@@ -0,0 +1,51 @@
+"""
+SQL查询计数
+用于定位N+1查询，并在测试中断言某段代码执行的查询数量不超过预期
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.models import db
+
+
+class QueryCounter:
+    """记录代码块中执行的SQL语句"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """
+    统计代码块中执行的SQL数量（需在应用上下文中使用）
+
+        with count_queries() as counter:
+            ...
+        print(counter.count)
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._on_execute)
+
+
+@contextmanager
+def assert_max_queries(max_queries, engine=None):
+    """断言代码块中执行的SQL数量不超过 max_queries，超出时列出所有语句"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        statements = '\n'.join(f'  {i + 1}. {sql}' for i, sql in enumerate(counter.statements))
+        raise AssertionError(f'执行了 {counter.count} 条SQL，超过预期的 {max_queries} 条:\n{statements}')
@@ -36,3 +36,16 @@ def paginate_response(items, total, page, page_size, message='success'):
         message=message
     )
 
+
+def cursor_response(items, next_cursor, page_size, total=None, message='success'):
+    """游标分页响应（未统计总数时 total 为None）"""
+    return success_response(
+        data={
+            'items': items,
+            'total': total,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        },
+        message=message
+    )
@@ -0,0 +1,143 @@
+"""
+航线-空域检查微基准
+对比逐个空域做相交判断（几何已提前解析）与 app.services.airspace_index 中的 STRtree + 预处理多边形：
+- 航线经过的空域、穿越的禁飞区
+- 航线是否在计划空域内
+另外统计地图视野查询（STRtree + 按缩放级别 Douglas-Peucker 简化）的耗时和返回数据量
+
+用法（在 highway-inspection-backend 目录下执行）:
+    python benchmarks/airspace_benchmark.py
+    python benchmarks/airspace_benchmark.py --airspaces 10000 --routes 200 --vertices 500
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.airspace_index import (  # noqa: E402
+    AirspaceGeometries, area_geometry, route_geometry, zoom_tolerance
+)
+
+AIRSPACE_TYPES = ('suitable', 'restricted', 'no_fly')
+
+
+def make_area(rng, vertices):
+    """生成一个近似圆形的空域（GeoJSON Polygon）"""
+    lng, lat = rng.uniform(110, 120), rng.uniform(30, 40)
+    radius = rng.uniform(0.01, 0.1)
+    ring = []
+    for i in range(vertices):
+        angle = 2 * math.pi * i / vertices
+        r = radius * rng.uniform(0.8, 1.0)
+        ring.append([lng + r * math.cos(angle), lat + r * math.sin(angle)])
+    ring.append(ring[0])
+    return {'type': 'Polygon', 'coordinates': [ring]}
+
+
+def make_route(center, vertices, rng):
+    """从空域中心附近出发的随机游走航线（GeoJSON LineString）"""
+    lng, lat = center
+    coordinates = []
+    for _ in range(vertices):
+        lng += rng.uniform(-0.0005, 0.0005)
+        lat += rng.uniform(-0.0005, 0.0005)
+        coordinates.append([lng, lat])
+    return {'type': 'LineString', 'coordinates': coordinates}
+
+
+def scan_check(airspaces, route, airspace_id):
+    """基准：逐个空域判断相交，计划空域直接判断包含"""
+    geometry = route_geometry(route)
+    intersecting = [
+        {'id': airspace_id_, 'number': number, 'type': type}
+        for airspace_id_, number, type, area in airspaces
+        if area.intersects(geometry)
+    ]
+    planned = next(area for airspace_id_, _, _, area in airspaces if airspace_id_ == airspace_id)
+    return {
+        'inside_airspace': bool(planned.covers(geometry)),
+        'no_fly_zones': [item for item in intersecting if item['type'] == 'no_fly'],
+        'intersecting': intersecting
+    }
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='航线-空域检查微基准')
+    parser.add_argument('--airspaces', type=int, default=5000, help='空域数量')
+    parser.add_argument('--area-vertices', type=int, default=256, help='每个空域的顶点数')
+    parser.add_argument('--routes', type=int, default=100, help='检查的航线条数')
+    parser.add_argument('--vertices', type=int, default=200, help='每条航线的顶点数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [
+        (i + 1, f'AS{i + 1:05d}', rng.choice(AIRSPACE_TYPES), make_area(rng, args.area_vertices))
+        for i in range(args.airspaces)
+    ]
+    checks = []
+    for _ in range(args.routes):
+        airspace_id = rng.randint(1, args.airspaces)
+        ring = rows[airspace_id - 1][3]['coordinates'][0]
+        center = (sum(p[0] for p in ring[:-1]) / (len(ring) - 1), sum(p[1] for p in ring[:-1]) / (len(ring) - 1))
+        checks.append((make_route(center, args.vertices, rng), airspace_id))
+
+    # 预热（导入shapely）
+    AirspaceGeometries(rows[:1])
+    build_seconds, geometries = best_of(1, lambda: AirspaceGeometries(rows))
+    parsed = [(airspace_id, number, type, area_geometry(area)) for airspace_id, number, type, area in rows]
+
+    scan_seconds, expected = best_of(
+        args.repeat, lambda: [scan_check(parsed, route, airspace_id) for route, airspace_id in checks]
+    )
+    index_seconds, actual = best_of(
+        args.repeat, lambda: [geometries.check_route(route, airspace_id) for route, airspace_id in checks]
+    )
+    assert expected == actual
+
+    print(f'航线-空域检查基准（{args.airspaces} 个空域，{args.routes} 条航线，'
+          f'每条 {args.vertices} 个顶点，{args.repeat} 次取最短耗时）')
+    print(f'构建索引: {build_seconds * 1000:.1f} ms')
+    print(f'{"方式":<20}{"总耗时(ms)":>14}{"每条航线(ms)":>16}')
+    for name, seconds in (('逐个空域判断', scan_seconds), ('STRtree索引', index_seconds)):
+        print(f'{name:<20}{seconds * 1000:>14.2f}{seconds * 1000 / args.routes:>16.3f}')
+    print(f'加速比: {scan_seconds / index_seconds:.1f}x')
+
+    # 地图视野查询：以第一个空域为中心，视野跨度随缩放级别变化（约 1024x768 像素）
+    areas = {airspace_id: area for airspace_id, _, _, area in rows}
+    center_lng, center_lat = checks[0][0]['coordinates'][0]
+    print()
+    print(f'视野查询（空域 {args.area_vertices} 个顶点，{args.repeat} 次取最短耗时）')
+    print(f'{"缩放级别":<10}{"空域数":>8}{"耗时(ms)":>12}{"原始范围(KB)":>16}{"简化后(KB)":>14}')
+    for zoom in (6, 9, 12, 15):
+        half_width, half_height = zoom_tolerance(zoom) * 512, zoom_tolerance(zoom) * 384
+        bbox = (center_lng - half_width, center_lat - half_height, center_lng + half_width, center_lat + half_height)
+
+        def viewport():
+            ids = geometries.in_bbox(*bbox)
+            return ids, geometries.simplified_areas(ids, zoom_tolerance(zoom))
+
+        seconds, (ids, simplified) = best_of(args.repeat, viewport)
+        full_size = len(json.dumps([areas[airspace_id] for airspace_id in ids]))
+        simplified_size = len(json.dumps(list(simplified.values())))
+        print(f'{zoom:<10}{len(ids):>8}{seconds * 1000:>12.2f}{full_size / 1024:>16.1f}{simplified_size / 1024:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+空域时段冲突检测微基准
+对比逐个比较与 app.utils.intervals 中的区间索引/扫描线：
+- 单个时段是否与已占用时段重叠：线性扫描 vs IntervalIndex.overlaps
+- 所有待审批申请之间的冲突对：两两比较 vs overlapping_pairs
+
+用法（在 highway-inspection-backend 目录下执行）:
+    python benchmarks/conflict_benchmark.py
+    python benchmarks/conflict_benchmark.py --usages 200000 --pending 20000 --airspaces 100
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.intervals import IntervalIndex, overlapping_pairs  # noqa: E402
+
+BASE_TIME = datetime(2026, 1, 1)
+
+
+def make_intervals(count, days, rng):
+    """随机生成 count 个 0.5~4 小时的时段，值为编号"""
+    intervals = []
+    for i in range(count):
+        start = BASE_TIME + timedelta(minutes=rng.randint(0, days * 24 * 60))
+        intervals.append((start, start + timedelta(minutes=rng.randint(30, 240)), i))
+    return intervals
+
+
+def scan_pairs(intervals):
+    """基准：两两比较"""
+    pairs = set()
+    for i, (start_a, end_a, id_a) in enumerate(intervals):
+        for start_b, end_b, id_b in intervals[i + 1:]:
+            if start_a < end_b and start_b < end_a:
+                pairs.add((min(id_a, id_b), max(id_a, id_b)))
+    return pairs
+
+
+def best_of(repeat, func):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='空域时段冲突检测微基准')
+    parser.add_argument('--airspaces', type=int, default=50, help='空域数量')
+    parser.add_argument('--usages', type=int, default=100000, help='已批准/执行中的空域使用记录数')
+    parser.add_argument('--pending', type=int, default=5000, help='待审批申请数')
+    parser.add_argument('--days', type=int, default=365, help='时段分布的天数')
+    parser.add_argument('--queries', type=int, default=2000, help='单时段查询次数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最短耗时')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    # 单个空域的占用记录（按空域平均分布）
+    usages = make_intervals(args.usages // args.airspaces, args.days, rng)
+    queries = [(start, end) for start, end, _ in make_intervals(args.queries, args.days, rng)]
+
+    build_seconds, index = best_of(1, lambda: IntervalIndex(usages))
+    scan_seconds, expected = best_of(args.repeat, lambda: [
+        any(start < usage_end and usage_start < end for usage_start, usage_end, _ in usages)
+        for start, end in queries
+    ])
+    index_seconds, actual = best_of(args.repeat, lambda: [index.overlaps(start, end) for start, end in queries])
+    assert expected == actual
+
+    print(f'单时段冲突检查（每个空域 {len(usages)} 条占用记录，{args.queries} 次查询，{args.repeat} 次取最短耗时）')
+    print(f'构建索引: {build_seconds * 1000:.1f} ms')
+    print(f'{"方式":<16}{"总耗时(ms)":>14}{"每次(us)":>12}')
+    for name, seconds in (('线性扫描', scan_seconds), ('区间索引', index_seconds)):
+        print(f'{name:<16}{seconds * 1000:>14.2f}{seconds * 1e6 / args.queries:>12.1f}')
+
+    # 所有待审批申请之间的冲突（按空域分组）
+    pending = make_intervals(args.pending, args.days, rng)
+    by_airspace = {}
+    for interval in pending:
+        by_airspace.setdefault(rng.randrange(args.airspaces), []).append(interval)
+
+    pair_scan_seconds, expected_pairs = best_of(1, lambda: set().union(
+        *(scan_pairs(intervals) for intervals in by_airspace.values())
+    ))
+    sweep_seconds, sweep_pairs = best_of(args.repeat, lambda: {
+        (min(a[2], b[2]), max(a[2], b[2]))
+        for intervals in by_airspace.values() for a, b in overlapping_pairs(intervals)
+    })
+    assert expected_pairs == sweep_pairs
+
+    print()
+    print(f'待审批申请冲突检测（{args.pending} 个申请，{args.airspaces} 个空域，{len(sweep_pairs)} 对冲突）')
+    print(f'{"两两比较":<16}{pair_scan_seconds * 1000:>14.2f} ms')
+    print(f'{"扫描线":<16}{sweep_seconds * 1000:>14.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+航线长度计算微基准
+对比原有的逐航段纯Python Haversine循环与 app.utils.geo 中的NumPy向量化实现：
+- 单条航线：route_length
+- 多条航线：route_lengths（所有顶点一次计算）
+
+用法（在 highway-inspection-backend 目录下执行）:
+    python benchmarks/geo_benchmark.py
+    python benchmarks/geo_benchmark.py --vertices 10000 --routes 50 --repeat 5
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.geo import route_length, route_lengths  # noqa: E402
+
+
+def loop_route_length(coord_list):
+    """原 Mission.calculate_route_distance 中的逐航段循环（基准）"""
+    def haversine_distance(lat1, lon1, lat2, lon2):
+        R = 6371
+        dlat = math.radians(lat2 - lat1)
+        dlon = math.radians(lon2 - lon1)
+        a = math.sin(dlat / 2) ** 2 + \
+            math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * \
+            math.sin(dlon / 2) ** 2
+        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        return R * c
+
+    total_distance = 0.0
+    for i in range(len(coord_list) - 1):
+        lon1, lat1 = coord_list[i]
+        lon2, lat2 = coord_list[i + 1]
+        total_distance += haversine_distance(lat1, lon1, lat2, lon2)
+    return total_distance
+
+
+def make_route(vertices, rng):
+    """生成一条随机游走的航线（GeoJSON LineString）"""
+    lng, lat = rng.uniform(110, 120), rng.uniform(30, 40)
+    coordinates = []
+    for _ in range(vertices):
+        lng += rng.uniform(-0.001, 0.001)
+        lat += rng.uniform(-0.001, 0.001)
+        coordinates.append([lng, lat])
+    return {'type': 'LineString', 'coordinates': coordinates}
+
+
+def best_of(repeat, func):
+    """多次执行取最短耗时"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='航线长度计算微基准')
+    parser.add_argument('--vertices', type=int, default=10000, help='每条航线的顶点数')
+    parser.add_argument('--routes', type=int, default=20, help='批量计算的航线条数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，取最短耗时')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = [make_route(args.vertices, rng) for _ in range(args.routes)]
+    single = routes[0]['coordinates']
+
+    # 预热（导入numpy）
+    route_lengths(routes[:1])
+
+    loop_single, expected = best_of(args.repeat, lambda: loop_route_length(single))
+    vector_single, actual = best_of(args.repeat, lambda: route_length(single))
+    assert math.isclose(expected, actual, rel_tol=1e-9), (expected, actual)
+
+    loop_batch, expected_batch = best_of(
+        args.repeat, lambda: [loop_route_length(route['coordinates']) for route in routes]
+    )
+    vector_batch, actual_batch = best_of(args.repeat, lambda: route_lengths(routes))
+    for expected_total, actual_total in zip(expected_batch, actual_batch):
+        assert math.isclose(expected_total, actual_total, rel_tol=1e-9), (expected_total, actual_total)
+
+    print(f'航线长度计算基准（每条 {args.vertices} 个顶点，{args.repeat} 次取最短耗时）')
+    print(f'{"场景":<22}{"纯Python循环(ms)":>18}{"NumPy向量化(ms)":>18}{"加速比":>10}')
+    for name, loop_seconds, vector_seconds in (
+        ('单条航线', loop_single, vector_single),
+        (f'{args.routes} 条航线', loop_batch, vector_batch),
+    ):
+        print(f'{name:<22}{loop_seconds * 1000:>18.2f}{vector_seconds * 1000:>18.2f}'
+              f'{loop_seconds / vector_seconds:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+后端启动耗时基准测试
+在独立子进程中分别测量：导入 app 包、create_app、首个请求的耗时，以及启动后已加载的AI重量级依赖，
+用于对比 AI_ENABLED 开启/关闭时的冷启动时间，防止启动性能回退
+
+用法（在 highway-inspection-backend 目录下执行）:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --runs 10 --path /health --max-seconds 1.0
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动阶段不应被导入的AI相关模块
+HEAVY_MODULES = ('cv2', 'numpy', 'onnxruntime', 'ultralytics', 'torch')
+
+CHILD_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app(sys.argv[1])
+created = time.perf_counter()
+response = application.test_client().get(sys.argv[2])
+requested = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - started,
+    'create_app_seconds': created - imported,
+    'first_request_seconds': requested - created,
+    'status_code': response.status_code,
+    'heavy_modules': [name for name in sys.argv[3].split(',') if name in sys.modules]
+}))
+'''
+
+
+def run_once(config_name, path, ai_enabled):
+    """在全新的解释器中执行一次启动测量"""
+    env = dict(os.environ)
+    env['AI_ENABLED'] = 'true' if ai_enabled else 'false'
+    env['ANALYSIS_WORKER_AUTOSTART'] = 'false'
+
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, config_name, path, ','.join(HEAVY_MODULES)],
+        cwd=BACKEND_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    wall_seconds = time.perf_counter() - started
+
+    # 应用启动时会打印日志，最后一行是测量结果
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result['process_seconds'] = wall_seconds
+    return result
+
+
+def summarize(results):
+    """各项耗时取中位数"""
+    summary = {}
+    for key in ('import_seconds', 'create_app_seconds', 'first_request_seconds', 'process_seconds'):
+        summary[key] = round(statistics.median(item[key] for item in results), 4)
+    summary['startup_seconds'] = round(
+        summary['import_seconds'] + summary['create_app_seconds'] + summary['first_request_seconds'], 4
+    )
+    summary['status_code'] = results[-1]['status_code']
+    summary['heavy_modules'] = results[-1]['heavy_modules']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='后端启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=5, help='每种模式的测量次数，取中位数')
+    parser.add_argument('--config', default='testing', help='create_app 使用的配置名称')
+    parser.add_argument('--path', default='/health', help='首个请求的路径')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='AI_ENABLED=false 时启动耗时（导入+创建应用+首个请求）上限，超出时返回非0退出码')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    args = parser.parse_args()
+
+    report = {}
+    for ai_enabled in (False, True):
+        mode = 'ai_enabled' if ai_enabled else 'ai_disabled'
+        results = [run_once(args.config, args.path, ai_enabled) for _ in range(args.runs)]
+        report[mode] = summarize(results)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f'启动耗时基准（{args.runs} 次取中位数，配置: {args.config}，首个请求: {args.path}）')
+        print(f'{"模式":<14}{"导入(s)":>10}{"创建应用(s)":>14}{"首个请求(s)":>14}{"合计(s)":>10}{"进程(s)":>10}  已加载的AI依赖')
+        for mode, summary in report.items():
+            print(
+                f'{mode:<14}{summary["import_seconds"]:>10.4f}{summary["create_app_seconds"]:>14.4f}'
+                f'{summary["first_request_seconds"]:>14.4f}{summary["startup_seconds"]:>10.4f}'
+                f'{summary["process_seconds"]:>10.4f}  {", ".join(summary["heavy_modules"]) or "-"}'
+            )
+
+    disabled = report['ai_disabled']
+    if disabled['heavy_modules']:
+        print(f'❌ AI_ENABLED=false 时仍加载了AI依赖: {", ".join(disabled["heavy_modules"])}')
+        return 1
+    if args.max_seconds is not None and disabled['startup_seconds'] > args.max_seconds:
+        print(f'❌ 启动耗时 {disabled["startup_seconds"]:.3f}s 超过上限 {args.max_seconds:.3f}s')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,6 +28,8 @@ class Config:
     JWT_TOKEN_LOCATION = ['headers']
     JWT_HEADER_NAME = 'Authorization'
     JWT_HEADER_TYPE = 'Bearer'
+    AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))  # 用户角色缓存有效期（秒），多进程部署时修改用户后最多延迟该时间生效
+    AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', 1024))  # 用户角色缓存最大条目数，0表示不缓存
     
     # CORS配置
     CORS_ORIGINS = [
@@ -41,6 +43,10 @@ class Config:
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads/videos')
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 2 * 1024 * 1024 * 1024))  # 2GB
     ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'jpg', 'png'}
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 16 * 1024 * 1024))  # 分片上传单个分片的最大字节数
+    UPLOAD_SESSION_EXPIRE_HOURS = int(os.getenv('UPLOAD_SESSION_EXPIRE_HOURS', 24))  # 未完成的分片上传超过多少小时没有进展后清理
+    MEDIA_OFFLOAD = os.getenv('MEDIA_OFFLOAD', '').lower()  # 上传文件由反向代理发送：x-accel（Nginx）/ x-sendfile，空表示由应用发送
+    MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-uploads')  # X-Accel-Redirect 对应的 Nginx internal location
     
     # 分页配置
     PAGE_SIZE = 20
@@ -48,6 +54,53 @@ class Config:
     # AI 模型配置
     AI_MODEL_PATH = os.getenv('AI_MODEL_PATH', None)  # None 表示使用默认路径
     AI_ENABLED = os.getenv('AI_ENABLED', 'true').lower() == 'true'
+    AI_IMAGE_SIZE = int(os.getenv('AI_IMAGE_SIZE', 224))  # 分类模型输入尺寸（ONNX模型以模型输入形状为准）
+    AI_VIDEO_BATCH_SIZE = int(os.getenv('AI_VIDEO_BATCH_SIZE', 8))  # 视频批量推理帧数，1 表示逐帧推理
+    AI_MODEL_POOL_SIZE = int(os.getenv('AI_MODEL_POOL_SIZE', 1))  # 每个进程中每个模型的推理会话数
+    AI_INTRA_OP_THREADS = int(os.getenv('AI_INTRA_OP_THREADS', 0))  # 单个算子内部线程数，0 表示自动
+    AI_INTER_OP_THREADS = int(os.getenv('AI_INTER_OP_THREADS', 0))  # 算子间并行线程数，0 表示自动
+    AI_MODEL_PRELOAD = os.getenv('AI_MODEL_PRELOAD', 'false').lower() == 'true'  # 工作进程启动时预加载并预热模型
+    AI_MODEL_STATS_DIR = os.getenv('AI_MODEL_STATS_DIR', os.path.join('logs', 'model_stats'))  # 工作进程模型统计快照目录
+    AI_FRAME_SAMPLER = os.getenv('AI_FRAME_SAMPLER', 'adaptive')  # 抽帧策略：adaptive 自适应 / fixed 每5帧一次
+    AI_SAMPLER_MIN_INTERVAL = int(os.getenv('AI_SAMPLER_MIN_INTERVAL', 2))  # 场景变化时最密的采样间隔（帧）
+    AI_SAMPLER_MAX_INTERVAL = int(os.getenv('AI_SAMPLER_MAX_INTERVAL', 50))  # 画面静止时最长送检间隔（帧）
+    AI_SAMPLER_DIFF_THRESHOLD = float(os.getenv('AI_SAMPLER_DIFF_THRESHOLD', 12.0))  # 缩略图平均灰度差阈值（0-255）
+    AI_SAMPLER_HIST_THRESHOLD = float(os.getenv('AI_SAMPLER_HIST_THRESHOLD', 0.2))  # 灰度直方图巴氏距离阈值（0-1）
+    AI_PIPELINE_QUEUE_SIZE = int(os.getenv('AI_PIPELINE_QUEUE_SIZE', 32))  # 解码队列长度（帧）
+    AI_WRITE_BATCH_SIZE = int(os.getenv('AI_WRITE_BATCH_SIZE', 200))  # 分析结果每批写盘/入库的条数
+    AI_WRITE_FLUSH_SECONDS = float(os.getenv('AI_WRITE_FLUSH_SECONDS', 2))  # 分析结果最长攒批时间（秒）
+
+    # AI 分析任务队列配置
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 2))  # 本地工作进程数量
+    ANALYSIS_WORKER_AUTOSTART = os.getenv('ANALYSIS_WORKER_AUTOSTART', 'true').lower() == 'true'
+    ANALYSIS_POLL_INTERVAL = float(os.getenv('ANALYSIS_POLL_INTERVAL', 2))  # 空闲时轮询间隔（秒）
+    ANALYSIS_PROGRESS_INTERVAL = float(os.getenv('ANALYSIS_PROGRESS_INTERVAL', 1))  # 进度写入间隔（秒）
+    ANALYSIS_JOB_STALE_SECONDS = int(os.getenv('ANALYSIS_JOB_STALE_SECONDS', 120))  # 心跳超时视为中断
+    ANALYSIS_JOB_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', 3))
+
+    # 视频转码（AVI 转 MP4）工作进程配置
+    TRANSCODE_WORKERS = int(os.getenv('TRANSCODE_WORKERS', 1))  # 本地转码进程数量
+    TRANSCODE_WORKER_AUTOSTART = os.getenv('TRANSCODE_WORKER_AUTOSTART', 'true').lower() == 'true'
+    TRANSCODE_POLL_INTERVAL = float(os.getenv('TRANSCODE_POLL_INTERVAL', 2))  # 空闲时轮询间隔（秒）
+    TRANSCODE_STALE_SECONDS = int(os.getenv('TRANSCODE_STALE_SECONDS', 120))  # 心跳超时视为中断，重新转码
+
+    # 网页播放版本（低码率代理 / HLS 切片），由转码工作进程生成
+    RENDITION_ENABLED = os.getenv('RENDITION_ENABLED', 'true').lower() == 'true'
+    RENDITION_HEIGHT = int(os.getenv('RENDITION_HEIGHT', 480))  # 代理版本高度（像素），原视频更低时不放大
+    RENDITION_VIDEO_KBPS = int(os.getenv('RENDITION_VIDEO_KBPS', 800))  # 代理版本视频码率（kbps）
+    RENDITION_HLS_SEGMENT_SECONDS = int(os.getenv('RENDITION_HLS_SEGMENT_SECONDS', 6))  # HLS 切片时长（秒）
+    RENDITION_FFMPEG_THREADS = int(os.getenv('RENDITION_FFMPEG_THREADS', 2))  # 每个 ffmpeg 编码进程的线程数
+    FFMPEG_PATH = os.getenv('FFMPEG_PATH', 'ffmpeg')  # 找不到 ffmpeg 时代理版本用 OpenCV 生成，不生成 HLS
+
+    # 看板响应缓存
+    DASHBOARD_CACHE_BACKEND = os.getenv('DASHBOARD_CACHE_BACKEND', 'memory')  # memory 进程内 / file 本机多进程共享 / none 不缓存
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 10))  # 缓存有效期（秒）
+    DASHBOARD_CACHE_SIZE = int(os.getenv('DASHBOARD_CACHE_SIZE', 256))  # memory 缓存最大条目数
+    DASHBOARD_CACHE_DIR = os.getenv('DASHBOARD_CACHE_DIR', os.path.join('logs', 'dashboard_cache'))  # file 缓存目录
+
+    # 看板每日汇总对账
+    ROLLUP_RECONCILE_MINUTES = int(os.getenv('ROLLUP_RECONCILE_MINUTES', 60))  # 对账间隔（分钟），0表示不定时对账
+    ROLLUP_RECONCILE_DAYS = int(os.getenv('ROLLUP_RECONCILE_DAYS', 3))  # 每次对账重新计算最近几天的汇总
 
 
 class DevelopmentConfig(Config):
@@ -60,12 +113,18 @@ class ProductionConfig(Config):
     """生产环境配置"""
     DEBUG = False
     SQLALCHEMY_ECHO = False
+    # Gunicorn 多进程部署时每个Web进程都会启动自己的工作进程池，生产环境默认由
+    # flask analysis-worker / flask transcode-worker 单独运行
+    ANALYSIS_WORKER_AUTOSTART = os.getenv('ANALYSIS_WORKER_AUTOSTART', 'false').lower() == 'true'
+    TRANSCODE_WORKER_AUTOSTART = os.getenv('TRANSCODE_WORKER_AUTOSTART', 'false').lower() == 'true'
 
 
 class TestingConfig(Config):
     """测试环境配置"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    ANALYSIS_WORKER_AUTOSTART = False
+    TRANSCODE_WORKER_AUTOSTART = False
 
 
 # 配置字典
@@ -49,14 +49,67 @@ export const videoApi = {
     })
   },
 
+  // 初始化分片上传（断点续传），返回 upload_id 和分片大小
+  initUpload: (data: {
+    mission_id: number
+    filename: string
+    total_size: number
+    checksum?: string
+    media_type?: string
+    collected_time?: string
+    road_section?: string
+  }) => {
+    return api.post('/videos/uploads', data)
+  },
+
+  // 上传分片，offset 为分片在文件中的起始字节
+  uploadChunk: (uploadId: string, offset: number, chunk: Blob) => {
+    return api.put(`/videos/uploads/${uploadId}`, chunk, {
+      headers: {
+        'Content-Type': 'application/octet-stream',
+        'Upload-Offset': String(offset)
+      }
+    })
+  },
+
+  // 查询上传进度（续传时从 received_bytes 开始）
+  getUploadProgress: (uploadId: string) => {
+    return api.get(`/videos/uploads/${uploadId}`)
+  },
+
+  // 完成上传（服务端校验 SHA-256 并创建视频记录）
+  completeUpload: (uploadId: string, checksum?: string) => {
+    return api.post(`/videos/uploads/${uploadId}/complete`, { checksum })
+  },
+
+  // 取消上传
+  abortUpload: (uploadId: string) => {
+    return api.delete(`/videos/uploads/${uploadId}`)
+  },
+
   // 获取视频分析结果（支持分页）
   getAnalysisResults: (id: string | number, params?: any) => {
     return api.get(`/videos/${id}/analysis-results`, { params })
   },
 
-  // 触发AI分析
+  // 触发AI分析（异步任务，返回任务信息）
   analyzeVideo: (id: string | number, detectionType: string = 'traffic_congestion') => {
     return api.post(`/videos/${id}/analyze`, { detection_type: detectionType })
+  },
+
+  // 获取视频的分析任务列表
+  getAnalysisJobs: (id: string | number) => {
+    return api.get(`/videos/${id}/analysis-jobs`)
+  },
+
+  // 获取分析任务状态和进度
+  getAnalysisJob: (jobId: string | number) => {
+    return api.get(`/videos/analysis-jobs/${jobId}`)
+  },
+
+  // 取消分析任务
+  cancelAnalysisJob: (jobId: string | number) => {
+    return api.post(`/videos/analysis-jobs/${jobId}/cancel`)
   }
 }
 
@@ -132,6 +185,21 @@ export const airspaceApi = {
   // 检查空域冲突
   checkConflict: (id: string | number, data: any) => {
     return api.post(`/airspaces/${id}/check-conflict`, data)
+  },
+
+  // 检查航线是否在空域内、是否穿越禁飞区
+  checkRoute: (data: { route: any; airspace_id?: number }) => {
+    return api.post('/airspaces/check-route', data)
+  },
+
+  // 获取地图视野内的空域（bbox: min_lng,min_lat,max_lng,max_lat，按zoom简化范围）
+  getViewportAirspaces: (params: { bbox: string; zoom?: number; type?: string; status?: string }) => {
+    return api.get('/airspaces/viewport', { params })
+  },
+
+  // 获取包含某个点的空域
+  getAirspacesAtPoint: (params: { lng: number; lat: number; zoom?: number }) => {
+    return api.get('/airspaces/at-point', { params })
   }
 }
 
@@ -195,6 +263,11 @@ export const flightApi = {
   // 获取待审批申请列表
   getPendingFlights: () => {
     return api.get('/flights/pending')
+  },
+
+  // 检测所有待审批申请的空域冲突（管理员）
+  getFlightConflicts: () => {
+    return api.get('/flights/conflicts')
   }
 }
 
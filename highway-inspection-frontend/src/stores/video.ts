@@ -17,6 +17,19 @@ export interface Video {
   mission?: any
 }
 
+// AI分析任务
+export interface AnalysisJob {
+  id: number
+  video_id: number
+  detection_type: string
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
+  progress: number
+  processed_frames: number
+  total_frames?: number
+  result_count: number
+  message?: string
+}
+
 interface ApiResponse<T = any> {
   code: number
   message: string
@@ -154,8 +167,8 @@ export const useVideoStore = defineStore('video', () => {
   const analyzeVideo = async (id: number, detectionType: string = 'traffic_congestion') => {
     loading.value = true
     try {
-      const response = await videoApi.analyzeVideo(id, detectionType) as ApiResponse<any>
-      if (response.code === 200 || response.code === 201) {
+      const response = await videoApi.analyzeVideo(id, detectionType) as ApiResponse<AnalysisJob>
+      if (response.code === 200 || response.code === 201 || response.code === 202) {
         ElMessage.success(response.message || 'AI分析已启动')
         return response.data
       } else {
@@ -171,6 +184,30 @@ export const useVideoStore = defineStore('video', () => {
     }
   }
 
+  // 轮询分析任务直到结束
+  const waitForAnalysisJob = async (
+    jobId: number,
+    onProgress?: (job: AnalysisJob) => void,
+    interval: number = 2000
+  ): Promise<AnalysisJob> => {
+    while (true) {
+      const response = await videoApi.getAnalysisJob(jobId) as ApiResponse<AnalysisJob>
+      const job = response.data as AnalysisJob
+      onProgress?.(job)
+      if (!['queued', 'running'].includes(job.status)) {
+        return job
+      }
+      await new Promise(resolve => setTimeout(resolve, interval))
+    }
+  }
+
+  // 取消分析任务
+  const cancelAnalysisJob = async (jobId: number) => {
+    const response = await videoApi.cancelAnalysisJob(jobId) as ApiResponse<AnalysisJob>
+    ElMessage.info(response.message || '已请求取消分析任务')
+    return response.data
+  }
+
   return {
     videos,
     loading,
@@ -182,7 +219,9 @@ export const useVideoStore = defineStore('video', () => {
     createVideo,
     fetchAnalysisResults,
     uploadMediaFile,
-    analyzeVideo
+    analyzeVideo,
+    waitForAnalysisJob,
+    cancelAnalysisJob
   }
 })
 